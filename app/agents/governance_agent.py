@@ -1,130 +1,774 @@
+import asyncio
+import hashlib
+import os
 import re
-from typing import Dict, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Pattern, Tuple
+
+import numpy as np
 
 from app.utils.logger import get_logger
+from app.utils.phrase_matcher import PhraseMatcher
+from app.utils.request_context import RequestContext
+from app.utils.topic_matcher import TopicMatcher
 from app.config import Config
 
 logger = get_logger("governance", "logs/governance.log")
 
-BANNED_PHRASES = getattr(Config, "BANNED_PHRASES", [])
-CONFIDENCE_THRESHOLD = getattr(Config, "CONFIDENCE_THRESHOLD", 0.5)
-THRESHOLDS = getattr(Config, "THRESHOLDS", {})
+DEFAULT_CONFIDENCE_THRESHOLD = 0.5  # fallback when the config sets no reasoner threshold
+DEFAULT_PII_FILTERS = {
+    "email": True, "phone": True, "ip": True,
+    "date": True, "id": True, "name": True,
+}
 # Simple regexes for crude PII detection/redaction
 RE_DATE = re.compile(r'\b(?:\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b')
 RE_ID = re.compile(r'\b(?:id|ssn|passport|card)[\s:]*[A-Za-z0-9-]{4,}\b', re.IGNORECASE)
 # Names: this is heuristic; you can replace with NER later
 RE_NAME = re.compile(r'\b([A-Z][a-z]{1,20}\s[A-Z][a-z]{1,20})\b')
 # Email pattern: user@domain.com
-RE_EMAIL = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# Local part and domain are capped at their RFC 5321 lengths: unbounded, every
+# word start in a long run like "a.a.a..." rescanned the rest of the run.
+RE_EMAIL = re.compile(r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,255}\.[A-Z|a-z]{2,}\b')
 # Phone pattern: supports various formats (US: (123) 456-7890, 123-456-7890, 123.456.7890, international: +1-123-456-7890)
 # Matches phone numbers with optional country code, parentheses, and various separators
 RE_PHONE = re.compile(r"\b(?:\+?1[-.\s]?)?(?:\(?\d{3}\)?[-.\s]?)?\d{3}[-.\s]?\d{4}\b")
 # IP address pattern: IPv4 addresses
 RE_IP = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
 
+# PII types in priority order: where matches of two types overlap, the
+# earlier type wins (as when each type was redacted in its own pass, in order)
+PII_PATTERNS = (
+    ("email", RE_EMAIL),
+    ("phone", RE_PHONE),
+    ("ip", RE_IP),
+    ("date", RE_DATE),
+    ("id", RE_ID),
+    ("name", RE_NAME),
+)
+PII_PLACEHOLDERS = {
+    "email": "[REDACTED_EMAIL]",
+    "phone": "[REDACTED_PHONE]",
+    "ip": "[REDACTED_IP]",
+    "date": "[REDACTED_DATE]",
+    "id": "[REDACTED_ID]",
+    "name": "[REDACTED_NAME]",
+}
+# Replaces text left unscanned when the time budget runs out (fail-closed)
+TIMEOUT_PLACEHOLDER = "[REDACTED_TIMEOUT]"
+# Stands in for text claimed by a higher-priority type while lower types scan:
+# a non-word character no pattern consumes, so no later match crosses the
+# claimed text and \b sees it as it saw the placeholder that replaced it
+MASK_CHAR = "\x00"
+
+
+# Suffixes of a text that could still grow into (or change) a PII match once
+# more text arrives. Each is a superset of the live prefixes of its pattern:
+# the characters the pattern can consume, limited to its longest match where
+# that is bounded (the trailing \b also looks at the character after it).
+PII_PENDING = {
+    "email": r"[A-Za-z0-9._%+@|-]+\Z",
+    "phone": r"[\d+().\s-]{1,17}\Z",
+    "ip": r"[\d.]{1,15}\Z",
+    "date": r"[\d/-]{1,10}\Z",
+    "id": (
+        r"(?i:\b(?:id|ssn|passport|card)[\s:]*[A-Za-z0-9-]*\Z"
+        r"|\b(?:i|s|ss|p|pa|pas|pass|passp|passpo|passpor|c|ca|car)\Z)"
+    ),
+    "name": r"[A-Za-z\s]{1,43}\Z",
+}
+PII_PENDING_PATTERNS = {name: re.compile(source) for name, source in PII_PENDING.items()}
+
+
+class PiiPlan(NamedTuple):
+    """The enabled PII types with their patterns, in priority order."""
+
+    types: Tuple[Tuple[str, Pattern], ...]
+    fingerprint: str
+
+
+@lru_cache(maxsize=64)
+def compile_pii_plan(enabled: Tuple[str, ...]) -> Optional[PiiPlan]:
+    types = tuple((name, rx) for name, rx in PII_PATTERNS if name in enabled)
+    if not types:
+        return None
+    fingerprint = "priority-merge\n" + "\n".join(f"{name}={rx.pattern}" for name, rx in types)
+    return PiiPlan(types, fingerprint)
+
+
+def pii_plan_version(plan: Optional[PiiPlan]) -> str:
+    """Stable fingerprint of a redaction plan, stored with pre-redacted text."""
+    if plan is None:
+        return "none"
+    return hashlib.sha1(plan.fingerprint.encode("utf-8")).hexdigest()[:16]
+
+
+def _is_valid_ip(ip_str: str) -> bool:
+    parts = ip_str.split('.')
+    if len(parts) != 4:
+        return False
+    try:
+        return all(0 <= int(part) <= 255 for part in parts)
+    except ValueError:
+        return False
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _mask(text: str, spans: List[Tuple[int, int, str, int]]) -> str:
+    parts, pos = [], 0
+    for start, end, _, _ in spans:
+        parts.append(text[pos:start])
+        parts.append(MASK_CHAR * (end - start))
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def scan_pii(
+    plan: PiiPlan,
+    text: str,
+    pos: int = 0,
+    claimed_before: Optional[int] = None,
+    pending_from: Optional[int] = None,
+    settled_before: Optional[int] = None,
+) -> Tuple[List[Tuple[int, int, str, int]], int]:
+    """
+    PII spans in text[pos:] as sorted (start, end, type, rank) tuples.
+
+    Types are scanned in priority order; each scans the text with the spans
+    of earlier types masked, so a lower-priority match can neither overlap
+    nor extend across a higher-priority one. `claimed_before` is the rank of
+    the type whose span covered text[pos - 1] in an earlier scan (that
+    character is masked for lower types). With `pending_from`, also returns
+    the leftmost position at or after it where, for any type, the text from
+    there on could still grow into a match; otherwise len(text). With
+    `settled_before`, only spans starting before it are masked for lower
+    types, since later ones may still change.
+    """
+    spans: List[Tuple[int, int, str, int]] = []
+    limit = len(text)
+    masked = text
+    for rank, (kind, rx) in enumerate(plan.types):
+        if claimed_before is not None and rank == claimed_before + 1 and pos > 0:
+            masked = masked[:pos - 1] + MASK_CHAR + masked[pos:]
+        if pending_from is not None:
+            pending = PII_PENDING_PATTERNS[kind].search(masked, pending_from)
+            if pending is not None:
+                limit = min(limit, pending.start())
+        found = [
+            (m.start(), m.end(), kind, rank)
+            for m in rx.finditer(masked, pos)
+            if kind != "ip" or _is_valid_ip(m.group())
+        ]
+        if found:
+            spans.extend(found)
+            if settled_before is not None:
+                found = [span for span in found if span[0] < settled_before]
+            if found and rank + 1 < len(plan.types):
+                masked = _mask(masked, found)
+    spans.sort()
+    return spans, limit
+
+
+def redact_with_plan(plan: Optional[PiiPlan], text: str) -> Tuple[str, List[Dict]]:
+    """
+    Redact PII in text with a compiled plan.
+
+    Returns the redacted text and the spans that were replaced, as dicts
+    {type, start, end, text} with offsets into the original text. Matches
+    that look like IPv4 addresses but are out of range are left as is.
+    """
+    if plan is None or not text:
+        return text, []
+
+    spans: List[Dict] = []
+    out, pos = [], 0
+    for start, end, kind, _ in scan_pii(plan, text)[0]:
+        out.append(text[pos:start])
+        out.append(_replacement(kind, text, start, end, spans))
+        pos = end
+    out.append(text[pos:])
+    return "".join(out), spans
+
+
+def _replacement(kind: str, text: str, start: int, end: int, spans: List[Dict], offset: int = 0) -> str:
+    spans.append({"type": kind, "start": offset + start, "end": offset + end, "text": text[start:end]})
+    return PII_PLACEHOLDERS[kind]
+
+
+class IncrementalRedactor:
+    """
+    PII redaction for text that arrives in chunks (e.g. a streamed answer).
+
+    `feed` returns the redacted text that can no longer be affected by what
+    follows and holds back only the trailing part that could still start or
+    extend a PII match, or change which type claims one; `flush` redacts
+    and returns the rest at end of stream. `spans` holds the replaced spans
+    with offsets into the whole text.
+
+    Without `max_holdback` the concatenated output equals redacting the
+    whole text at once. With it, at most `max_holdback` characters are held
+    back, and a PII-like run longer than that is cut: the part seen so far
+    is redacted as it matches then, and the rest is scanned on its own. A
+    match that keeps growing past the cut (e.g. an ID thousands of
+    characters long) therefore has its head redacted and its tail emitted
+    unredacted unless the tail matches by itself.
+    """
+
+    def __init__(self, enabled: Tuple[str, ...], max_holdback: Optional[int] = None):
+        self._plan = compile_pii_plan(enabled)
+        self._max_holdback = max_holdback
+        self._buf = ""
+        self._pos = 0        # scan position in _buf; text before it is already emitted
+        self._offset = 0     # stream offset of _buf[0]
+        self._claimed = None  # rank of the type whose span covered _buf[_pos - 1]
+        self.spans: List[Dict] = []
+
+    @property
+    def held_back(self) -> int:
+        """Number of characters received but not yet emitted."""
+        return len(self._buf) - self._pos
+
+    @property
+    def emitted(self) -> int:
+        """Number of input characters whose redacted form has been returned."""
+        return self._offset + self._pos
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        self._buf += chunk
+        return self._emit()
+
+    def flush(self) -> str:
+        out = self._emit(final=True)
+        self._offset += len(self._buf)
+        self._buf, self._pos, self._claimed = "", 0, None
+        return out
+
+    def _emit(self, final: bool = False) -> str:
+        if self._plan is None:
+            return self._advance([], len(self._buf))
+        floor = self._pos
+        if self._max_holdback is not None and not final:
+            # A run longer than this is cut rather than buffered without bound
+            floor = max(floor, len(self._buf) - self._max_holdback)
+        if final:
+            spans, _ = scan_pii(self._plan, self._buf, self._pos, self._claimed)
+            return self._advance(spans, len(self._buf))
+        settled = len(self._buf)
+        while True:
+            spans, limit = scan_pii(self._plan, self._buf, self._pos, self._claimed, floor, settled)
+            limit = min(limit, settled)
+            # A span reaching past `limit` could still lose its text to a
+            # higher-priority match there. One ending at it, or the word
+            # before it, depends on \b at `limit`, which changes if a word
+            # character there is claimed (masked) later.
+            unsettled = limit < len(self._buf) and _is_word(self._buf[limit])
+            for start, end, _, _ in spans:
+                if floor <= start < limit and (limit < end or (limit == end and unsettled)):
+                    limit = start
+                    break
+            while unsettled and limit > floor and _is_word(self._buf[limit - 1]):
+                limit -= 1
+            if limit == settled:
+                return self._advance(spans, limit)
+            settled = limit
+
+    def _advance(self, spans: List[Tuple[int, int, str, int]], limit: int) -> str:
+        out = []
+        pos, claimed = self._pos, self._claimed
+        for start, end, kind, rank in spans:
+            if start >= limit:
+                break
+            out.append(self._buf[pos:start])
+            out.append(_replacement(kind, self._buf, start, end, self.spans, self._offset))
+            pos, claimed = end, rank
+        if pos < limit:
+            out.append(self._buf[pos:limit])
+            pos, claimed = limit, None
+        if pos == self._pos:
+            return ""
+        # Keep one emitted character so \b at the next scan start sees its left side
+        keep = pos - 1
+        self._buf = self._buf[keep:]
+        self._offset += keep
+        self._pos = 1
+        self._claimed = claimed
+        return "".join(out)
+
+
+def redact_text(
+    pii_types: Tuple[str, ...],
+    text: str,
+    deadline: Optional[float] = None,
+    limits: Optional[Mapping] = None,
+) -> Tuple[str, List[Dict]]:
+    """
+    Redact text of any size.
+
+    `limits` are the GOVERNANCE_LIMITS of a policy snapshot (default: the
+    current policy). Texts up to segment_chars are redacted in one pass.
+    Longer ones are fed segment by segment through an IncrementalRedactor,
+    which carries the overlap between segments, so each regex call sees a
+    bounded window and pathological inputs cost linear rather than quadratic
+    time. The deadline (time.monotonic(), default now + time_budget_ms) is
+    checked between segments; on expiry the unscanned rest is replaced by
+    TIMEOUT_PLACEHOLDER (fail_closed) or passed through, and recorded as a
+    span of type "timeout".
+    """
+    if limits is None:
+        limits = governance_policy.current.limits
+    plan = compile_pii_plan(pii_types)
+    segment = int(limits.get("segment_chars", 4096))
+    if plan is None or len(text) <= segment:
+        return redact_with_plan(plan, text)
+
+    if deadline is None:
+        deadline = time.monotonic() + float(limits.get("time_budget_ms", 1000)) / 1000
+    redactor = IncrementalRedactor(pii_types, max_holdback=int(limits.get("max_holdback_chars", 1024)))
+    out = []
+    for start in range(0, len(text), segment):
+        if time.monotonic() > deadline:
+            done = redactor.emitted
+            fail_closed = limits.get("fail_closed", True)
+            logger.warning(
+                "PII redaction time budget exceeded after %d of %d chars (%s)",
+                done, len(text), "withholding the rest" if fail_closed else "rest not redacted",
+            )
+            out.append(TIMEOUT_PLACEHOLDER if fail_closed else text[done:])
+            redactor.spans.append({"type": "timeout", "start": done, "end": len(text), "text": ""})
+            return "".join(out), redactor.spans
+        out.append(redactor.feed(text[start:start + segment]))
+    out.append(redactor.flush())
+    return "".join(out), redactor.spans
+
+
+class PolicySnapshot(NamedTuple):
+    """
+    Everything governance decisions depend on, compiled once per config
+    version. Snapshots are never modified; a config change builds a new one.
+    """
+
+    version: int
+    banned_phrases: Tuple[str, ...]
+    banned_matcher: PhraseMatcher
+    thresholds: Mapping[str, float]
+    reasoner_threshold: float
+    retriever_threshold: Optional[float]
+    pii_filters: Mapping[str, bool]
+    pii_types: Tuple[str, ...]
+    pii_plan: Optional[PiiPlan]
+    pii_version: str
+    pre_checks: Mapping[str, bool]
+    banned_topics: Mapping[str, Tuple[str, ...]]
+    topic_threshold: float
+    limits: Mapping[str, object]
+    loaded_at: float
+
+
+def build_policy(
+    version: int,
+    banned_phrases: Optional[List[str]] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+    pre_checks: Optional[Dict[str, bool]] = None,
+    limits: Optional[Dict[str, object]] = None,
+) -> PolicySnapshot:
+    """Compile a policy from the current Config, with optional overrides."""
+    phrases = tuple(banned_phrases or getattr(Config, "BANNED_PHRASES", None) or [])
+    matching = getattr(Config, "BANNED_PHRASE_MATCHING", None) or {}
+
+    merged_thresholds = dict(getattr(Config, "THRESHOLDS", None) or {})
+    merged_thresholds.update(thresholds or {})
+
+    filters = getattr(Config, "PII_FILTERS", None)
+    filters = {k: bool(v) for k, v in filters.items()} if isinstance(filters, dict) else dict(DEFAULT_PII_FILTERS)
+
+    merged_pre_checks = dict(getattr(Config, "PRE_GOVERNANCE", None) or {})
+    merged_pre_checks.update(pre_checks or {})
+
+    merged_limits = dict(getattr(Config, "GOVERNANCE_LIMITS", None) or {})
+    merged_limits.update(limits or {})
+
+    topics_cfg = getattr(Config, "BANNED_TOPICS", None) or {}
+    topics = {}
+    if topics_cfg.get("enabled"):
+        topics = {str(name): tuple(examples or ()) for name, examples in (topics_cfg.get("topics") or {}).items()}
+
+    pii_types = tuple(name for name, _ in PII_PATTERNS if filters.get(name, True))
+    plan = compile_pii_plan(pii_types)
+    return PolicySnapshot(
+        version=version,
+        banned_phrases=phrases,
+        banned_matcher=PhraseMatcher(
+            phrases,
+            word_boundary=matching.get("word_boundary", False),
+            stemming=matching.get("stemming", False),
+        ),
+        thresholds=MappingProxyType(merged_thresholds),
+        reasoner_threshold=merged_thresholds.get(
+            "reasoner", getattr(Config, "CONFIDENCE_THRESHOLD", DEFAULT_CONFIDENCE_THRESHOLD)
+        ),
+        retriever_threshold=merged_thresholds.get("retriever"),
+        pii_filters=MappingProxyType(filters),
+        pii_types=pii_types,
+        pii_plan=plan,
+        pii_version=pii_plan_version(plan),
+        pre_checks=MappingProxyType(merged_pre_checks),
+        banned_topics=MappingProxyType(topics),
+        topic_threshold=float(topics_cfg.get("similarity_threshold", 0.6)),
+        limits=MappingProxyType(merged_limits),
+        loaded_at=time.time(),
+    )
+
+
+# Topic embeddings per topic set, computed once and shared by policy versions
+_topic_matchers: "OrderedDict[tuple, TopicMatcher]" = OrderedDict()
+_topic_lock = threading.Lock()
+
+
+def topic_matcher(policy: PolicySnapshot, embed: Callable[[List[str]], np.ndarray]) -> Optional[TopicMatcher]:
+    if not policy.banned_topics:
+        return None
+    key = tuple(policy.banned_topics.items())
+    with _topic_lock:
+        matcher = _topic_matchers.get(key)
+        if matcher is not None:
+            _topic_matchers.move_to_end(key)
+            return matcher
+    matcher = TopicMatcher(policy.banned_topics, embed)
+    with _topic_lock:
+        _topic_matchers[key] = matcher
+        while len(_topic_matchers) > 4:
+            _topic_matchers.popitem(last=False)
+    logger.info("Banned topic embeddings computed for %d topics", len(policy.banned_topics))
+    return matcher
+
+
+class PolicyStore:
+    """
+    Holds the current governance policy snapshot.
+
+    A new snapshot is built whenever the configuration is reloaded (e.g. by
+    PUT /pii/config) and published with a single reference assignment, so a
+    request reads one consistent policy without locking. With watching
+    enabled, external edits of the config file trigger the same reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._config_mtime = self._read_config_mtime()
+        self.current = build_policy(self._version)
+        self._task = None
+        Config.on_reload(self.reload)
+
+    @staticmethod
+    def _read_config_mtime() -> Optional[float]:
+        try:
+            return os.stat(Config._config_path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self):
+        with self._lock:
+            self._config_mtime = self._read_config_mtime()
+            snapshot = build_policy(self._version + 1)
+            self._version = snapshot.version
+            self.current = snapshot
+        logger.info(
+            "Governance policy v%d loaded (%d banned phrases, thresholds=%s)",
+            snapshot.version, len(snapshot.banned_phrases), dict(snapshot.thresholds),
+        )
+
+    def check_config_file(self) -> bool:
+        """Reload the config if its file changed since the last load; True if reloaded."""
+        mtime = self._read_config_mtime()
+        if mtime is None or mtime == self._config_mtime:
+            return False
+        logger.info("Config file %s changed, reloading", Config._config_path)
+        try:
+            Config.reload()
+        except Exception as e:
+            # Keep serving the previous policy until the file is valid again
+            self._config_mtime = mtime
+            logger.error("Config reload failed, keeping policy v%d: %s", self._version, e)
+            return False
+        return True
+
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.check_config_file()
+            except Exception as e:
+                logger.error("Config file watch failed: %s", e)
+
+    def start_watching(self):
+        cfg = getattr(Config, "GOVERNANCE_POLICY", None) or {}
+        if not cfg.get("watch_config", True) or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._watch(float(cfg.get("watch_interval_seconds", 2))))
+
+    async def stop_watching(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def snapshot(self) -> Dict:
+        policy = self.current
+        return {
+            "version": policy.version,
+            "loaded_at": policy.loaded_at,
+            "banned_phrases": len(policy.banned_phrases),
+            "thresholds": dict(policy.thresholds),
+            "pii_filters": dict(policy.pii_filters),
+            "pii_version": policy.pii_version,
+            "limits": dict(policy.limits),
+        }
+
+
+governance_policy = PolicyStore()
+
 class GovernanceAgent:
     def __init__(
         self,
         banned_phrases=None,
         threshold: Optional[float] = None,
         thresholds: Optional[Dict[str, float]] = None,
+        pre_checks: Optional[Dict[str, bool]] = None,
+        policy_store: Optional[PolicyStore] = None,
+        limits: Optional[Dict[str, object]] = None,
     ):
-        self.banned_phrases = banned_phrases or BANNED_PHRASES
-        self.thresholds = dict(THRESHOLDS or {})
-
-        if thresholds:
-            self.thresholds.update(thresholds)
-        if threshold is not None:
-            # Backwards compatibility for existing single-threshold usage
-            self.thresholds["reasoner"] = threshold
-
-        self.reasoner_threshold = self.thresholds.get("reasoner", CONFIDENCE_THRESHOLD)
-        self.retriever_threshold = self.thresholds.get("retriever")
+        self.policy_store = policy_store or governance_policy
+        # Constructor arguments override the shared policy for this agent only
+        self._overrides = {}
+        if banned_phrases:
+            self._overrides["banned_phrases"] = list(banned_phrases)
+        if thresholds or threshold is not None:
+            self._overrides["thresholds"] = dict(thresholds or {})
+            if threshold is not None:
+                # Backwards compatibility for existing single-threshold usage
+                self._overrides["thresholds"]["reasoner"] = threshold
+        if pre_checks:
+            self._overrides["pre_checks"] = dict(pre_checks)
+        if limits:
+            self._overrides["limits"] = dict(limits)
+        self._derived: Optional[PolicySnapshot] = None
 
+        policy = self.policy
         logger.info(
-            "GovernanceAgent initialized (reasoner_threshold=%.2f, retriever_threshold=%s)",
-            self.reasoner_threshold,
-            f"{self.retriever_threshold:.2f}" if self.retriever_threshold is not None else "None",
+            "GovernanceAgent initialized (policy v%d, reasoner_threshold=%.2f, retriever_threshold=%s)",
+            policy.version,
+            policy.reasoner_threshold,
+            f"{policy.retriever_threshold:.2f}" if policy.retriever_threshold is not None else "None",
         )
 
-    def _check_banned_phrases(self, text: str) -> List[str]:
-        matches = []
-        lower = text.lower()
-        for p in self.banned_phrases:
-            if p.lower() in lower:
-                matches.append(p)
-        return matches
+    @property
+    def policy(self) -> PolicySnapshot:
+        """The policy in force for this call; read once per decision."""
+        base = self.policy_store.current
+        if not self._overrides:
+            return base
+        derived = self._derived
+        if derived is None or derived.version != base.version:
+            derived = self._derived = build_policy(base.version, **self._overrides)
+        return derived
+
+    @property
+    def banned_phrases(self) -> Tuple[str, ...]:
+        return self.policy.banned_phrases
+
+    @property
+    def thresholds(self) -> Mapping[str, float]:
+        return self.policy.thresholds
+
+    @property
+    def reasoner_threshold(self) -> float:
+        return self.policy.reasoner_threshold
+
+    @property
+    def retriever_threshold(self) -> Optional[float]:
+        return self.policy.retriever_threshold
+
+    def _check_banned_phrases(self, text: str, policy: Optional[PolicySnapshot] = None) -> List[str]:
+        return (policy or self.policy).banned_matcher.find(text)
+
+    def _check_banned_topics(
+        self,
+        answer: str,
+        query_embedding: Optional[np.ndarray],
+        embed: Callable[[List[str]], np.ndarray],
+        policy: PolicySnapshot,
+    ) -> Dict[str, Dict[str, float]]:
+        """Topics matched by the answer and the query, scored in one matrix product."""
+        matcher = topic_matcher(policy, embed)
+        if matcher is None:
+            return {"answer": {}, "query": {}}
+        vectors = [np.asarray(embed([answer]), dtype=np.float32)]
+        if query_embedding is not None:
+            # The retriever's embedding of the query; not encoded again
+            vectors.append(np.atleast_2d(np.asarray(query_embedding, dtype=np.float32)))
+        matches = matcher.match(np.vstack(vectors), policy.topic_threshold)
+        return {"answer": matches[0], "query": matches[1] if len(matches) > 1 else {}}
 
     def _get_pii_filters(self) -> Dict[str, bool]:
-        """Get current PII filter settings from config (respects runtime updates)."""
-        filters = getattr(Config, "PII_FILTERS", None) or Config.get("PII_FILTERS")
-        if not isinstance(filters, dict):
-            return {
-                "email": True, "phone": True, "ip": True,
-                "date": True, "id": True, "name": True,
-            }
-        return {k: bool(v) for k, v in filters.items()}
+        """Current PII filter settings (follows config reloads)."""
+        return dict(self.policy.pii_filters)
 
     def _redact_pii(self, text: str) -> str:
-        original_text = text
-        filters = self._get_pii_filters()
-        redactions = []
-
-        if filters.get("email", True):
-            email_matches = RE_EMAIL.findall(text)
-            if email_matches:
-                text = RE_EMAIL.sub("[REDACTED_EMAIL]", text)
-                redactions.append(f"email(s): {len(email_matches)}")
-                logger.info("Redacted %d email(s) from text", len(email_matches))
-
-        if filters.get("phone", True):
-            phone_matches = RE_PHONE.findall(text)
-            if phone_matches:
-                text = RE_PHONE.sub("[REDACTED_PHONE]", text)
-                redactions.append(f"phone(s): {len(phone_matches)}")
-                logger.info("Redacted %d phone number(s) from text", len(phone_matches))
-
-        if filters.get("ip", True):
-            ip_matches = RE_IP.findall(text)
-            valid_ips = [ip for ip in ip_matches if self._is_valid_ip(ip)]
-            if valid_ips:
-                for ip in valid_ips:
-                    text = text.replace(ip, "[REDACTED_IP]")
-                redactions.append(f"IP address(es): {len(valid_ips)}")
-                logger.info("Redacted %d IP address(es) from text", len(valid_ips))
-
-        if filters.get("date", True):
-            date_matches = RE_DATE.findall(text)
-            if date_matches:
-                text = RE_DATE.sub("[REDACTED_DATE]", text)
-                redactions.append(f"date(s): {len(date_matches)}")
-
-        if filters.get("id", True):
-            id_matches = RE_ID.findall(text)
-            if id_matches:
-                text = RE_ID.sub("[REDACTED_ID]", text)
-                redactions.append(f"ID(s): {len(id_matches)}")
-
-        if filters.get("name", True):
-            name_matches = RE_NAME.findall(text)
-            if name_matches:
-                text = RE_NAME.sub("[REDACTED_NAME]", text)
-                redactions.append(f"name(s): {len(name_matches)}")
-
-        if redactions and text != original_text:
-            logger.info("PII redaction summary: %s", ", ".join(redactions))
-
-        return text
+        return self.redact_pii_spans(text)[0]
+
+    def redact_pii_spans(
+        self,
+        text: str,
+        policy: Optional[PolicySnapshot] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Redact PII with the plan for the enabled filters.
+
+        Returns the redacted text and the replaced spans (see `redact_with_plan`
+        and, for large texts and the time budget, `redact_text`).
+        """
+        policy = policy or self.policy
+        redacted, spans = redact_text(policy.pii_types, text, deadline, policy.limits)
+        if spans:
+            counts = {}
+            for span in spans:
+                counts[span["type"]] = counts.get(span["type"], 0) + 1
+            logger.info(
+                "PII redaction summary: %s",
+                ", ".join(f"{kind}: {count}" for kind, count in counts.items()),
+            )
+        return redacted, spans
     
+    def incremental_redactor(self) -> IncrementalRedactor:
+        """
+        Streaming redactor bound to the PII filters in force now. Holdback is
+        capped at GOVERNANCE_LIMITS.max_holdback_chars, so a long PII-like
+        token costs bounded work per chunk instead of being buffered whole;
+        only the part of such a token before the cap is redacted (see
+        IncrementalRedactor).
+        """
+        policy = self.policy
+        return IncrementalRedactor(
+            policy.pii_types, max_holdback=int(policy.limits.get("max_holdback_chars", 1024))
+        )
+
     def _is_valid_ip(self, ip_str: str) -> bool:
         """Validate if a string is a valid IP address."""
-        parts = ip_str.split('.')
-        if len(parts) != 4:
-            return False
-        try:
-            return all(0 <= int(part) <= 255 for part in parts)
-        except ValueError:
-            return False
+        return _is_valid_ip(ip_str)
+
+    def pre_check(
+        self,
+        query: str,
+        passages: List[Dict],
+        retriever_confidence: Optional[float] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        ctx: Optional[RequestContext] = None,
+    ) -> Optional[Dict]:
+        """
+        Governance checks that can be decided before generation.
+
+        Returns None when generation should proceed, otherwise a rejection
+        {"approved": False, "reason", "checks"} that `evaluate` would have
+        reached anyway (or, for a banned query, that policy forbids answering).
+        Banned topics are checked when the query embedding and the encoder
+        that produced it are given, or taken from the request context `ctx`
+        (which only encodes the query if topics are configured).
+        """
+        policy = self.policy
+        if not policy.pre_checks.get("enabled", True):
+            return None
+        reasons, checks = [], []
+
+        if policy.pre_checks.get("empty_retrieval", True) and not passages:
+            checks.append("empty_retrieval")
+            reasons.append("no_passages_retrieved")
+
+        if (
+            policy.pre_checks.get("retriever_threshold", True)
+            and passages
+            and retriever_confidence is not None
+            and policy.retriever_threshold is not None
+            and retriever_confidence < policy.retriever_threshold
+        ):
+            checks.append("retriever_threshold")
+            reasons.append(
+                f"retriever_low_confidence ({retriever_confidence:.2f} < {policy.retriever_threshold})"
+            )
+
+        query_checks, query_reasons = self._query_checks(query, policy, query_embedding, embed, ctx)
+        return self._rejection(policy, checks + query_checks, reasons + query_reasons)
+
+    def check_query(
+        self,
+        query: str,
+        query_embedding: Optional[np.ndarray] = None,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        ctx: Optional[RequestContext] = None,
+    ) -> Optional[Dict]:
+        """
+        The pre-generation checks that depend only on the query (banned
+        phrases and topics), for answers reused without retrieval, e.g. a
+        semantic cache hit for a similar earlier question.
+        """
+        policy = self.policy
+        if not policy.pre_checks.get("enabled", True):
+            return None
+        return self._rejection(policy, *self._query_checks(query, policy, query_embedding, embed, ctx))
+
+    def _query_checks(
+        self,
+        query: str,
+        policy: PolicySnapshot,
+        query_embedding: Optional[np.ndarray],
+        embed: Optional[Callable[[List[str]], np.ndarray]],
+        ctx: Optional[RequestContext],
+    ) -> Tuple[List[str], List[str]]:
+        checks, reasons = [], []
+        if policy.pre_checks.get("banned_query", True):
+            banned = self._check_banned_phrases(query, policy)
+            if banned:
+                checks.append("banned_query")
+                reasons.append(f"banned_phrases_in_query: {banned}")
+
+        if ctx is not None and policy.banned_topics and policy.pre_checks.get("banned_topic", True):
+            query_embedding, embed = ctx.query_embedding(), ctx.embed_texts
+        if policy.pre_checks.get("banned_topic", True) and query_embedding is not None and embed is not None:
+            matcher = topic_matcher(policy, embed)
+            topics = matcher.match(query_embedding, policy.topic_threshold)[0] if matcher else {}
+            if topics:
+                checks.append("banned_topic")
+                reasons.append(f"banned_topic_in_query: {list(topics)}")
+        return checks, reasons
+
+    @staticmethod
+    def _rejection(policy: PolicySnapshot, checks: List[str], reasons: List[str]) -> Optional[Dict]:
+        if not checks:
+            return None
+        reason = "; ".join(reasons)
+        logger.info("Pre-generation governance rejected query: %s", reason)
+        return {
+            "approved": False,
+            "reason": reason,
+            "checks": checks,
+            "policy_version": policy.version,
+            "thresholds": {"reasoner": policy.reasoner_threshold, "retriever": policy.retriever_threshold},
+        }
 
     def evaluate(
         self,
@@ -132,32 +776,54 @@ class GovernanceAgent:
         trace: list,
         confidence: float,
         retriever_confidence: Optional[float] = None,
+        query_embedding: Optional[np.ndarray] = None,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        ctx: Optional[RequestContext] = None,
     ) -> Dict:
+        policy = self.policy
+        if ctx is not None and policy.banned_topics:
+            query_embedding, embed = ctx.query_embedding(), ctx.embed_texts
+        deadline = time.monotonic() + float(policy.limits.get("time_budget_ms", 1000)) / 1000
         reasons = []
         approved = True
         if confidence is None:
             confidence = 0.0
-        if confidence < self.reasoner_threshold:
+        if confidence < policy.reasoner_threshold:
             approved = False
             reasons.append(
-                f"reasoner_low_confidence ({confidence:.2f} < {self.reasoner_threshold})"
+                f"reasoner_low_confidence ({confidence:.2f} < {policy.reasoner_threshold})"
             )
 
         if (
             retriever_confidence is not None
-            and self.retriever_threshold is not None
-            and retriever_confidence < self.retriever_threshold
+            and policy.retriever_threshold is not None
+            and retriever_confidence < policy.retriever_threshold
         ):
             approved = False
             reasons.append(
-                f"retriever_low_confidence ({retriever_confidence:.2f} < {self.retriever_threshold})"
+                f"retriever_low_confidence ({retriever_confidence:.2f} < {policy.retriever_threshold})"
             )
 
-        banned = self._check_banned_phrases(answer)
+        banned = self._check_banned_phrases(answer, policy)
         if banned:
             approved = False
             reasons.append(f"banned_phrases_present: {banned}")
-        redacted_answer = self._redact_pii(answer)
+        if embed is not None and policy.banned_topics:
+            topics = self._check_banned_topics(answer, query_embedding, embed, policy)
+            if topics["answer"]:
+                approved = False
+                reasons.append(f"banned_topic_in_answer: {list(topics['answer'])}")
+            if topics["query"]:
+                approved = False
+                reasons.append(f"banned_topic_in_query: {list(topics['query'])}")
+        redacted_answer, spans = self.redact_pii_spans(answer, policy, deadline)
+        pii_counts = {}
+        for span in spans:
+            pii_counts[span["type"]] = pii_counts.get(span["type"], 0) + 1
+        if any(span["type"] == "timeout" for span in spans):
+            reasons.append("governance_time_budget_exceeded")
+            if policy.limits.get("fail_closed", True):
+                approved = False
         if redacted_answer != answer:
             reasons.append("pii_redacted")
         reason = "; ".join(reasons) if reasons else "approved"
@@ -166,8 +832,15 @@ class GovernanceAgent:
             approved,
             reason,
             {
-                "reasoner": self.reasoner_threshold,
-                "retriever": self.retriever_threshold,
+                "reasoner": policy.reasoner_threshold,
+                "retriever": policy.retriever_threshold,
             },
         )
-        return {"approved": approved, "reason": reason, "redacted_answer": redacted_answer}
+        return {
+            "approved": approved,
+            "reason": reason,
+            "redacted_answer": redacted_answer,
+            "pii_counts": pii_counts,
+            "policy_version": policy.version,
+            "thresholds": {"reasoner": policy.reasoner_threshold, "retriever": policy.retriever_threshold},
+        }
@@ -1,8 +1,17 @@
 import asyncio
 import os
+import threading
+import time
 import httpx
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from app.utils.logger import get_logger
+from app.utils.token_budget import TokenBudget
+from app.utils.keep_warm import model_warmth
+from app.utils.ollama_pool import OllamaPool
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, HALF_OPEN
+from app.utils.metrics import metrics
+from app.utils.request_context import RequestContext
+from app.utils.result_cache import generation_cache, make_key
 import json
 import re
 from app.config import Config
@@ -14,133 +23,649 @@ OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", Config.OLLAMA_MODEL)
 OLLAMA_MAX_RETRIES = 3
 OLLAMA_BACKOFF_BASE = 0.5  # seconds
 OLLAMA_TIMEOUT = httpx.Timeout(30.0, read=300.0)
+# Fields of Ollama's final streaming chunk worth keeping
+OLLAMA_STATS_FIELDS = (
+    "context",
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+KEEP_WARM = getattr(Config, "KEEP_WARM", None) or {}
+CONTINUE_OLLAMA_CONTEXT = bool((getattr(Config, "SESSION_CONTEXT", None) or {}).get("continue_ollama_context", False))
+
+MODEL_CASCADE = getattr(Config, "MODEL_CASCADE", None) or {}
+REASONING_MODE = getattr(Config, "REASONING_MODE", None) or {}
+
+
+def _cascade_escalation_rate() -> float:
+    requests = metrics.counters.get("cascade_requests", 0)
+    return metrics.counters.get("cascade_escalations", 0) / requests if requests else 0.0
+
+
+# One breaker per model, shared by every ReasoningAgent so an outage is
+# detected once; a failing cascade tier does not open the other tier's circuit
+_MODEL_BREAKERS: Dict[str, CircuitBreaker] = {}
+_model_breakers_lock = threading.Lock()
+
+
+def model_breaker(model: str) -> CircuitBreaker:
+    with _model_breakers_lock:
+        breaker = _MODEL_BREAKERS.get(model)
+        if breaker is None:
+            breaker = _MODEL_BREAKERS[model] = CircuitBreaker.from_config(f"ollama:{model}")
+        return breaker
+
+
+def breaker_snapshots() -> Dict[str, Dict]:
+    with _model_breakers_lock:
+        breakers = dict(_MODEL_BREAKERS)
+    return {model: breaker.snapshot() for model, breaker in breakers.items()}
+
+
+OLLAMA_BREAKER = model_breaker(OLLAMA_MODEL)
+
+# Static part of every prompt; kept in the system prompt so it forms a stable prefix
+SYSTEM_HEADER = "You are a helpful assistant. Use the provided passages (do NOT hallucinate) to answer the query.\n\n"
+SYSTEM_REQUIREMENTS = (
+    "System Requirements:\n"
+    "1) Provide a concise answer in plain text.\n"
+    "2) Provide a trace array listing which passages (by index) you used and a short note per passage.\n"
+    "Return a JSON object with keys: 'answer' (string), 'trace' (list of {index:int, note:str}), and 'confidence' (float between 0 and 1).\n"
+    "Be concise.\n"
+)
+# System prompt of the map-reduce combine step
+REDUCE_SYSTEM = (
+    "You are a helpful assistant. Combine the partial answers, each written from a different group "
+    "of passages, into one answer to the query. Ignore partial answers that say the passages do not help.\n\n"
+    "Return a JSON object with keys: 'answer' (string), 'partials' (list of the PARTIAL numbers you used), "
+    "and 'confidence' (float between 0 and 1).\n"
+    "Be concise.\n"
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before generation completes."""
 
 
 class ReasoningAgent:
-    def __init__(self, ollama_url: str = OLLAMA_URL, model: str = OLLAMA_MODEL):
+    def __init__(
+        self,
+        ollama_url: str = OLLAMA_URL,
+        model: str = OLLAMA_MODEL,
+        pool: Optional[OllamaPool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self.ollama_url = ollama_url
         self.model = model
+        # Breaker of the agent's own model; other models (cascade tiers) use theirs
+        self.breaker = breaker or model_breaker(model)
+        # OLLAMA_ENDPOINTS (if configured) spreads generation over several hosts
+        self.pool = pool or OllamaPool.from_config(ollama_url)
         self.user_instructions = self._load_user_instructions()
+        self.budget = TokenBudget.from_config()
+        self.keep_alive = self._resolve_keep_alive(model)
+        self.cascade = dict(MODEL_CASCADE)
+        if self.cascade.get("enabled"):
+            # Tiers may be served by different hosts; keep-alive is resolved per model
+            self.small_model = self.cascade.get("small_model")
+            self.small_keep_alive = self._resolve_keep_alive(self.small_model)
+            metrics.register_gauge("cascade_escalation_rate", _cascade_escalation_rate)
+
+        logger.info(
+            "ReasoningAgent initialized (model=%s, endpoints=%s)",
+            model,
+            ", ".join(b.url for b in self.pool.backends),
+        )
+
+    def _build_prompt(
+        self,
+        query: str,
+        passages: List[Dict],
+        history: Optional[List[Dict]] = None,
+        indices: Optional[List[int]] = None,
+        ctx: Optional[RequestContext] = None,
+    ) -> Dict[str, str]:
+        """
+        Build the system and user prompt for a request.
 
-        logger.info("ReasoningAgent initialized (model=%s, url=%s)", model, ollama_url)
+        Everything static (role, user instructions, output requirements) goes
+        into the system prompt so the prompt prefix is identical across calls
+        and Ollama can reuse its KV cache; per-request content (passages,
+        history, query) follows, with the query last.
 
-    def _build_prompt(self, query: str, passages: List[Dict]) -> str:
-        context = "\n\n".join([
-            f"[PASSAGE {i}] (score={p['score']:.3f})\n{p['text']}"
-            for i, p in enumerate(passages)
-        ])
+        `indices` labels passages with their position in a larger retrieved
+        set (used by map-reduce groups); by default they are numbered 0..n-1.
+        Passages left empty by context compression are skipped but keep
+        their label. Token counts are memoized on the request context `ctx`.
+        """
+        labels = indices if indices is not None else list(range(len(passages)))
+        shown = [i for i, p in enumerate(passages) if p.get("text")]
+        labels = [labels[i] for i in shown]
+        plan = self.budget.allocate(
+            fixed=f"{SYSTEM_HEADER}User Instructions:\n\n{SYSTEM_REQUIREMENTS}Passages:\n\nQuery: {query}\n",
+            instructions=self.user_instructions,
+            passages=[passages[i] for i in shown],
+            history=history,
+            render_passage=lambda i, p: f"[PASSAGE {labels[i]}] (score={p['score']:.3f})\n{p['text']}",
+            render_turn=lambda i, t: f"[MEMORY {i}] Q: {t['query']} | A: {t['answer']}",
+            count=ctx.count_tokens if ctx is not None else None,
+        )
 
-        prompt = (
-            "You are a helpful assistant. Use the provided passages (do NOT hallucinate) to answer the query.\n\n"
-            f"Query: {query}\n\n"
-            "Passages:\n"
-            f"{context}\n\n"
+        system = (
+            SYSTEM_HEADER +
             "User Instructions:\n"
-            f"{self.user_instructions}\n\n"
-            "System Requirements:\n"
-            "1) Provide a concise answer in plain text.\n"
-            "2) Provide a trace array listing which passages (by index) you used and a short note per passage.\n"
-            "Return a JSON object with keys: 'answer' (string), 'trace' (list of {index:int, note:str}), and 'confidence' (float between 0 and 1).\n"
-            "Be concise.\n"
+            f"{plan['instructions']}\n\n"
+            + SYSTEM_REQUIREMENTS
+        )
+
+        context = "\n\n".join(text for _, text in plan["passages"])
+        prompt = "Passages:\n" f"{context}\n\n"
+        if plan["history"]:
+            history_text = "\n".join(text for _, text in plan["history"])
+            prompt += f"Previous context:\n{history_text}\n\n"
+        prompt += f"Query: {query}\n"
+
+        logger.info(
+            "Built prompt (%d chars, ~%d tokens of num_ctx=%d, %d/%d passages, %d/%d history turns)",
+            len(system) + len(prompt),
+            plan["tokens"]["total"],
+            self.budget.num_ctx,
+            len(plan["passages"]),
+            len(passages),
+            len(plan["history"]),
+            len(history or []),
         )
-        
-        logger.info("Built prompt (%d chars, %d passages)", len(prompt), len(passages))
 
+        return {"system": system, "prompt": prompt}
 
-        return prompt
+    async def _stream_generate(self, payload: Dict, url: str):
+        """Stream one generation from the Ollama at url; returns (text, final-chunk stats)."""
+        response_text = ""
+        stats = {}
 
-    async def _call_ollama(self, prompt: str) -> str:
+        async with httpx.AsyncClient(timeout=OLLAMA_TIMEOUT) as client:
+            async with client.stream("POST", url, json=payload) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        data = json.loads(line)
+                        if "response" in data:
+                            response_text += data["response"]
+                        if data.get("done"):
+                            stats = {k: data[k] for k in OLLAMA_STATS_FIELDS if k in data}
+                            break
+                    except Exception as e:
+                        logger.warning("Failed to parse streaming chunk: %s", e)
+
+        return response_text, stats
+
+    async def _call_ollama(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        deadline: Optional[float] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict:
         """
         Call Ollama with retry, exponential backoff, and streaming enabled.
+
+        Returns the generated text under "response" together with the
+        statistics Ollama reports in its final chunk (context, prompt_eval_count,
+        prompt_eval_duration, load_duration, ...).
+
+        `deadline` is an absolute time.time() value. The upstream stream is
+        closed as soon as it passes and no further retries are attempted; the
+        same happens when the calling task is cancelled.
+
+        Calls go through the model's circuit breaker: while it is open they
+        fail immediately with CircuitOpenError, and a half-open probe makes a
+        single attempt without retries.
+
+        `model` defaults to the agent's model (the large tier of a cascade).
+
+        Without a `context`, generation is deterministic (temperature 0), so
+        well-formed responses are served from the generation cache, keyed by
+        the final prompt, model and options; `use_cache=False` always calls
+        Ollama (health probes).
         """
+        model = model or self.model
+        cache_key = None
+        if use_cache and generation_cache.enabled and not context:
+            cache_key = make_key(model, system, prompt, self.budget.num_ctx)
+            cached = generation_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Generation cache hit for model %s", model)
+                return cached
+        breaker = self.breaker_for(model)
+        if not breaker.allow():
+            metrics.inc("ollama_breaker_rejections")
+            raise CircuitOpenError(f"Ollama circuit for {model} is open")
+        probing = breaker.state == HALF_OPEN
+        try:
+            result = await self._call_ollama_with_retries(
+                prompt,
+                system,
+                context,
+                deadline,
+                model,
+                max_attempts=1 if probing else OLLAMA_MAX_RETRIES,
+            )
+        except (asyncio.CancelledError, DeadlineExceeded):
+            breaker.record_ignored()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        if cache_key is not None and self._parse_with_status(result["response"])[1]:
+            generation_cache.set(cache_key, {"response": result["response"]})
+        return result
+
+    def breaker_for(self, model: str) -> CircuitBreaker:
+        return self.breaker if model == self.model else model_breaker(model)
+
+    async def _call_ollama_with_retries(
+        self,
+        prompt: str,
+        system: Optional[str],
+        context: Optional[List[int]],
+        deadline: Optional[float],
+        model: str,
+        max_attempts: int = OLLAMA_MAX_RETRIES,
+    ) -> Dict:
+        """Retry loop behind _call_ollama; each attempt is routed through the pool."""
+        keep_alive = self.keep_alive if model == self.model else self._resolve_keep_alive(model)
         payload = {
-            "model": self.model,
+            "model": model,
             "prompt": prompt,
-            "temperature": 0.0,
-            "stream": True
+            "stream": True,
+            "options": {"temperature": 0.0, "num_ctx": self.budget.num_ctx},
         }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if system:
+            payload["system"] = system
+        if context:
+            payload["context"] = context
 
         last_exception = None
+        # Retries prefer backends this request has not tried yet
+        tried_urls = set()
 
-        for attempt in range(OLLAMA_MAX_RETRIES):
+        for attempt in range(max_attempts):
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise DeadlineExceeded("Request deadline passed before calling Ollama")
             try:
-                logger.info(
-                    "Calling Ollama (attempt %d/%d) at %s",
-                    attempt + 1,
-                    OLLAMA_MAX_RETRIES,
-                    self.ollama_url,
-                )
+                def call(url, attempt=attempt):
+                    logger.info(
+                        "Calling Ollama (attempt %d/%d) at %s",
+                        attempt + 1,
+                        max_attempts,
+                        url,
+                    )
+                    tried_urls.add(url)
+                    return self._stream_generate(payload, url)
 
-                response_text = ""
-
-                async with httpx.AsyncClient(timeout=OLLAMA_TIMEOUT) as client:
-                    async with client.stream("POST", self.ollama_url, json=payload) as resp:
-                        resp.raise_for_status()
-                        async for line in resp.aiter_lines():
-                            if not line.strip():
-                                continue
-                            try:
-                                data = json.loads(line)
-                                if "response" in data:
-                                    response_text += data["response"]
-                                if data.get("done"):
-                                    break
-                            except Exception as e:
-                                logger.warning("Failed to parse streaming chunk: %s", e)
+                generation = self.pool.run(model, call, avoid=tried_urls)
+                if remaining is not None:
+                    generation = asyncio.wait_for(generation, remaining)
+                response_text, stats = await generation
 
                 logger.info("Raw LLM output length: %d", len(response_text))
-                return response_text
+                try:
+                    model_warmth.record(model, stats, keep_alive=keep_alive)
+                except Exception as e:
+                    # Bookkeeping only; never turn a generated answer into a failure
+                    logger.warning("Model warmth tracking failed for %s: %s", model, e)
+                if "prompt_eval_count" in stats:
+                    logger.info(
+                        "Ollama prompt eval: %d tokens in %.1f ms (load %.1f ms)",
+                        stats["prompt_eval_count"],
+                        stats.get("prompt_eval_duration", 0) / 1e6,
+                        stats.get("load_duration", 0) / 1e6,
+                    )
+                return {"response": response_text, **stats}
+
+            except asyncio.TimeoutError:
+                logger.warning("Request deadline passed during generation; upstream stream closed")
+                raise DeadlineExceeded("Request deadline passed during generation")
+
+            except asyncio.CancelledError:
+                logger.warning("Generation cancelled; upstream stream closed")
+                raise
 
             except (httpx.RequestError, httpx.HTTPStatusError) as e:
                 last_exception = e
                 logger.warning(
                     "Ollama call failed (attempt %d/%d): %s",
                     attempt + 1,
-                    OLLAMA_MAX_RETRIES,
+                    max_attempts,
                     e,
                 )
 
-                if attempt < OLLAMA_MAX_RETRIES - 1:
+                if attempt < max_attempts - 1:
                     backoff = OLLAMA_BACKOFF_BASE * (2 ** attempt)
+                    if deadline is not None and time.time() + backoff >= deadline:
+                        logger.warning("Skipping remaining retries: request deadline would pass")
+                        raise DeadlineExceeded("Request deadline passed while retrying Ollama") from e
                     logger.info("Retrying after %.2f seconds", backoff)
                     await asyncio.sleep(backoff)
 
         logger.error("Ollama unavailable after retries")
         raise RuntimeError("Ollama unavailable") from last_exception
 
+    def _resolve_keep_alive(self, model: str):
+        """keep_alive sent with each request when the keep-warm scheduler is enabled."""
+        if not KEEP_WARM.get("enabled"):
+            return None
+        settings = (KEEP_WARM.get("models") or {}).get(model) or {}
+        return settings.get("keep_alive", KEEP_WARM.get("keep_alive"))
+
     def _parse_llm_output(self, raw_text: str) -> Dict:
         """
         Try to parse JSON from model output. Fallback to wrapping raw text if parsing fails.
         """
+        return self._parse_with_status(raw_text)[0]
+
+    def _parse_with_status(self, raw_text: str):
+        """Parse model output; also report whether it was a well-formed JSON answer."""
         try:
-            return json.loads(raw_text)
+            parsed = json.loads(raw_text)
+            return parsed, isinstance(parsed, dict) and "answer" in parsed
         except Exception:
             m = re.search(r'\{.*\}', raw_text, re.S)
             if m:
                 try:
-                    return json.loads(m.group(0))
+                    parsed = json.loads(m.group(0))
+                    return parsed, isinstance(parsed, dict) and "answer" in parsed
                 except Exception:
                     pass
             return {
                 "answer": raw_text.strip(),
                 "trace": [],
                 "confidence": Config.CONFIDENCE_THRESHOLD
-            }
+            }, False
+
+    async def reason(
+        self,
+        query: str,
+        passages: List[Dict],
+        history: Optional[List[Dict]] = None,
+        context: Optional[List[int]] = None,
+        deadline: Optional[float] = None,
+        accept: Optional[Callable[[Dict], bool]] = None,
+        mode: Optional[str] = None,
+        ctx: Optional[RequestContext] = None,
+    ) -> Dict:
+        """
+        Answer the query from the passages.
+
+        `context` is the token context Ollama returned for the previous turn of
+        the session; when given (and it still fits the budget) it replaces the
+        replayed history. If SESSION_CONTEXT.continue_ollama_context is enabled,
+        the new context is returned under the "context" key.
+
+        DeadlineExceeded and task cancellation propagate to the caller instead
+        of producing the fallback answer.
+
+        With MODEL_CASCADE enabled the small model answers first; `accept` is
+        an optional check (e.g. governance) whose rejection also escalates to
+        the large model.
+
+        `mode` selects "single" (one prompt with every passage) or
+        "map_reduce"; it defaults to REASONING_MODE.default.
 
-    async def reason(self, query: str, passages: List[Dict]) -> Dict:
-        prompt = self._build_prompt(query, passages)
+        `ctx` is the request context; prompt pieces counted once (e.g. when a
+        continued context is dropped and the prompt rebuilt with history) are
+        not tokenized again.
+        """
+        mode = mode or REASONING_MODE.get("default", "single")
+        group_size = int(REASONING_MODE.get("group_size", 3))
+        if mode == "map_reduce" and len(passages) > group_size:
+            return await self._reason_map_reduce(query, passages, history, deadline, ctx)
+
+        if self.cascade.get("enabled"):
+            return await self._reason_cascade(query, passages, history, deadline, accept, ctx)
+
+        prompts = None
+        if context:
+            prompts = self._build_prompt(query, passages, ctx=ctx)
+            count = ctx.count_tokens if ctx is not None else self.budget.count
+            prompt_tokens = count(prompts["system"] + prompts["prompt"])
+            if len(context) + prompt_tokens > self.budget.prompt_budget:
+                logger.info("Ollama context too long (%d tokens), replaying history instead", len(context))
+                context = None
+        if not context:
+            prompts = self._build_prompt(query, passages, history, ctx=ctx)
         try:
-            raw = await self._call_ollama(prompt)
-            parsed = self._parse_llm_output(raw)
+            result = await self._call_ollama(
+                prompts["prompt"], system=prompts["system"], context=context, deadline=deadline
+            )
+            parsed = self._parse_llm_output(result["response"])
+            if CONTINUE_OLLAMA_CONTEXT and result.get("context"):
+                parsed["context"] = result["context"]
             logger.info("Reasoning completed for query '%s'", query)
             return parsed
+        except DeadlineExceeded:
+            raise
+        except CircuitOpenError as e:
+            logger.warning("ReasoningAgent fallback activated: %s", e)
+            return self._fallback_result()
         except Exception as e:
             logger.exception("ReasoningAgent fallback activated: %s", e)
-            return {
-                "answer": "The reasoning agent is temporarily unavailable.",
-                "trace": [],
-                "confidence": 0.0
-            }
+            return self._fallback_result()
+
+    async def _map_group(
+        self, query: str, passages: List[Dict], group: List[int], deadline, semaphore, ctx=None
+    ) -> Optional[Dict]:
+        """Answer the query from one group of passages; returns None if the call fails."""
+        async with semaphore:
+            prompts = self._build_prompt(query, [passages[i] for i in group], indices=group, ctx=ctx)
+            try:
+                result = await self._call_ollama(prompts["prompt"], system=prompts["system"], deadline=deadline)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.warning("Map call for passages %s failed: %s", group, e)
+                return None
+        parsed = self._parse_llm_output(result["response"])
+        parsed["trace"] = self._remap_trace(parsed.get("trace"), group)
+        parsed["passages"] = group
+        return parsed
+
+    def _remap_trace(self, trace, group: List[int]) -> List[Dict]:
+        """
+        Map trace entries of a group answer onto the original passage numbering.
+        Groups are labelled with original indices, but a model may still count
+        from zero within the group; such indices are translated.
+        """
+        remapped = []
+        for entry in trace if isinstance(trace, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get("index"))
+            except (TypeError, ValueError):
+                continue
+            if index not in group:
+                if 0 <= index < len(group):
+                    index = group[index]
+                else:
+                    continue
+            remapped.append({**entry, "index": index})
+        return remapped
+
+    async def _reason_map_reduce(self, query, passages, history, deadline, ctx=None) -> Dict:
+        """
+        Answer each group of passages concurrently (map), then combine the
+        partial answers with one short call (reduce).
+        """
+        group_size = int(REASONING_MODE.get("group_size", 3))
+        semaphore = asyncio.Semaphore(int(REASONING_MODE.get("max_concurrency", 4)))
+        groups = [list(range(i, min(i + group_size, len(passages)))) for i in range(0, len(passages), group_size)]
+        logger.info("Map-reduce reasoning over %d passages in %d groups", len(passages), len(groups))
+
+        tasks = [
+            asyncio.ensure_future(self._map_group(query, passages, group, deadline, semaphore, ctx))
+            for group in groups
+        ]
+        try:
+            partials = await asyncio.gather(*tasks)
+        finally:
+            # A map call hitting the deadline (or the request being cancelled)
+            # stops the other calls instead of leaving them running on Ollama
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        partials = [p for p in partials if p is not None]
+        if not partials:
+            logger.error("Map-reduce fallback activated: every map call failed")
+            return self._fallback_result()
+
+        partial_text = "\n\n".join(
+            f"[PARTIAL {k}] (passages {p['passages']}, confidence={float(p.get('confidence', 0.0)):.2f})\n{p.get('answer', '')}"
+            for k, p in enumerate(partials)
+        )
+        plan = self.budget.allocate(
+            fixed=f"{REDUCE_SYSTEM}Partial answers:\n{partial_text}\n\nQuery: {query}\n",
+            instructions="",
+            passages=[],
+            history=history,
+            render_turn=lambda i, t: f"[MEMORY {i}] Q: {t['query']} | A: {t['answer']}",
+            count=ctx.count_tokens if ctx is not None else None,
+        )
+        prompt = f"Partial answers:\n{partial_text}\n\n"
+        if plan["history"]:
+            prompt += "Previous context:\n" + "\n".join(text for _, text in plan["history"]) + "\n\n"
+        prompt += f"Query: {query}\n"
+
+        def most_confident_partial() -> Dict:
+            best = max(partials, key=lambda p: float(p.get("confidence", 0.0)))
+            return {"answer": best.get("answer", ""), "trace": best["trace"], "confidence": best.get("confidence", 0.0)}
+
+        try:
+            result = await self._call_ollama(prompt, system=REDUCE_SYSTEM, deadline=deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.exception("Reduce call failed, using the most confident partial answer: %s", e)
+            return most_confident_partial()
+
+        reduced = self._parse_llm_output(result["response"])
+        if not isinstance(reduced, dict):
+            logger.warning("Reduce output is not a JSON object, using the most confident partial answer")
+            return most_confident_partial()
+        cited = reduced.get("partials")
+        if not isinstance(cited, list):
+            cited = []
+        cited = [k for k in cited if isinstance(k, int) and not isinstance(k, bool) and 0 <= k < len(partials)]
+        trace, seen = [], set()
+        for partial in (partials[k] for k in (cited or range(len(partials)))):
+            for entry in partial["trace"]:
+                if entry["index"] not in seen:
+                    seen.add(entry["index"])
+                    trace.append(entry)
+        logger.info("Map-reduce reasoning completed for query '%s' (%d partials)", query, len(partials))
+        return {
+            "answer": reduced.get("answer", ""),
+            "trace": sorted(trace, key=lambda e: e["index"]),
+            "confidence": reduced.get("confidence", 0.0),
+        }
+
+    def _escalation_reason(self, parsed: Dict, well_formed: bool, accept) -> Optional[str]:
+        """Why a small-model answer must be escalated, or None to keep it."""
+        if not well_formed:
+            return "malformed"
+        try:
+            confidence = float(parsed.get("confidence", 0.0))
+        except (TypeError, ValueError):
+            return "malformed"
+        if confidence < float(self.cascade.get("confidence_threshold", 0.6)):
+            return "low_confidence"
+        if accept is not None and not accept(parsed):
+            return "governance"
+        return None
+
+    async def _reason_cascade(self, query, passages, history, deadline, accept, ctx=None) -> Dict:
+        """
+        Small model first, large model only when the small answer is not good
+        enough. Ollama contexts are model-specific, so cascades always replay
+        history instead of continuing a context.
+        """
+        prompts = self._build_prompt(query, passages, history, ctx=ctx)
+        metrics.inc("cascade_requests")
+
+        start = time.time()
+        try:
+            result = await self._call_ollama(
+                prompts["prompt"], system=prompts["system"], deadline=deadline, model=self.small_model
+            )
+            parsed, well_formed = self._parse_with_status(result["response"])
+            reason = self._escalation_reason(parsed, well_formed, accept)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning("Small model %s failed: %s", self.small_model, e)
+            reason = "small_model_error"
+        small_latency = time.time() - start
+        metrics.observe("cascade_latency_small", small_latency)
+
+        if reason is None:
+            metrics.inc("cascade_answered_small")
+            large = metrics.summary("cascade_latency_large")
+            if large["count"]:
+                metrics.observe("cascade_latency_saved", large["mean"] - small_latency)
+            logger.info("Reasoning completed by small model %s for query '%s'", self.small_model, query)
+            parsed["model"] = self.small_model
+            return parsed
+
+        metrics.inc("cascade_escalations")
+        metrics.inc(f"cascade_escalations_{reason}")
+        # Time spent on the small tier is lost on escalated requests
+        metrics.observe("cascade_latency_saved", -small_latency)
+        logger.info("Escalating query '%s' to %s (%s)", query, self.model, reason)
+
+        start = time.time()
+        try:
+            result = await self._call_ollama(prompts["prompt"], system=prompts["system"], deadline=deadline)
+            metrics.observe("cascade_latency_large", time.time() - start)
+            parsed = self._parse_llm_output(result["response"])
+            parsed["model"] = self.model
+            logger.info("Reasoning completed for query '%s'", query)
+            return parsed
+        except DeadlineExceeded:
+            raise
+        except CircuitOpenError as e:
+            logger.warning("ReasoningAgent fallback activated: %s", e)
+            return self._fallback_result()
+        except Exception as e:
+            logger.exception("ReasoningAgent fallback activated: %s", e)
+            return self._fallback_result()
+
+    async def ping(self, deadline: Optional[float] = None) -> bool:
+        """
+        Health probe: one generation that always reaches Ollama (never the
+        generation cache or the fallback answer). Raises when Ollama fails.
+        """
+        result = await self._call_ollama("ping", deadline=deadline, use_cache=False)
+        return result.get("response") is not None
+
+    def _fallback_result(self) -> Dict:
+        return {
+            "answer": "The reasoning agent is temporarily unavailable.",
+            "trace": [],
+            "confidence": 0.0
+        }
         
     def _load_user_instructions(self) -> str:
         """
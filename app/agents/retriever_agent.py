@@ -2,11 +2,16 @@ import os
 import numpy as np
 from pathlib import Path
 import pickle
+import threading
 # Lazy import to avoid mutex issues
 # from sentence_transformers import SentenceTransformer
 import faiss
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from app.utils.logger import get_logger
+from app.utils.request_context import RequestContext
+from app.utils.result_cache import make_key, normalize_query, retrieval_cache
+from app.utils.passage_redaction import is_current, redact_passages, served_text
+from app.agents.governance_agent import governance_policy
 from app.config import Config
 logger = get_logger("retriever", "logs/retriever.log")
 
@@ -14,6 +19,18 @@ INDEX_PATH = Path("app/index.faiss")
 META_PATH = Path("app/index_meta.pkl")
 EMBED_MODEL = os.getenv("EMBED_MODEL", Config.EMBED_MODEL)
 EMBED_DIM = Config.EMBED_DIM
+INDEX_REDACTION = getattr(Config, "INDEX_REDACTION", None) or {}
+
+def index_version() -> str:
+    """
+    Identifier of the index on disk; changes whenever the index is rebuilt
+    (by any RetrieverAgent instance or the indexer CLI).
+    """
+    try:
+        stat = INDEX_PATH.stat()
+    except OSError:
+        return "none"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
 
 class RetrieverAgent:
     def __init__(self, model_name: str = EMBED_MODEL):
@@ -23,6 +40,10 @@ class RetrieverAgent:
         self.model = SentenceTransformer(model_name)
         self.index = None
         self.meta = []
+        self._redaction_lock = threading.Lock()
+        self._redaction_pending = None
+        # index_version() of the index and meta this instance loaded or built
+        self._index_version = None
         print("AUTO_BUILD_FAISS: ", Config.AUTO_BUILD_FAISS)
         # Check if index exists, auto-build if enabled and missing
         if not (INDEX_PATH.exists() and META_PATH.exists()):
@@ -83,16 +104,85 @@ class RetrieverAgent:
 
     def _load_index(self):
         logger.info("Loading FAISS index from %s", INDEX_PATH)
+        self._index_version = index_version()
         self.index = faiss.read_index(str(INDEX_PATH))
         with open(META_PATH, "rb") as f:
             self.meta = pickle.load(f)
         logger.info("Loaded %d passages", len(self.meta))
+        self._check_redaction()
 
     def save_index(self, index, meta):
         logger.info("Saving FAISS index to %s", INDEX_PATH)
         faiss.write_index(index, str(INDEX_PATH))
-        with open(META_PATH, "wb") as f:
+        self.save_meta(meta)
+
+    def save_meta(self, meta):
+        # Write then rename so other processes never load a partial file
+        tmp_path = META_PATH.with_suffix(META_PATH.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
             pickle.dump(meta, f)
+        os.replace(tmp_path, META_PATH)
+
+    def on_config_reload(self):
+        """
+        Re-redact the index in the background right away after a PII filter
+        change, instead of redacting stale passages inline on every query.
+        Registered by the gateway for its long-lived retriever only; short-
+        lived instances (e.g. the upload routes') must not rewrite the meta.
+        """
+        try:
+            self._check_redaction()
+        except Exception as e:
+            logger.error("Index redaction check after config reload failed: %s", e)
+
+    def _check_redaction(self):
+        """Schedule re-redaction of the index if it was redacted with other PII filters."""
+        if not INDEX_REDACTION.get("enabled") or not self.meta:
+            return
+        policy = governance_policy.current
+        if all(is_current(m, policy) for m in self.meta):
+            return
+        with self._redaction_lock:
+            if self._redaction_pending == policy.pii_version:
+                return
+            self._redaction_pending = policy.pii_version
+        if INDEX_REDACTION.get("background", True):
+            threading.Thread(
+                target=self._redact_index, args=(policy,), name="index-redaction", daemon=True
+            ).start()
+        else:
+            self._redact_index(policy)
+
+    def _redact_index(self, policy):
+        source = self.meta
+        logger.info("Re-redacting %d passages for PII filters %s", len(source), policy.pii_version)
+        rebuilt_elsewhere = False
+        try:
+            meta = redact_passages(source, policy)
+            if self.meta is not source or governance_policy.current.pii_version != policy.pii_version:
+                # Index rebuilt or filters changed meanwhile; that reload schedules a new pass
+                return
+            if index_version() != self._index_version:
+                # Another instance or process rebuilt the index; this meta no
+                # longer matches index.faiss, so load theirs instead of saving
+                rebuilt_elsewhere = True
+            else:
+                self.save_meta(meta)
+                self.meta = meta
+                logger.info("Index redaction complete (PII filters %s)", policy.pii_version)
+        except Exception as e:
+            logger.error("Index redaction failed: %s", e)
+        finally:
+            with self._redaction_lock:
+                if self._redaction_pending == policy.pii_version:
+                    self._redaction_pending = None
+        if rebuilt_elsewhere:
+            logger.info("Index changed on disk during redaction; reloading it")
+            try:
+                # Loading re-checks redaction against the current filters
+                self._load_index()
+            except Exception as e:
+                logger.error("Reloading the rebuilt index failed: %s", e)
 
     def build_index_from_texts(self, texts: List[Dict[str, str]]):
         logger.info("Building new FAISS index with %d texts", len(texts))
@@ -107,29 +197,87 @@ class RetrieverAgent:
         index.add(embeddings)
         # store meta in same order
         meta = texts
+        if INDEX_REDACTION.get("enabled"):
+            meta = redact_passages(texts, governance_policy.current)
         self.save_index(index, meta)
+        self._index_version = index_version()
         self.index = index
         self.meta = meta
+        retrieval_cache.clear()
         logger.info("Index built and saved.")
 
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in one batch and L2-normalize the rows."""
+        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return embeddings / norms
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Normalized query embedding of shape (1, dim), reusable by later pipeline stages."""
+        return self.embed_texts([query])
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        query_embedding: Optional[np.ndarray] = None,
+        ctx: Optional[RequestContext] = None,
+        use_cache: bool = True,
+    ) -> List[Dict]:
+        """
+        Top-k passages for the query. With a request context the normalized
+        query and the embedding are taken from it; the query is only encoded
+        (once per request) on a retrieval cache miss. With use_cache=False
+        the retrieval cache is neither read nor written.
+        """
         if self.index is None:
             raise RuntimeError("Index not built. Run indexer to build it first.")
-        q_emb = self.model.encode([query], convert_to_numpy=True)
-        q_emb = q_emb / np.linalg.norm(q_emb, axis=1, keepdims=True)
+        redaction = governance_policy.current if INDEX_REDACTION.get("enabled") else None
+        cache_key = None
+        if use_cache and retrieval_cache.enabled:
+            normalized = ctx.normalized_query if ctx is not None else normalize_query(query)
+            cache_key = make_key(
+                normalized, top_k, index_version(), redaction.pii_version if redaction else None
+            )
+            cached = retrieval_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Retrieval cache hit for query '%s'", query)
+                return cached
+        q_emb = query_embedding
+        if q_emb is None:
+            q_emb = ctx.query_embedding() if ctx is not None else self.embed_query(query)
         D, I = self.index.search(q_emb, top_k)
         scores = D[0].tolist()
         idxs = I[0].tolist()
         results = []
+        stale = False
+        all_meta = self.meta
         for idx, score in zip(idxs, scores):
-            if idx < 0 or idx >= len(self.meta):
+            if idx < 0 or idx >= len(all_meta):
                 continue
-            meta = self.meta[idx]
+            meta = all_meta[idx]
+            text = meta.get("text")
+            if redaction is not None:
+                stale = stale or not is_current(meta, redaction)
+                text = served_text(meta, redaction)
             results.append({
                 "id": meta.get("id", idx),
-                "text": meta.get("text"),
+                "text": text,
                 "source": meta.get("source", ""),
                 "score": float(score)
             })
+        if stale:
+            self._check_redaction()
         logger.info("Retrieved %d passages for query '%s'", len(results), query)
+        if cache_key is not None:
+            retrieval_cache.set(cache_key, results)
         return results
+
+    def ping(self) -> bool:
+        """
+        Health probe: one query encoding and index search that never goes
+        through the retrieval cache. Raises when either fails.
+        """
+        self.retrieve("ping", top_k=1, use_cache=False)
+        return True
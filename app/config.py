@@ -7,6 +7,7 @@ CONFIG_PATH_DEFAULT = "config.yml"
 class Config:
     _config_data = None
     _config_path = CONFIG_PATH_DEFAULT
+    _reload_listeners = []
 
     @classmethod
     def load_config(cls, path: str = None):
@@ -31,6 +32,13 @@ class Config:
     def reload(cls, path: str = None):
         """Reload configuration from file (e.g. after config was updated)."""
         cls.load_config(path or cls._config_path)
+        for listener in list(cls._reload_listeners):
+            listener()
+
+    @classmethod
+    def on_reload(cls, listener):
+        """Register a callable run after every reload (e.g. to drop caches)."""
+        cls._reload_listeners.append(listener)
 
     @classmethod
     def get(cls, key: str, default=None):
@@ -63,3 +71,131 @@ _DEFAULT_PII_FILTERS = {
 }
 if not hasattr(Config, "PII_FILTERS"):
     setattr(Config, "PII_FILTERS", _DEFAULT_PII_FILTERS)
+
+if not hasattr(Config, "PROMPT_BUDGET"):
+    setattr(
+        Config,
+        "PROMPT_BUDGET",
+        {
+            "num_ctx": 4096,
+            "reserve_output": 512,
+            "min_piece_tokens": 48,
+            "tokenizer": None,
+            "priority": ["instructions", "passages", "history"],
+        },
+    )
+
+if not hasattr(Config, "SESSION_CONTEXT"):
+    setattr(Config, "SESSION_CONTEXT", {"continue_ollama_context": False})
+
+if not hasattr(Config, "KEEP_WARM"):
+    setattr(
+        Config,
+        "KEEP_WARM",
+        {"enabled": False, "interval_seconds": 240, "keep_alive": "10m", "models": {}},
+    )
+
+if not hasattr(Config, "OLLAMA_LOAD_BALANCING"):
+    setattr(
+        Config,
+        "OLLAMA_LOAD_BALANCING",
+        {"eject_after_failures": 3, "eject_seconds": 30, "hedge_percentile": None, "hedge_min_samples": 20},
+    )
+
+if not hasattr(Config, "OLLAMA_CIRCUIT_BREAKER"):
+    setattr(
+        Config,
+        "OLLAMA_CIRCUIT_BREAKER",
+        {
+            "failure_threshold": 5,
+            "error_rate_threshold": 0.5,
+            "window": 20,
+            "min_calls": 10,
+            "reset_timeout_seconds": 30,
+        },
+    )
+
+if not hasattr(Config, "MODEL_CASCADE"):
+    setattr(
+        Config,
+        "MODEL_CASCADE",
+        {"enabled": False, "small_model": "qwen2.5:1.5b-instruct", "confidence_threshold": 0.6},
+    )
+
+if not hasattr(Config, "REASONING_MODE"):
+    setattr(Config, "REASONING_MODE", {"default": "single", "group_size": 3, "max_concurrency": 4})
+
+if not hasattr(Config, "CONTEXT_COMPRESSION"):
+    setattr(Config, "CONTEXT_COMPRESSION", {"enabled": False, "max_tokens": 1024, "neighbours": 1, "min_score": 0.0})
+
+if not hasattr(Config, "PRE_GOVERNANCE"):
+    setattr(
+        Config,
+        "PRE_GOVERNANCE",
+        {"enabled": True, "empty_retrieval": True, "retriever_threshold": True, "banned_query": True, "banned_topic": True},
+    )
+
+if not hasattr(Config, "SEMANTIC_CACHE"):
+    setattr(
+        Config,
+        "SEMANTIC_CACHE",
+        {"enabled": False, "similarity_threshold": 0.95, "max_entries": 1000, "ttl_seconds": 3600, "max_memory_mb": 64},
+    )
+
+if not hasattr(Config, "RESULT_CACHE"):
+    setattr(
+        Config,
+        "RESULT_CACHE",
+        {
+            "retrieval": {"enabled": False, "max_entries": 2000, "ttl_seconds": 3600, "max_memory_mb": 32},
+            "generation": {"enabled": False, "max_entries": 1000, "ttl_seconds": 3600, "max_memory_mb": 32},
+            "warmup_file": None,
+            "warmup_top_k": 5,
+        },
+    )
+
+if not hasattr(Config, "SESSION_MEMORY"):
+    setattr(
+        Config,
+        "SESSION_MEMORY",
+        {"max_turns": 50, "idle_ttl_seconds": 86400, "max_memory_mb": 64, "compaction": False, "max_summary_chars": 2000},
+    )
+
+if not hasattr(Config, "SESSION_STORE"):
+    setattr(
+        Config,
+        "SESSION_STORE",
+        {"backend": "memory", "path": "data/sessions.db", "cache_sessions": 1024, "flush_interval_ms": 50, "batch_size": 200},
+    )
+
+if not hasattr(Config, "HISTORY_RECALL"):
+    setattr(Config, "HISTORY_RECALL", {"enabled": False, "top_k": 3, "recent": 2, "min_similarity": 0.0})
+
+if not hasattr(Config, "BANNED_PHRASE_MATCHING"):
+    setattr(Config, "BANNED_PHRASE_MATCHING", {"word_boundary": False, "stemming": False})
+
+if not hasattr(Config, "GOVERNANCE_POLICY"):
+    setattr(Config, "GOVERNANCE_POLICY", {"watch_config": True, "watch_interval_seconds": 2})
+
+if not hasattr(Config, "INDEX_REDACTION"):
+    setattr(Config, "INDEX_REDACTION", {"enabled": False, "background": True})
+
+if not hasattr(Config, "GOVERNANCE_BATCH"):
+    setattr(Config, "GOVERNANCE_BATCH", {"workers": 2, "chunk_size": 64, "max_items": 10000, "min_parallel_items": 500})
+
+if not hasattr(Config, "GOVERNANCE_LIMITS"):
+    setattr(
+        Config,
+        "GOVERNANCE_LIMITS",
+        {"segment_chars": 4096, "max_holdback_chars": 1024, "time_budget_ms": 1000, "fail_closed": True},
+    )
+
+if not hasattr(Config, "AUDIT_LOG"):
+    setattr(
+        Config,
+        "AUDIT_LOG",
+        {"enabled": True, "directory": "logs/audit", "flush_interval_ms": 500, "batch_size": 500, "max_queue": 10000},
+    )
+
+if not hasattr(Config, "BANNED_TOPICS"):
+    setattr(Config, "BANNED_TOPICS", {"enabled": False, "similarity_threshold": 0.6, "topics": {}})
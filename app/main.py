@@ -1,18 +1,29 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal
 import asyncio
 import os
 import json
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from app.agents.retriever_agent import RetrieverAgent
-from app.agents.reasoning_agent import ReasoningAgent
-from app.agents.governance_agent import GovernanceAgent
+from app.agents.retriever_agent import RetrieverAgent, index_version
+from app.agents.reasoning_agent import ReasoningAgent, DeadlineExceeded, OLLAMA_URL, OLLAMA_MODEL, breaker_snapshots
+from app.agents.governance_agent import GovernanceAgent, governance_policy
 from app.utils.logger import get_logger
 from app.utils.memory import memory_store
+from app.utils.keep_warm import KeepWarmScheduler, model_warmth
+from app.utils.metrics import metrics
+from app.utils.ollama_pool import OllamaPool
+from app.utils.context_compressor import ContextCompressor
+from app.utils.semantic_cache import semantic_cache
+from app.utils.request_context import RequestContext
+from app.utils.result_cache import generation_cache, retrieval_cache
+from app.utils.turn_recall import turn_recall
+from app.utils.audit_log import audit_log, query_hash, reason_codes
+from app.utils.governance_batch import AuditSummary, BatchEvaluator, GOVERNANCE_BATCH, batch_evaluator
 from app.routes.upload_routes import router as upload_router
 from app.config import Config
 import yaml
@@ -28,6 +39,13 @@ app.include_router(upload_router, tags=["Documents"])
 _retriever = None
 _reasoner = None
 _governor = None
+_compressor = None
+
+CONTEXT_COMPRESSION = getattr(Config, "CONTEXT_COMPRESSION", None) or {}
+SEMANTIC_CACHE = getattr(Config, "SEMANTIC_CACHE", None) or {}
+RESULT_CACHE = getattr(Config, "RESULT_CACHE", None) or {}
+HISTORY_RECALL = getattr(Config, "HISTORY_RECALL", None) or {}
+AUDIT_LOG = getattr(Config, "AUDIT_LOG", None) or {}
 
 # Agent status tracking
 _agent_start_times = {
@@ -55,10 +73,60 @@ _agent_errors = {
     "governance": []
 }
 
+# Shared by the reasoning agent and the keep-warm scheduler
+_ollama_pool = OllamaPool.from_config(OLLAMA_URL)
+_keep_warm = KeepWarmScheduler(OLLAMA_URL, default_model=OLLAMA_MODEL, pool=_ollama_pool)
+metrics.register_gauge("ollama_backends", _ollama_pool.stats)
+metrics.register_gauge("semantic_cache", semantic_cache.stats)
+metrics.register_gauge("memory_store", memory_store.stats)
+metrics.register_gauge("governance_policy", governance_policy.snapshot)
+metrics.register_gauge("audit_log", audit_log.stats)
+metrics.register_gauge("retrieval_cache", retrieval_cache.stats)
+metrics.register_gauge("generation_cache", generation_cache.stats)
+
+
+_cache_warmup_task = None
+
+
+@app.on_event("startup")
+async def start_keep_warm():
+    _keep_warm.start()
+
+
+@app.on_event("startup")
+async def start_policy_watch():
+    # Governance settings follow edits of config.yml without a restart
+    governance_policy.start_watching()
+
+
+@app.on_event("startup")
+async def start_cache_warmup():
+    global _cache_warmup_task
+    path = RESULT_CACHE.get("warmup_file")
+    if path and os.path.exists(path):
+        _cache_warmup_task = asyncio.create_task(_warm_result_caches(path))
+    elif path:
+        logger.warning("Cache warm-up file %s not found", path)
+
+
+@app.on_event("shutdown")
+async def stop_keep_warm():
+    await _keep_warm.stop()
+    if _cache_warmup_task is not None:
+        _cache_warmup_task.cancel()
+    memory_store.close()
+    await governance_policy.stop_watching()
+    batch_evaluator.close()
+    audit_log.close()
+
+
 def get_retriever():
     global _retriever, _agent_start_times, _agent_last_activity
     if _retriever is None:
         _retriever = RetrieverAgent()
+        # Only the gateway's long-lived retriever follows policy reloads;
+        # registered after the governance policy's listener, so it sees the new filters
+        Config.on_reload(_retriever.on_config_reload)
         _agent_start_times["retriever"] = time.time()
     _agent_last_activity["retriever"] = time.time()
     return _retriever
@@ -66,11 +134,45 @@ def get_retriever():
 def get_reasoner():
     global _reasoner, _agent_start_times, _agent_last_activity
     if _reasoner is None:
-        _reasoner = ReasoningAgent()
+        _reasoner = ReasoningAgent(pool=_ollama_pool)
         _agent_start_times["reasoning"] = time.time()
     _agent_last_activity["reasoning"] = time.time()
     return _reasoner
 
+def get_compressor():
+    global _compressor
+    if _compressor is None:
+        _compressor = ContextCompressor.from_config(
+            get_retriever().embed_texts, count_tokens=get_reasoner().budget.count
+        )
+    return _compressor
+
+async def _warm_result_caches(path: str):
+    """
+    Replay a question list (one per line) through retrieval and reasoning so
+    first-turn queries for these questions hit the exact caches.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    top_k = int(RESULT_CACHE.get("warmup_top_k", 5))
+    logger.info("Warming result caches with %d questions from %s", len(questions), path)
+    warmed = 0
+    for q in questions:
+        try:
+            ctx = RequestContext(q, embed=get_retriever().embed_texts, count_tokens=get_reasoner().budget.count)
+            passages = get_retriever().retrieve(q, top_k=top_k, ctx=ctx)
+            if get_governor().pre_check(q, passages, max((p["score"] for p in passages), default=0.0), ctx=ctx):
+                continue
+            if passages and CONTEXT_COMPRESSION.get("enabled"):
+                passages = get_compressor().compress(ctx.query_embedding(), passages)
+            await get_reasoner().reason(q, passages, ctx=ctx)
+            warmed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache warm-up failed for '%s': %s", q, e)
+    logger.info("Cache warm-up finished (%d/%d questions)", warmed, len(questions))
+
 def get_governor():
     global _governor, _agent_start_times, _agent_last_activity
     if _governor is None:
@@ -82,6 +184,8 @@ def get_governor():
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
+    # "single" prompt or "map_reduce" over passage groups; None uses REASONING_MODE.default
+    reasoning_mode: Optional[Literal["single", "map_reduce"]] = None
 
 
 class PIIFiltersUpdate(BaseModel):
@@ -93,6 +197,16 @@ class PIIFiltersUpdate(BaseModel):
     name: Optional[bool] = None
 
 
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    text: str
+
+
+class BatchEvaluateRequest(BaseModel):
+    items: List[BatchItem]
+    include_redacted: bool = False
+
+
 def _get_config_path() -> str:
     return getattr(Config, "_config_path", "config.yml")
 
@@ -132,6 +246,52 @@ async def update_pii_config(body: PIIFiltersUpdate):
     return {"pii_filters": data["PII_FILTERS"], "message": "PII config updated and applied."}
 
 
+@app.post("/governance/evaluate/batch")
+async def evaluate_batch(body: BatchEvaluateRequest):
+    """
+    Check many texts against the current policy: per-item verdicts (banned
+    phrases, PII counts by type) and aggregate counts with throughput.
+    """
+    max_items = int(GOVERNANCE_BATCH.get("max_items", 10000))
+    if len(body.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} items per batch")
+    policy = governance_policy.current
+    items = [
+        {"id": item.id if item.id is not None else str(i), "text": item.text}
+        for i, item in enumerate(body.items)
+    ]
+
+    def run():
+        summary = AuditSummary()
+        evaluator = batch_evaluator
+        if len(items) < int(GOVERNANCE_BATCH.get("min_parallel_items", 500)):
+            # Not worth shipping small batches to worker processes
+            evaluator = BatchEvaluator(workers=1)
+        results = []
+        for verdict in evaluator.evaluate(items, policy, include_redacted=body.include_redacted):
+            summary.add(verdict)
+            results.append(verdict)
+        return results, summary.as_dict()
+
+    results, summary = await run_in_threadpool(run)
+    summary["policy_version"] = policy.version
+    return {"results": results, "summary": summary}
+
+
+@app.get("/governance/audit")
+async def get_governance_audit(
+    start: Optional[float] = Query(default=None, description="Unix time, inclusive"),
+    end: Optional[float] = Query(default=None, description="Unix time, exclusive"),
+    session_id: Optional[str] = Query(default=None),
+    reason: Optional[str] = Query(default=None, description="Reason code, e.g. banned_phrases_present"),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """Governance decisions from the audit trail, newest first."""
+    return await run_in_threadpool(
+        audit_log.query, start=start, end=end, session_id=session_id, reason=reason, limit=limit
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Get overall health status of all services."""
@@ -153,9 +313,12 @@ async def health_check():
         agents_status["retriever"] = "down"
         index_loaded = False
     
-    # Reasoning
+    # Reasoning (an open circuit means Ollama is known to be down)
     try:
-        if reasoner and await reasoner.reason("ping", []):
+        if reasoner.breaker.snapshot()["state"] == "open":
+            agents_status["reasoning"] = "down"
+            ollama_status = False
+        elif reasoner and await reasoner.ping():
             agents_status["reasoning"] = "healthy"
             ollama_status = True
         else:
@@ -181,7 +344,8 @@ async def health_check():
             "status": "ok",
             "index_loaded": index_loaded,
             "ollama_status": ollama_status,
-            "agents": agents_status
+            "agents": agents_status,
+            "models": model_warmth.snapshot()
         }
     else:
         logger.error("Health check failed")
@@ -189,7 +353,8 @@ async def health_check():
             "status": "degraded",
             "index_loaded": index_loaded,
             "ollama_status": ollama_status,
-            "agents": agents_status
+            "agents": agents_status,
+            "models": model_warmth.snapshot()
         }
 
 @app.get("/health/{agent}")
@@ -239,7 +404,7 @@ async def get_agent_health(agent: str):
             if retriever and retriever.index is not None:
                 # Test retrieval
                 try:
-                    test_result = retriever.retrieve("test", top_k=1)
+                    test_result = retriever.ping()
                     latency = time.time() - start
                     response_latency = latency
                     if latency < 0.1:
@@ -258,20 +423,23 @@ async def get_agent_health(agent: str):
         elif agent == "reasoning":
             reasoner = get_reasoner()
             start = time.time()
-            try:
-                test_result = await reasoner.reason("ping", [])
-                latency = time.time() - start
-                response_latency = latency
-                if latency < 1.0:
-                    status = "healthy"
-                elif latency < 3.0:
-                    status = "slow"
-                else:
-                    status = "slow"
-            except Exception as e:
-                status = "error"
-                _agent_error_counts[agent] += 1
-                _agent_errors[agent].append(f"{datetime.now()}: {str(e)}")
+            if reasoner.breaker.snapshot()["state"] == "open":
+                status = "down"
+            else:
+                try:
+                    test_result = await reasoner.ping()
+                    latency = time.time() - start
+                    response_latency = latency
+                    if latency < 1.0:
+                        status = "healthy"
+                    elif latency < 3.0:
+                        status = "slow"
+                    else:
+                        status = "slow"
+                except Exception as e:
+                    status = "error"
+                    _agent_error_counts[agent] += 1
+                    _agent_errors[agent].append(f"{datetime.now()}: {str(e)}")
         
         elif agent == "governance":
             governor = get_governor()
@@ -319,7 +487,7 @@ async def get_agent_health(agent: str):
         except:
             pass
     
-    return {
+    details = {
         "agent": agent,
         "status": status,
         "uptime": uptime_str,
@@ -329,21 +497,150 @@ async def get_agent_health(agent: str):
         "errors": errors,
         "recent_logs": recent_logs
     }
+    if agent == "reasoning":
+        details["circuit_breaker"] = get_reasoner().breaker.snapshot()
+        details["circuit_breakers"] = breaker_snapshots()
+        details["backends"] = _ollama_pool.stats()
+        details["models"] = model_warmth.snapshot()
+        details["keep_warm"] = {
+            "enabled": _keep_warm.enabled,
+            "interval_seconds": _keep_warm.interval,
+            "models": {m: _keep_warm.model_settings(m) for m in _keep_warm.models},
+        }
+    return details
+
+# How often a running generation checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the answer was ready."""
+
+
+def _parse_deadline(value: Optional[str]) -> Optional[float]:
+    """Parse X-Request-Deadline: Unix epoch seconds or an ISO-8601 timestamp."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid X-Request-Deadline: expected Unix epoch seconds or ISO-8601 timestamp",
+        )
+    return parsed.timestamp()
+
+
+async def _run_cancellable(coro, request: Request, deadline: Optional[float]):
+    """
+    Await coro while watching for client disconnects and the request deadline.
+    The work is cancelled (closing any upstream Ollama stream) as soon as either occurs.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            timeout = DISCONNECT_POLL_INTERVAL
+            if deadline is not None:
+                timeout = max(0.0, min(timeout, deadline - time.time()))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline is not None and time.time() >= deadline:
+                raise DeadlineExceeded("Request deadline passed")
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
 
 @app.post("/query")
-async def query(req: QueryRequest, session_id: Optional[str] = Header(default="default")):
+async def query(
+    req: QueryRequest,
+    request: Request,
+    session_id: Optional[str] = Header(default="default"),
+    x_request_deadline: Optional[str] = Header(default=None),
+):
+    # Every stage takes the query embedding, normalized query and token counts
+    # from this context; the query is encoded at most once, when first needed
+    ctx = RequestContext(
+        req.query,
+        embed=lambda texts: get_retriever().embed_texts(texts),
+        count_tokens=lambda text: get_reasoner().budget.count(text),
+        session_id=session_id,
+    )
+    try:
+        return await _answer_query(req, request, session_id, x_request_deadline, ctx)
+    finally:
+        # Every path (cache hit, pre-generation rejection, errors) is counted
+        _record_context(ctx)
+
+async def _answer_query(
+    req: QueryRequest,
+    request: Request,
+    session_id: str,
+    x_request_deadline: Optional[str],
+    ctx: RequestContext,
+):
     q = req.query
     top_k = req.top_k or 5
+    deadline = _parse_deadline(x_request_deadline)
     logger.info("Received query: %s [session=%s]", q, session_id)
     _agent_last_activity["gateway"] = time.time()
+    metrics.inc("queries_total")
+
+    # Session state is read once per request, off the event loop (the session
+    # store may be a SQLite file)
+    session_turns, ollama_context = await run_in_threadpool(_load_session, session_id)
 
     # 1) Retrieve
     try:
         retriever = get_retriever()
         reasoner = get_reasoner()
         governor = get_governor()
-        
-        passages = retriever.retrieve(q, top_k=top_k)
+
+        # Answers are only shared across sessions when they did not depend on
+        # any conversation: first turns are looked up and stored, follow-ups
+        # (with history or an Ollama context) bypass the cache
+        cache_key = None
+        if (
+            SEMANTIC_CACHE.get("enabled")
+            and semantic_cache.enabled_for(session_id)
+            and not session_turns
+            and not ollama_context
+        ):
+            policy = governor.policy
+            cache_key = (
+                index_version(),
+                json.dumps({"policy_version": policy.version, "pii": dict(policy.pii_filters)}, sort_keys=True),
+            )
+            hit = semantic_cache.lookup(ctx.query_embedding(), *cache_key)
+            if hit is not None and governor.check_query(q, ctx=ctx) is not None:
+                # A similar allowed question does not clear a banned one; the
+                # full pre-generation check below rejects it
+                metrics.inc("semantic_cache_hits_rejected")
+                hit = None
+            if hit is not None:
+                metrics.inc("semantic_cache_hits")
+                response = dict(hit["response"], query=req.query, session_id=session_id, cached=True)
+                await _remember_turn(session_id, req.query, response["answer"], response["trace"], ctx)
+                logger.info("Semantic cache hit (similarity=%.3f) [session=%s]", hit["similarity"], session_id)
+                _audit_decision(
+                    session_id,
+                    req.query,
+                    dict(response["governance"], policy_version=policy.version),
+                    float(response.get("confidence", 0.0)),
+                    max((p.get("score", 0.0) for p in response.get("retrieved", [])), default=0.0),
+                    cached=True,
+                )
+                return response
+            metrics.inc("semantic_cache_misses")
+        passages = retriever.retrieve(q, top_k=top_k, ctx=ctx)
     except Exception as e:
         _agent_error_counts["retriever"] += 1
         _agent_errors["retriever"].append(f"{datetime.now()}: {str(e)}")
@@ -356,21 +653,92 @@ async def query(req: QueryRequest, session_id: Optional[str] = Header(default="d
         except ValueError:
             retriever_confidence = 0.0
 
-    # Memory context to reasoning
-    previous_turns = memory_store.get(session_id)
-    if previous_turns:
-        history_text = "\n".join(
-            [f"[MEMORY {i}] Q: {turn['query']} | A: {turn['answer']}" for i, turn in enumerate(previous_turns)]
-        )
-        # Append memory context to the query
-        q = f"Previous context:\n{history_text}\n\nNew Query:\n{req.query}"
+    # Skip generation when governance would reject the answer regardless
+    try:
+        pre_decision = governor.pre_check(q, passages, retriever_confidence, ctx=ctx)
+    except Exception as e:
+        _agent_error_counts["governance"] += 1
+        _agent_errors["governance"].append(f"{datetime.now()}: {str(e)}")
+        logger.error(f"Pre-generation governance error: {e}")
+        pre_decision = None
+    if pre_decision is not None:
+        metrics.inc("generations_skipped")
+        for check in pre_decision["checks"]:
+            metrics.inc(f"generations_skipped_{check}")
+        answer = f"This query was not answered: {pre_decision['reason']}."
+        await _remember_turn(session_id, req.query, answer, [], ctx)
+        _audit_decision(session_id, req.query, pre_decision, 0.0, retriever_confidence, pre_generation=True)
+        return {
+            "query": req.query,
+            "answer": answer,
+            "governance": {"approved": False, "reason": pre_decision["reason"], "pre_generation": True},
+            "trace": [],
+            "retrieved": passages,
+            "confidence": 0.0,
+            "session_id": session_id
+        }
+
+    # Only the most query-relevant sentences go into the prompt; the response
+    # still returns the full retrieved passages
+    prompt_passages = passages
+    if passages and CONTEXT_COMPRESSION.get("enabled"):
+        try:
+            prompt_passages = get_compressor().compress(ctx.query_embedding(), passages)
+        except Exception as e:
+            logger.warning("Context compression failed, using full passages: %s", e)
+
+    # Memory context to reasoning (fitted into the prompt token budget); with
+    # context continuation the session's Ollama context replaces the replay
+    previous_turns = session_turns
+    if HISTORY_RECALL.get("enabled") and previous_turns:
+        # Only the past turns relevant to this question (plus the latest ones)
+        try:
+            previous_turns = turn_recall.select(session_id, previous_turns, ctx.query_embedding(), embed=ctx.embed_texts)
+        except Exception as e:
+            logger.warning("History recall failed, replaying all turns: %s", e)
 
-    # 2) Reason
+    # 2) Reason (abandoned if the client disconnects or the deadline passes)
     try:
-        reasoning_result = await reasoner.reason(q, passages)
+        if deadline is not None and time.time() >= deadline:
+            raise DeadlineExceeded("Request deadline passed before reasoning")
+        def governance_accepts(result: Dict) -> bool:
+            # Used by the model cascade; retrieval confidence is the same for
+            # every tier, so only answer-level checks decide escalation
+            return governor.evaluate(
+                result.get("answer", ""),
+                result.get("trace", []),
+                float(result.get("confidence", 0.0)),
+            )["approved"]
+
+        reasoning_result = await _run_cancellable(
+            reasoner.reason(
+                q,
+                prompt_passages,
+                history=previous_turns,
+                context=ollama_context,
+                deadline=deadline,
+                accept=governance_accepts,
+                mode=req.reasoning_mode,
+                ctx=ctx,
+            ),
+            request,
+            deadline,
+        )
+        new_context = reasoning_result.pop("context", None) or None
+        if new_context != (ollama_context or None):
+            # Unchanged contexts (e.g. continuation off) cost no session store write
+            await run_in_threadpool(memory_store.set_context, session_id, new_context)
         answer = reasoning_result.get("answer", "")
         trace = reasoning_result.get("trace", [])
         confidence = float(reasoning_result.get("confidence", 0.0))
+    except DeadlineExceeded as e:
+        metrics.inc("requests_expired")
+        logger.warning("Query expired [session=%s]: %s", session_id, e)
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except ClientDisconnected:
+        metrics.inc("requests_cancelled")
+        logger.info("Client disconnected, generation cancelled [session=%s]", session_id)
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         _agent_error_counts["reasoning"] += 1
         _agent_errors["reasoning"].append(f"{datetime.now()}: {str(e)}")
@@ -384,6 +752,7 @@ async def query(req: QueryRequest, session_id: Optional[str] = Header(default="d
             trace,
             confidence,
             retriever_confidence=retriever_confidence,
+            ctx=ctx,
         )
     except Exception as e:
         _agent_error_counts["governance"] += 1
@@ -391,9 +760,10 @@ async def query(req: QueryRequest, session_id: Optional[str] = Header(default="d
         logger.error(f"Governance error: {e}")
         # Don't fail the query if governance fails, just log it
     final_answer = decision.get("redacted_answer", answer)
+    _audit_decision(session_id, req.query, decision, confidence, retriever_confidence)
 
     # 4) Save memory
-    memory_store.add(session_id, req.query, final_answer, trace)
+    await _remember_turn(session_id, req.query, final_answer, trace, ctx)
 
     response = {
         "query": req.query,
@@ -404,16 +774,95 @@ async def query(req: QueryRequest, session_id: Optional[str] = Header(default="d
         "confidence": confidence,
         "session_id": session_id
     }
+    # Only approved answers generated without conversation state are reused
+    if cache_key is not None and decision["approved"] and not session_turns and not ollama_context:
+        semantic_cache.store(ctx.query_embedding(), response, *cache_key)
     return response
 
+@app.post("/cache/opt-out")
+async def cache_opt_out(session_id: Optional[str] = Header(default="default")):
+    """Never serve or store semantic cache entries for this session."""
+    semantic_cache.opt_out(session_id)
+    return {"session_id": session_id, "semantic_cache": False}
+
+@app.delete("/cache/opt-out")
+async def cache_opt_in(session_id: Optional[str] = Header(default="default")):
+    semantic_cache.opt_in(session_id)
+    return {"session_id": session_id, "semantic_cache": True}
+
+def _audit_decision(
+    session_id: str,
+    query: str,
+    decision: Dict,
+    confidence: float,
+    retriever_confidence: float,
+    pre_generation: bool = False,
+    cached: bool = False,
+):
+    if not AUDIT_LOG.get("enabled", True):
+        return
+    audit_log.record({
+        "ts": time.time(),
+        "query_hash": query_hash(query),
+        "session_id": session_id,
+        "approved": bool(decision.get("approved")),
+        "reasons": reason_codes(decision.get("reason", "")),
+        "reason": decision.get("reason", ""),
+        "pii_counts": decision.get("pii_counts", {}),
+        "thresholds": decision.get("thresholds", {}),
+        "policy_version": decision.get("policy_version"),
+        "confidence": confidence,
+        "retriever_confidence": retriever_confidence,
+        "pre_generation": pre_generation,
+        "cached": cached,
+    })
+
+def _load_session(session_id: str):
+    """History and Ollama context of a session."""
+    return memory_store.get(session_id), memory_store.get_context(session_id)
+
+async def _remember_turn(session_id: str, query: str, answer: str, trace: list, ctx: RequestContext):
+    await run_in_threadpool(memory_store.add, session_id, query, answer, trace)
+    if HISTORY_RECALL.get("enabled"):
+        turn_recall.remember(session_id, query, answer, ctx.query_embedding())
+
+def _record_context(ctx: RequestContext):
+    """Count query encodes per request; more than one means a stage bypassed the context."""
+    metrics.inc("query_encodes", ctx.query_encodes)
+    metrics.inc("request_encode_calls", ctx.encode_calls)
+    metrics.inc("token_count_reuses", ctx.token_count_hits)
+    if ctx.query_encodes > 1:
+        metrics.inc("redundant_query_encodes")
+        logger.warning(
+            "Query encoded %d times in one request [session=%s]", ctx.query_encodes, ctx.session_id
+        )
+
+@app.get("/ollama/backends")
+async def get_ollama_backends():
+    """Per-backend routing state, latency and error statistics."""
+    return {"backends": _ollama_pool.stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Gateway counters, gauges and latency summaries."""
+    return metrics.snapshot()
+
 @app.get("/trace")
-async def get_trace(session_id: Optional[str] = Header(default="default")):
-    history = memory_store.get(session_id)
-    if not history:
+async def get_trace(
+    session_id: Optional[str] = Header(default="default"),
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+):
+    page = await run_in_threadpool(memory_store.page, session_id, offset=offset, limit=limit)
+    if not page["total"]:
         raise HTTPException(status_code=404, detail="No trace found for this session")
     return {
         "session_id": session_id,
-        "turns": history
+        "turns": page["turns"],
+        "total": page["total"],
+        "offset": offset,
+        "limit": limit,
+        "summary": page["summary"],
     }
 
 @app.delete("/memory/clear")
@@ -422,6 +871,7 @@ def clear_memory(session_id: Optional[str] = Header(default="default")):
     if not history:
         raise HTTPException(status_code=404, detail="This session not found")
     memory_store.clear(session_id)
+    turn_recall.forget(session_id)
     return {"message": f"Memory cleared for session {session_id}"}
 
 # Log streaming endpoint
@@ -0,0 +1,242 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("governance", "logs/governance.log")
+
+_REASON_CODE = re.compile(r"[a-z_]+")
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def reason_codes(reason: str) -> List[str]:
+    """'reasoner_low_confidence (0.20 < 0.3); pii_redacted' -> ['reasoner_low_confidence', 'pii_redacted']"""
+    codes = []
+    for part in (reason or "").split(";"):
+        m = _REASON_CODE.match(part.strip())
+        if m and m.group(0) not in codes:
+            codes.append(m.group(0))
+    return codes
+
+
+class AuditLog:
+    """
+    Structured trail of governance decisions.
+
+    `record` only puts the record on an in-memory queue; a background thread
+    writes batches as gzip members appended to hourly segment files
+    (audit-YYYYMMDDTHH-<pid>.jsonl.gz, one file per process and hour). Every
+    batch gets a line in the segment's .idx file with its byte range, time
+    range, sessions and reason codes, so `query` decompresses only the
+    batches that can match instead of scanning the whole trail.
+    """
+
+    def __init__(
+        self,
+        directory: str = "logs/audit",
+        flush_interval: float = 0.5,
+        batch_size: int = 500,
+        max_queue: int = 10000,
+    ):
+        self.directory = Path(directory)
+        self.flush_interval = float(flush_interval)
+        self.batch_size = max(1, int(batch_size))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._index: Dict[str, List[Dict]] = {}  # segment -> batch entries
+        self._index_read: Dict[str, int] = {}  # segment -> bytes of its .idx already read
+        self._writer: Optional[threading.Thread] = None
+        self.records_written = 0
+        self.batches_written = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_config(cls) -> "AuditLog":
+        cfg = getattr(Config, "AUDIT_LOG", None) or {}
+        return cls(
+            directory=cfg.get("directory", "logs/audit"),
+            flush_interval=cfg.get("flush_interval_ms", 500) / 1000.0,
+            batch_size=cfg.get("batch_size", 500),
+            max_queue=cfg.get("max_queue", 10000),
+        )
+
+    def record(self, record: Dict):
+        """Queue one decision record; never blocks the caller."""
+        record.setdefault("ts", time.time())
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="audit-log-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(("record", record))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Audit queue full, record dropped (%d so far)", self.dropped)
+
+    # Background writer
+
+    def _write_loop(self):
+        while True:
+            ops = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(ops) < self.batch_size and ops[-1][0] == "record":
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    ops.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            records = [op[1] for op in ops if op[0] == "record"]
+            if records:
+                try:
+                    self._write_batch(records)
+                except Exception as e:
+                    logger.error("Audit batch of %d records failed: %s", len(records), e)
+            for op in ops:
+                if op[0] in ("flush", "stop"):
+                    op[1].set()
+            if any(op[0] == "stop" for op in ops):
+                return
+
+    def _write_batch(self, records: List[Dict]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partitions: Dict[str, List[Dict]] = {}
+        for record in records:
+            hour = time.strftime("%Y%m%dT%H", time.gmtime(record["ts"]))
+            partitions.setdefault(f"audit-{hour}-{os.getpid()}", []).append(record)
+        for segment, batch in partitions.items():
+            payload = gzip.compress("".join(json.dumps(r) + "\n" for r in batch).encode("utf-8"))
+            data_path = self.directory / f"{segment}.jsonl.gz"
+            with open(data_path, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+            entry = {
+                "offset": offset,
+                "length": len(payload),
+                "count": len(batch),
+                "min_ts": min(r["ts"] for r in batch),
+                "max_ts": max(r["ts"] for r in batch),
+                "sessions": sorted({str(r.get("session_id")) for r in batch}),
+                "reasons": sorted({code for r in batch for code in r.get("reasons", [])}),
+            }
+            with open(self.directory / f"{segment}.idx", "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.records_written += len(batch)
+            self.batches_written += 1
+
+    def flush(self, timeout: float = 10.0):
+        """Wait until every record queued so far is on disk."""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self):
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(("stop", done))
+        done.wait(10.0)
+        self._writer = None
+
+    # Queries
+
+    def _load_index(self) -> Dict[str, List[Dict]]:
+        """Batch entries of every segment, reading only what was appended since the last call."""
+        with self._lock:
+            for path in sorted(self.directory.glob("audit-*.idx")):
+                read = self._index_read.get(path.stem, 0)
+                if path.stat().st_size <= read:
+                    continue
+                with open(path, "rb") as f:
+                    f.seek(read)
+                    data = f.read()
+                # Only whole lines; another process may be mid-write
+                data = data[: data.rfind(b"\n") + 1]
+                entries = self._index.setdefault(path.stem, [])
+                entries.extend(json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip())
+                self._index_read[path.stem] = read + len(data)
+            return {segment: list(entries) for segment, entries in self._index.items()}
+
+    def _read_batch(self, segment: str, entry: Dict) -> Iterator[Dict]:
+        with open(self.directory / f"{segment}.jsonl.gz", "rb") as f:
+            f.seek(entry["offset"])
+            payload = f.read(entry["length"])
+        for line in gzip.decompress(payload).decode("utf-8").splitlines():
+            if line:
+                yield json.loads(line)
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        session_id: Optional[str] = None,
+        reason: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict:
+        """
+        Records with start <= ts < end, optionally for one session and/or
+        reason code, newest first. Also reports how many batches were read.
+        """
+        self.flush()
+        index = self._load_index()
+        candidates = []
+        total = 0
+        for segment, entries in index.items():
+            total += len(entries)
+            for entry in entries:
+                if start is not None and entry["max_ts"] < start:
+                    continue
+                if end is not None and entry["min_ts"] >= end:
+                    continue
+                if session_id is not None and session_id not in entry["sessions"]:
+                    continue
+                if reason is not None and reason not in entry["reasons"]:
+                    continue
+                candidates.append((entry["max_ts"], segment, entry))
+
+        records = []
+        scanned = 0
+        # Newest batches first; stop once no remaining batch can beat the oldest kept record
+        for max_ts, segment, entry in sorted(candidates, key=lambda c: c[0], reverse=True):
+            if len(records) >= limit and max_ts < records[-1]["ts"]:
+                break
+            scanned += 1
+            for record in self._read_batch(segment, entry):
+                if start is not None and record["ts"] < start:
+                    continue
+                if end is not None and record["ts"] >= end:
+                    continue
+                if session_id is not None and record.get("session_id") != session_id:
+                    continue
+                if reason is not None and reason not in record.get("reasons", []):
+                    continue
+                records.append(record)
+            records.sort(key=lambda r: r["ts"], reverse=True)
+            del records[limit:]
+        return {"records": records, "batches_scanned": scanned, "batches_total": total}
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "records_written": self.records_written,
+            "batches_written": self.batches_written,
+            "dropped": self.dropped,
+        }
+
+
+audit_log = AuditLog.from_config()
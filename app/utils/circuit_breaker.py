@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("reasoning", "logs/reasoning.log")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker.
+
+    The circuit opens after `failure_threshold` consecutive failures, or when
+    the error rate over the last `window` calls reaches `error_rate_threshold`
+    (once at least `min_calls` were seen). While open, calls are rejected
+    immediately. After `reset_timeout` seconds a single probe call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        reset_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self._lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def from_config(cls, name: str) -> "CircuitBreaker":
+        cfg = getattr(Config, "OLLAMA_CIRCUIT_BREAKER", None) or {}
+        return cls(
+            name,
+            failure_threshold=cfg.get("failure_threshold", 5),
+            error_rate_threshold=cfg.get("error_rate_threshold", 0.5),
+            window=cfg.get("window", 20),
+            min_calls=cfg.get("min_calls", 10),
+            reset_timeout=cfg.get("reset_timeout_seconds", 30.0),
+        )
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at: Optional[float] = None
+            self.probe_in_flight = False
+            self.rejected = 0
+            self.trips = 0
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now; in half-open state only one probe is allowed."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+                logger.info("Circuit %s half-open: allowing a probe request", self.name)
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.probe_in_flight = False
+        self.trips += 1
+        logger.warning("Circuit %s opened: %s", self.name, reason)
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                logger.info("Circuit %s closed after successful probe", self.name)
+                self.state = CLOSED
+                self.probe_in_flight = False
+                self._outcomes.clear()
+            self.consecutive_failures = 0
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._outcomes.append(True)
+            if self.state == HALF_OPEN:
+                self._open("probe request failed")
+                return
+            if self.state != CLOSED:
+                return
+            if self.consecutive_failures >= self.failure_threshold:
+                self._open(f"{self.consecutive_failures} consecutive failures")
+                return
+            if len(self._outcomes) >= self.min_calls:
+                error_rate = sum(self._outcomes) / len(self._outcomes)
+                if error_rate >= self.error_rate_threshold:
+                    self._open(f"error rate {error_rate:.0%} over last {len(self._outcomes)} calls")
+
+    def record_ignored(self):
+        """The call ended without a verdict (e.g. cancelled); free the probe slot."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            # Report a due transition without performing it
+            state = self.state
+            if state == OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                state = HALF_OPEN
+            outcomes = list(self._outcomes)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "error_rate": sum(outcomes) / len(outcomes) if outcomes else 0.0,
+                "opened_at": self.opened_at,
+                "rejected": self.rejected,
+                "trips": self.trips,
+            }
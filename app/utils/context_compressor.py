@@ -0,0 +1,104 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils.token_budget import approx_token_count
+from app.config import Config
+
+logger = get_logger("retriever", "logs/retriever.log")
+
+# Sentence ends followed by whitespace, or line breaks (lists, headings)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text or "") if s and s.strip()]
+
+
+class ContextCompressor:
+    """
+    Shrink retrieved passages to the sentences most relevant to the query.
+
+    All sentences of all passages are embedded in one batch and scored
+    against the query embedding computed for retrieval. The best sentences
+    are taken in score order, each together with `neighbours` sentences on
+    either side for local context, until `max_tokens` is used. Kept
+    sentences stay in their original order; every passage keeps its position
+    and id so trace indices still refer to the retrieved list, and passages
+    without any kept sentence end up with empty text.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], np.ndarray],
+        max_tokens: int = 1024,
+        neighbours: int = 1,
+        min_score: float = 0.0,
+        count_tokens: Optional[Callable[[str], int]] = None,
+    ):
+        self.embed = embed
+        self.max_tokens = int(max_tokens)
+        self.neighbours = int(neighbours)
+        self.min_score = float(min_score)
+        self.count_tokens = count_tokens or approx_token_count
+
+    @classmethod
+    def from_config(cls, embed, count_tokens=None) -> "ContextCompressor":
+        cfg = getattr(Config, "CONTEXT_COMPRESSION", None) or {}
+        return cls(
+            embed,
+            max_tokens=cfg.get("max_tokens", 1024),
+            neighbours=cfg.get("neighbours", 1),
+            min_score=cfg.get("min_score", 0.0),
+            count_tokens=count_tokens,
+        )
+
+    def compress(self, query_embedding: np.ndarray, passages: List[Dict]) -> List[Dict]:
+        sentences = []  # (passage index, sentence index, text)
+        per_passage = []
+        for p_idx, p in enumerate(passages):
+            split = split_sentences(p.get("text", ""))
+            per_passage.append(split)
+            sentences.extend((p_idx, s_idx, s) for s_idx, s in enumerate(split))
+        if not sentences:
+            return passages
+
+        embeddings = np.asarray(self.embed([s for _, _, s in sentences]))
+        scores = embeddings @ np.asarray(query_embedding).reshape(-1)
+
+        costs = {(p, s): self.count_tokens(text) for p, s, text in sentences}
+        kept = set()
+        used = 0
+        for i in np.argsort(-scores, kind="stable"):
+            if scores[i] < self.min_score:
+                break
+            p_idx, s_idx, _ = sentences[i]
+            last = len(per_passage[p_idx]) - 1
+            window = [
+                (p_idx, j)
+                for j in range(max(0, s_idx - self.neighbours), min(last, s_idx + self.neighbours) + 1)
+                if (p_idx, j) not in kept
+            ]
+            cost = sum(costs[key] for key in window)
+            if used + cost > self.max_tokens:
+                # Fall back to the sentence alone before giving up on it
+                window = [(p_idx, s_idx)] if (p_idx, s_idx) not in kept else []
+                cost = sum(costs[key] for key in window)
+                if used + cost > self.max_tokens:
+                    continue
+            kept.update(window)
+            used += cost
+
+        compressed = []
+        for p_idx, p in enumerate(passages):
+            text = " ".join(s for s_idx, s in enumerate(per_passage[p_idx]) if (p_idx, s_idx) in kept)
+            compressed.append(dict(p, text=text))
+
+        original = sum(costs.values())
+        logger.info(
+            "Compressed context from ~%d to ~%d tokens (%d/%d sentences kept)",
+            original, used, len(kept), len(sentences),
+        )
+        return compressed
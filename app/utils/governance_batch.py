@@ -0,0 +1,193 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.agents.governance_agent import PolicySnapshot, redact_text
+from app.utils.logger import get_logger
+from app.utils.phrase_matcher import PhraseMatcher
+from app.config import Config
+
+logger = get_logger("governance", "logs/governance.log")
+
+GOVERNANCE_BATCH = getattr(Config, "GOVERNANCE_BATCH", None) or {}
+
+
+def policy_spec(policy: PolicySnapshot) -> Tuple:
+    """Picklable description of the checks a batch runs, sent to pool workers."""
+    matcher = policy.banned_matcher
+    return (
+        tuple(policy.banned_phrases),
+        matcher.word_boundary,
+        matcher.stemming,
+        policy.pii_types,
+        tuple(sorted(policy.limits.items())),
+    )
+
+
+class _Auditor:
+    def __init__(self, spec: Tuple):
+        phrases, word_boundary, stemming, enabled, limits = spec
+        self.matcher = PhraseMatcher(phrases, word_boundary=word_boundary, stemming=stemming)
+        self.pii_types = enabled
+        self.limits = dict(limits)
+
+    def audit(self, item: Dict, include_redacted: bool) -> Dict:
+        text = item.get("text") or ""
+        banned = self.matcher.find(text)
+        redacted, spans = redact_text(self.pii_types, text, limits=self.limits)
+        pii = {}
+        for span in spans:
+            pii[span["type"]] = pii.get(span["type"], 0) + 1
+        verdict = {"id": item.get("id"), "approved": not banned, "banned_phrases": banned, "pii": pii}
+        if include_redacted:
+            verdict["redacted_text"] = redacted
+        return verdict
+
+
+# Per-process auditor for the last spec seen, so workers compile a policy once
+_worker_auditor: Optional[Tuple[Tuple, _Auditor]] = None
+
+
+def _auditor_for(spec: Tuple) -> _Auditor:
+    global _worker_auditor
+    if _worker_auditor is None or _worker_auditor[0] != spec:
+        _worker_auditor = (spec, _Auditor(spec))
+    return _worker_auditor[1]
+
+
+def _audit_chunk(spec: Tuple, items: List[Dict], include_redacted: bool) -> List[Dict]:
+    auditor = _auditor_for(spec)
+    return [auditor.audit(item, include_redacted) for item in items]
+
+
+def _chunks(items: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class AuditSummary:
+    """Aggregate counts over a stream of verdicts, plus throughput."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.items = 0
+        self.rejected = 0
+        self.with_pii = 0
+        self.pii_counts: Dict[str, int] = {}
+
+    def add(self, verdict: Dict):
+        self.items += 1
+        if not verdict["approved"]:
+            self.rejected += 1
+        if verdict["pii"]:
+            self.with_pii += 1
+            for kind, count in verdict["pii"].items():
+                self.pii_counts[kind] = self.pii_counts.get(kind, 0) + count
+
+    def as_dict(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "items": self.items,
+            "approved": self.items - self.rejected,
+            "rejected": self.rejected,
+            "items_with_pii": self.with_pii,
+            "pii_counts": dict(self.pii_counts),
+            "elapsed_seconds": round(elapsed, 4),
+            "items_per_second": round(self.items / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+class BatchEvaluator:
+    """
+    Runs redaction and banned-phrase checks over many texts.
+
+    Items are sent to a process pool in chunks; at most two chunks per worker
+    are in flight, so arbitrarily large inputs stream through in bounded
+    memory and verdicts come back in input order. With workers <= 1 the
+    checks run in the calling process.
+    """
+
+    def __init__(self, workers: int = 0, chunk_size: int = 64):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls) -> "BatchEvaluator":
+        return cls(
+            workers=int(GOVERNANCE_BATCH.get("workers", 0)),
+            chunk_size=int(GOVERNANCE_BATCH.get("chunk_size", 64)),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a server process with live threads is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        return self._pool
+
+    def evaluate(
+        self,
+        items: Iterable[Dict],
+        policy: PolicySnapshot,
+        include_redacted: bool = False,
+    ) -> Iterator[Dict]:
+        """Yield one verdict {id, approved, banned_phrases, pii} per item, in order."""
+        spec = policy_spec(policy)
+        if self.workers <= 1:
+            auditor = _Auditor(spec)
+            for item in items:
+                yield auditor.audit(item, include_redacted)
+            return
+
+        pool = self._get_pool()
+        pending = deque()
+        for chunk in _chunks(items, self.chunk_size):
+            pending.append(pool.submit(_audit_chunk, spec, chunk, include_redacted))
+            if len(pending) >= self.workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+def iter_jsonl(path: Path, text_field: str = "text", id_field: str = "id") -> Iterator[Dict]:
+    """Items from a JSONL file; a line without an id gets its line number."""
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Skipping invalid JSON on line %d of %s: %s", lineno, path, e)
+                continue
+            yield {"id": record.get(id_field, lineno), "text": record.get(text_field) or ""}
+
+
+def iter_corpus(corpus_dir: Path) -> Iterator[Dict]:
+    """Passages of a corpus directory, chunked by paragraph like the indexer."""
+    for p in sorted(corpus_dir.glob("*")):
+        if p.suffix.lower() not in [".txt", ".md"]:
+            continue
+        text = p.read_text(encoding="utf-8").strip()
+        paras = [para.strip() for para in text.split("\n\n") if para.strip()]
+        for i, para in enumerate(paras):
+            yield {"id": f"{p.name}#p{i}", "text": para}
+
+
+batch_evaluator = BatchEvaluator.from_config()
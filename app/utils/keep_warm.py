@@ -0,0 +1,206 @@
+import asyncio
+import re
+import time
+from datetime import datetime, time as dtime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("gateway", "logs/gateway.log")
+
+# A request whose load_duration exceeds this had to load the model (cold start)
+COLD_LOAD_THRESHOLD_MS = 500.0
+PRELOAD_TIMEOUT = httpx.Timeout(10.0, read=300.0)
+
+
+# Go duration units, as accepted by Ollama's keep_alive
+_DURATION_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1, "m": 60, "h": 3600}
+_NUMBER = r"(\d+(?:\.\d*)?|\.\d+)"
+_DURATION_PART = re.compile(_NUMBER + r"(ns|us|µs|ms|s|m|h)")
+
+
+def _parse_duration(value) -> float:
+    """
+    Parse an Ollama keep_alive value into seconds: a number of seconds (300,
+    "300") or a Go duration ("10m", "1h30m", "5m0s"). Any negative value
+    means the model is never unloaded and is returned as -1.
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        sign = -1.0 if text.startswith("-") else 1.0
+        body = text[1:] if text[:1] in "+-" else text
+        if re.fullmatch(_NUMBER, body):
+            seconds = sign * float(body)
+        else:
+            parts = _DURATION_PART.findall(body)
+            if not body or "".join(number + unit for number, unit in parts) != body:
+                raise ValueError(f"Invalid keep_alive duration: {value!r}")
+            seconds = sign * sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    return -1.0 if seconds < 0 else seconds
+
+
+def _parse_window(window: str) -> Tuple[dtime, dtime]:
+    start, end = window.split("-")
+    return dtime.fromisoformat(start.strip()), dtime.fromisoformat(end.strip())
+
+
+def in_windows(windows: List[str], now: Optional[datetime] = None) -> bool:
+    """True if now (local time) falls into any "HH:MM-HH:MM" window; no windows means always."""
+    if not windows:
+        return True
+    current = (now or datetime.now()).time()
+    for window in windows:
+        start, end = _parse_window(window)
+        if start <= end:
+            if start <= current < end:
+                return True
+        elif current >= start or current < end:
+            # Window wraps past midnight, e.g. 22:00-02:00
+            return True
+    return False
+
+
+class ModelWarmthTracker:
+    """Track per-model load state from Ollama's load_duration reports."""
+
+    def __init__(self):
+        # model -> stats dict
+        self.models: Dict[str, Dict] = {}
+
+    def _entry(self, model: str) -> Dict:
+        return self.models.setdefault(model, {
+            "last_used": None,
+            "last_load_duration_ms": None,
+            "cold_loads": 0,
+            "warm_hits": 0,
+            "preloads": 0,
+            "keep_alive_seconds": None,
+            "last_error": None,
+        })
+
+    def record(self, model: str, stats: Dict, keep_alive=None, preload: bool = False):
+        """Record one Ollama response (request or preload) for model."""
+        entry = self._entry(model)
+        entry["last_used"] = time.time()
+        if keep_alive is not None:
+            try:
+                entry["keep_alive_seconds"] = _parse_duration(keep_alive)
+            except ValueError as e:
+                logger.warning("Model %s: %s", model, e)
+        if preload:
+            entry["preloads"] += 1
+        if "load_duration" in stats:
+            load_ms = stats["load_duration"] / 1e6
+            entry["last_load_duration_ms"] = round(load_ms, 1)
+            if load_ms > COLD_LOAD_THRESHOLD_MS:
+                entry["cold_loads"] += 1
+                logger.info("Model %s cold load took %.0f ms", model, load_ms)
+            elif not preload:
+                entry["warm_hits"] += 1
+        entry["last_error"] = None
+
+    def record_error(self, model: str, error: str):
+        self._entry(model)["last_error"] = error
+
+    def state(self, model: str) -> str:
+        entry = self.models.get(model)
+        if not entry or entry["last_used"] is None:
+            return "unknown"
+        keep_alive = entry["keep_alive_seconds"]
+        if keep_alive is None:
+            keep_alive = _parse_duration("5m")  # Ollama's default keep_alive
+        if keep_alive < 0:
+            return "warm"  # kept loaded until Ollama restarts
+        return "warm" if time.time() - entry["last_used"] < keep_alive else "cold"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {model: {"state": self.state(model), **entry} for model, entry in self.models.items()}
+
+
+model_warmth = ModelWarmthTracker()
+
+
+class KeepWarmScheduler:
+    """
+    Background task that keeps configured Ollama models loaded.
+
+    Every interval it sends a zero-token preload request (no prompt) with
+    keep_alive for each model whose traffic windows include the current time.
+    """
+
+    def __init__(
+        self,
+        ollama_url: str,
+        default_model: Optional[str] = None,
+        config: Optional[Dict] = None,
+        tracker: ModelWarmthTracker = model_warmth,
+        pool=None,
+    ):
+        config = config if config is not None else (getattr(Config, "KEEP_WARM", None) or {})
+        self.ollama_url = ollama_url
+        self.enabled = bool(config.get("enabled", False))
+        self.interval = float(config.get("interval_seconds", 240))
+        self.keep_alive = config.get("keep_alive", "10m")
+        # Without explicit models, keep the gateway's reasoning model warm
+        self.models = config.get("models") or ({default_model: {}} if default_model else {})
+        self.tracker = tracker
+        # With an OllamaPool, models are preloaded on every backend serving them
+        self.pool = pool
+        self._task: Optional[asyncio.Task] = None
+
+    def model_settings(self, model: str) -> Dict:
+        settings = self.models.get(model) or {}
+        return {
+            "keep_alive": settings.get("keep_alive", self.keep_alive),
+            "windows": settings.get("windows") or [],
+        }
+
+    async def preload(self, model: str, keep_alive, url: Optional[str] = None) -> Optional[Dict]:
+        """Load model without generating tokens; returns Ollama's response stats."""
+        payload = {"model": model, "keep_alive": keep_alive, "stream": False}
+        try:
+            async with httpx.AsyncClient(timeout=PRELOAD_TIMEOUT) as client:
+                resp = await client.post(url or self.ollama_url, json=payload)
+                resp.raise_for_status()
+                stats = resp.json()
+        except (httpx.RequestError, httpx.HTTPStatusError, ValueError) as e:
+            logger.warning("Keep-warm preload of %s failed: %s", model, e)
+            self.tracker.record_error(model, str(e))
+            return None
+        self.tracker.record(model, stats, keep_alive=keep_alive, preload=True)
+        return stats
+
+    async def run_once(self, now: Optional[datetime] = None):
+        for model in self.models:
+            settings = self.model_settings(model)
+            if not in_windows(settings["windows"], now):
+                continue
+            urls = self.pool.urls_for(model) if self.pool is not None else [self.ollama_url]
+            for url in urls:
+                await self.preload(model, settings["keep_alive"], url)
+
+    async def _loop(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.enabled or not self.models or self._task is not None:
+            return
+        logger.info("Starting keep-warm scheduler for %s (every %.0fs)", ", ".join(self.models), self.interval)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -1,23 +1,235 @@
-from collections import defaultdict
-from typing import List, Dict
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import List, Dict, Optional
 
-class MemoryStore:
-    def __init__(self):
-        # session_id -> list of dicts {query, answer, trace}
-        self.memory = defaultdict(list)
+from app.config import Config
+
+# Turn shown in place of compacted older turns
+SUMMARY_QUERY = "(summary of earlier conversation)"
+
+
+def _turn_size(turn: Dict) -> int:
+    return len(json.dumps(turn, default=str))
+
+
+def _condense(turn: Dict, max_chars: int = 160) -> str:
+    """One-line digest of a turn: the question and the start of the answer."""
+    answer = " ".join(str(turn.get("answer", "")).split())
+    if len(answer) > max_chars:
+        answer = answer[:max_chars].rsplit(" ", 1)[0] + "..."
+    return f"Q: {turn.get('query', '')} -> {answer}"
+
+
+class _Session:
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.summary: List[str] = []
+        # token context returned by Ollama for the last turn
+        self.context: Optional[List[int]] = None
+        self.last_access = time.time()
+        self.bytes = 0
+
+    def recompute_bytes(self):
+        self.bytes = (
+            sum(_turn_size(t) for t in self.turns)
+            + sum(len(s) for s in self.summary)
+            + 8 * len(self.context or ())
+        )
+
+
+class SessionStore(ABC):
+    """
+    Interface of session memory backends.
+
+    Turns are dicts {query, answer, trace}; `context` is the token context
+    Ollama returned for the last turn of the session.
+    """
+
+    @abstractmethod
+    def add(self, session_id: str, query: str, answer: str, trace: list):
+        ...
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def page(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        ...
+
+    @abstractmethod
+    def get_context(self, session_id: str) -> Optional[List[int]]:
+        ...
+
+    @abstractmethod
+    def set_context(self, session_id: str, context: Optional[List[int]]):
+        ...
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        ...
+
+    def stats(self) -> Dict:
+        return {}
+
+    def close(self):
+        """Flush pending writes and release resources."""
+
+
+class MemoryStore(SessionStore):
+    """
+    Per-session conversation memory with capacity controls.
+
+    Each session keeps at most `max_turns` turns (oldest dropped first, or
+    folded into a short summary when `compaction` is enabled). Sessions idle
+    for longer than `idle_ttl_seconds` expire, and the least recently used
+    sessions are evicted once the store exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 50,
+        idle_ttl_seconds: Optional[float] = 86400,
+        max_bytes: int = 64 * 1024 * 1024,
+        compaction: bool = False,
+        max_summary_chars: int = 2000,
+    ):
+        self.max_turns = max(1, int(max_turns))
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_bytes = int(max_bytes)
+        self.compaction = bool(compaction)
+        self.max_summary_chars = int(max_summary_chars)
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted_sessions = 0
+        self.expired_sessions = 0
+
+    @classmethod
+    def from_config(cls) -> "MemoryStore":
+        cfg = getattr(Config, "SESSION_MEMORY", None) or {}
+        return cls(
+            max_turns=cfg.get("max_turns", 50),
+            idle_ttl_seconds=cfg.get("idle_ttl_seconds", 86400),
+            max_bytes=int(cfg.get("max_memory_mb", 64) * 1024 * 1024),
+            compaction=cfg.get("compaction", False),
+            max_summary_chars=cfg.get("max_summary_chars", 2000),
+        )
+
+    def _expire(self, now: float):
+        if not self.idle_ttl_seconds:
+            return
+        # Sessions are kept in access order, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.idle_ttl_seconds:
+                break
+            self._drop(session_id)
+            self.expired_sessions += 1
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.bytes
+
+    def _touch(self, session_id: str, create: bool = False) -> Optional[_Session]:
+        now = time.time()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            if not create:
+                return None
+            session = self._sessions[session_id] = _Session(self.max_turns)
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _resize(self, session: _Session):
+        before = session.bytes
+        session.recompute_bytes()
+        self._bytes += session.bytes - before
+        # Evict least recently used sessions, never the one just written
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)))
+            self.evicted_sessions += 1
 
     def add(self, session_id: str, query: str, answer: str, trace: list):
-        self.memory[session_id].append({
-            "query": query,
-            "answer": answer,
-            "trace": trace
-        })
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            if len(session.turns) == self.max_turns and self.compaction:
+                session.summary.append(_condense(session.turns[0]))
+                while session.summary and sum(len(s) + 1 for s in session.summary) > self.max_summary_chars:
+                    session.summary.pop(0)
+            session.turns.append({
+                "query": query,
+                "answer": answer,
+                "trace": trace
+            })
+            self._resize(session)
 
     def get(self, session_id: str) -> List[Dict]:
-        return self.memory.get(session_id, [])
+        """Turns of the session, preceded by a summary turn if older turns were compacted."""
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return []
+            turns = list(session.turns)
+            if session.summary:
+                turns.insert(0, {"query": SUMMARY_QUERY, "answer": "\n".join(session.summary), "trace": []})
+            return turns
+
+    def page(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """A slice of the stored turns (oldest first) with the total count and summary."""
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return {"turns": [], "total": 0, "summary": None}
+            turns = list(session.turns)
+            end = None if limit is None else offset + limit
+            return {
+                "turns": turns[offset:end],
+                "total": len(turns),
+                "summary": "\n".join(session.summary) or None,
+            }
+
+    def get_context(self, session_id: str) -> Optional[List[int]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.context if session is not None else None
+
+    def set_context(self, session_id: str, context: Optional[List[int]]):
+        with self._lock:
+            session = self._touch(session_id, create=bool(context))
+            if session is None:
+                return
+            session.context = context or None
+            self._resize(session)
 
     def clear(self, session_id: str):
-        if session_id in self.memory:
-            del self.memory[session_id]
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "turns": sum(len(s.turns) for s in self._sessions.values()),
+                "bytes": self._bytes,
+                "evicted_sessions": self.evicted_sessions,
+                "expired_sessions": self.expired_sessions,
+            }
+
+
+
+def create_session_store() -> SessionStore:
+    """Build the backend selected by SESSION_STORE.backend ("memory" or "sqlite")."""
+    cfg = getattr(Config, "SESSION_STORE", None) or {}
+    if cfg.get("backend", "memory") == "sqlite":
+        from app.utils.sqlite_session_store import SQLiteSessionStore
+        return SQLiteSessionStore.from_config()
+    return MemoryStore.from_config()
 
-memory_store = MemoryStore()
+memory_store = create_session_store()
@@ -0,0 +1,74 @@
+import threading
+from collections import defaultdict, deque
+from typing import Callable, Dict
+
+# Samples kept per histogram; percentiles are computed over this window
+HISTOGRAM_WINDOW = 1000
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class Metrics:
+    """In-process counters, gauges and latency histograms exposed on /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.histograms: Dict[str, deque] = defaultdict(lambda: deque(maxlen=HISTOGRAM_WINDOW))
+        self._histogram_counts: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, Callable[[], object]] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self.histograms[name].append(value)
+            self._histogram_counts[name] += 1
+
+    def register_gauge(self, name: str, fn: Callable[[], object]):
+        """Register a callable evaluated whenever a snapshot is taken."""
+        self._gauges[name] = fn
+
+    def summary(self, name: str) -> Dict[str, float]:
+        with self._lock:
+            values = sorted(self.histograms.get(name, ()))
+            count = self._histogram_counts.get(name, 0)
+        return {
+            "count": count,
+            "mean": sum(values) / len(values) if values else 0.0,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            names = list(self.histograms)
+        gauges = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {name: self.summary(name) for name in names},
+        }
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._histogram_counts.clear()
+
+
+metrics = Metrics()
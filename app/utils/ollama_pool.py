@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from app.utils.logger import get_logger
+from app.utils.metrics import percentile
+from app.config import Config
+
+logger = get_logger("reasoning", "logs/reasoning.log")
+
+# Latency samples kept per backend for statistics and hedging
+LATENCY_WINDOW = 200
+
+
+class NoBackendAvailable(RuntimeError):
+    """No configured Ollama backend serves the requested model."""
+
+
+class OllamaBackend:
+    """One Ollama host with its routing weight, served models and passive health state."""
+
+    def __init__(self, url: str, weight: float = 1.0, models: Optional[List[str]] = None):
+        self.url = url
+        self.weight = max(float(weight), 0.01)
+        self.models = list(models) if models else None  # None: serves every model
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def is_ejected(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.ejected_until
+
+    def stats(self) -> Dict:
+        values = sorted(self.latencies)
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "models": self.models,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "ejected": self.is_ejected(),
+            "latency_p50": percentile(values, 50),
+            "latency_p95": percentile(values, 95),
+        }
+
+
+class OllamaPool:
+    """
+    Route generations across several Ollama hosts.
+
+    Backends are picked by least outstanding requests relative to their
+    weight among those serving the model. Failures are tracked passively: a
+    backend failing `eject_after` times in a row is skipped for `eject_seconds`
+    (it gets traffic again afterwards, or earlier if every backend is ejected).
+    With `hedge_percentile` set, a second request goes to another backend when
+    the first has not finished within that latency percentile; the first
+    result wins and the other request is cancelled.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Union[str, Dict]],
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+    ):
+        self.backends: List[OllamaBackend] = []
+        for endpoint in endpoints:
+            if isinstance(endpoint, str):
+                endpoint = {"url": endpoint}
+            self.backends.append(OllamaBackend(endpoint["url"], endpoint.get("weight", 1.0), endpoint.get("models")))
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    @classmethod
+    def from_config(cls, default_url: str) -> "OllamaPool":
+        endpoints = getattr(Config, "OLLAMA_ENDPOINTS", None) or [default_url]
+        cfg = getattr(Config, "OLLAMA_LOAD_BALANCING", None) or {}
+        return cls(
+            endpoints,
+            eject_after=cfg.get("eject_after_failures", 3),
+            eject_seconds=cfg.get("eject_seconds", 30.0),
+            hedge_percentile=cfg.get("hedge_percentile"),
+            hedge_min_samples=cfg.get("hedge_min_samples", 20),
+        )
+
+    def urls_for(self, model: str) -> List[str]:
+        return [b.url for b in self.backends if b.serves(model)]
+
+    def select(self, model: str, avoid=()) -> OllamaBackend:
+        """
+        Pick the backend for the next request: prefer backends whose URL is not
+        in `avoid` (e.g. already tried by this request) and not ejected, then the
+        lowest outstanding/weight ratio; ties are broken randomly.
+        """
+        candidates = [b for b in self.backends if b.serves(model)]
+        if not candidates:
+            raise NoBackendAvailable(f"No Ollama backend serves model {model}")
+        now = time.time()
+
+        def rank(b):
+            return (b.url in avoid, b.is_ejected(now), (b.outstanding + 1) / b.weight)
+
+        best = min(rank(b) for b in candidates)
+        return random.choice([b for b in candidates if rank(b) == best])
+
+    def _record_failure(self, backend: OllamaBackend, error: Exception):
+        backend.errors += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.eject_after:
+            backend.ejected_until = time.time() + self.eject_seconds
+            logger.warning(
+                "Ejecting Ollama backend %s for %.0fs after %d consecutive failures (%s)",
+                backend.url, self.eject_seconds, backend.consecutive_failures, error,
+            )
+
+    async def _attempt(self, backend: OllamaBackend, call: Callable[[str], Awaitable]):
+        backend.outstanding += 1
+        backend.requests += 1
+        start = time.time()
+        try:
+            result = await call(backend.url)
+        except asyncio.CancelledError:
+            # Cancelled (hedge lost or client gone): says nothing about backend health
+            backend.requests -= 1
+            raise
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+        backend.latencies.append(time.time() - start)
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+        return result
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Latency percentile after which a hedged request is sent, if enabled."""
+        if self.hedge_percentile is None:
+            return None
+        samples = sorted(l for b in self.backends if b.serves(model) for l in b.latencies)
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return percentile(samples, self.hedge_percentile)
+
+    async def run(self, model: str, call: Callable[[str], Awaitable], avoid=()):
+        """Run call(url) on the best backend for model, hedging when configured."""
+        primary = self.select(model, avoid)
+        delay = self.hedge_delay(model)
+        if delay is None or len(self.urls_for(model)) < 2:
+            return await self._attempt(primary, call)
+
+        tasks = {asyncio.ensure_future(self._attempt(primary, call))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                secondary = self.select(model, avoid=set(avoid) | {primary.url})
+                if secondary is not primary:
+                    logger.info("Hedging request to %s after %.2fs on %s", secondary.url, delay, primary.url)
+                    tasks.add(asyncio.ensure_future(self._attempt(secondary, call)))
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not tasks:
+                    # Every attempt failed: surface the failure
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> List[Dict]:
+        return [b.stats() for b in self.backends]
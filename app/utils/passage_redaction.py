@@ -0,0 +1,33 @@
+from typing import Dict, List
+
+from app.agents.governance_agent import PolicySnapshot, redact_text
+
+
+def redact_passage(passage: Dict, policy: PolicySnapshot) -> Dict:
+    """
+    Copy of an index meta entry with its PII redacted once, ahead of queries.
+
+    The original text is kept so the passage can be re-redacted when the PII
+    filters change; `pii_version` records which plan produced the result.
+    """
+    redacted, spans = redact_text(policy.pii_types, passage.get("text") or "", limits=policy.limits)
+    entry = dict(passage)
+    entry["redacted_text"] = redacted
+    entry["pii_spans"] = [{"type": s["type"], "start": s["start"], "end": s["end"]} for s in spans]
+    entry["pii_version"] = policy.pii_version
+    return entry
+
+
+def redact_passages(passages: List[Dict], policy: PolicySnapshot) -> List[Dict]:
+    return [redact_passage(p, policy) for p in passages]
+
+
+def is_current(passage: Dict, policy: PolicySnapshot) -> bool:
+    return passage.get("pii_version") == policy.pii_version
+
+
+def served_text(passage: Dict, policy: PolicySnapshot) -> str:
+    """Redacted text of a meta entry, redacting on the spot if it is stale."""
+    if is_current(passage, policy):
+        return passage["redacted_text"]
+    return redact_text(policy.pii_types, passage.get("text") or "", limits=policy.limits)[0]
@@ -0,0 +1,153 @@
+import re
+from collections import deque
+from typing import Dict, Hashable, Iterator, List, Sequence, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+# Below this many phrases a per-phrase scan (done in C by `in` / re) beats
+# walking the automaton in Python
+AUTOMATON_MIN_PHRASES = 200
+# Light suffix stripping, longest suffix first; (suffix, replacement, minimum stem length)
+_SUFFIXES = (
+    ("ations", "ate", 3),
+    ("ation", "ate", 3),
+    ("ingly", "", 3),
+    ("ings", "", 3),
+    ("ing", "", 3),
+    ("edly", "", 3),
+    ("ies", "y", 2),
+    ("ied", "y", 2),
+    ("ed", "", 3),
+    ("es", "", 4),
+    ("s", "", 3),
+)
+
+
+def stem(word: str) -> str:
+    """Conservative English stemmer: enough to match plurals and verb forms."""
+    word = word.lower()
+    if word.endswith(("ss", "us", "is")):
+        return word
+    for suffix, replacement, min_stem in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem:
+            word = word[: len(word) - len(suffix)] + replacement
+            break
+    # "diagnose", "diagnoses" and "diagnosed" share the stem "diagnos"
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+class AhoCorasick:
+    """
+    Multi-pattern automaton over sequences of hashable symbols (characters or
+    tokens). Matching is a single pass over the input regardless of the
+    number of patterns.
+    """
+
+    def __init__(self, patterns: Sequence[Sequence[Hashable]]):
+        self._goto: List[Dict[Hashable, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.lengths = [len(p) for p in patterns]
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for symbol in pattern:
+                nxt = self._goto[state].get(symbol)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][symbol] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pattern_id)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(symbol, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, sequence: Sequence[Hashable]) -> Iterator[Tuple[int, int]]:
+        """Yield (end position exclusive, pattern id) for every occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, symbol in enumerate(sequence):
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            if out[state]:
+                for pattern_id in out[state]:
+                    yield pos + 1, pattern_id
+
+
+class PhraseMatcher:
+    """
+    Case-insensitive matcher for a list of phrases, built once and reused.
+
+    By default phrases match anywhere in the text (substring semantics).
+    `word_boundary` only accepts matches that start and end on word
+    boundaries; `stemming` matches word by word on stems, so "diagnoses"
+    also matches the phrase "diagnose" (implies word boundaries).
+
+    Short lists are scanned phrase by phrase; from AUTOMATON_MIN_PHRASES on
+    (and always with stemming) an Aho-Corasick automaton is used, so the cost
+    of a check stays nearly independent of the list size.
+    """
+
+    def __init__(self, phrases: Sequence[str], word_boundary: bool = False, stemming: bool = False):
+        self.phrases = list(phrases)
+        self.word_boundary = bool(word_boundary)
+        self.stemming = bool(stemming)
+        self._automaton = None
+        self._lowered = [p.lower() for p in self.phrases]
+        if self.stemming:
+            self._automaton = AhoCorasick([tuple(stem(w) for w in _WORD_RE.findall(p)) for p in self.phrases])
+        elif len(self.phrases) >= AUTOMATON_MIN_PHRASES:
+            self._automaton = AhoCorasick(self._lowered)
+        elif self.word_boundary:
+            self._boundary_res = [re.compile(rf"(?<!\w){re.escape(p)}(?!\w)") for p in self._lowered]
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _matched_ids(self, text: str) -> set:
+        ids = set()
+        if self.stemming:
+            tokens = [stem(w) for w in _WORD_RE.findall(text)]
+            for _, pattern_id in self._automaton.iter_matches(tokens):
+                ids.add(pattern_id)
+            return ids
+
+        lower = text.lower()
+        if self._automaton is None:
+            if self.word_boundary:
+                return {i for i, rx in enumerate(self._boundary_res) if rx.search(lower)}
+            return {i for i, p in enumerate(self._lowered) if p and p in lower}
+
+        lengths = self._automaton.lengths
+        for end, pattern_id in self._automaton.iter_matches(lower):
+            if self.word_boundary:
+                start = end - lengths[pattern_id]
+                if start > 0 and (lower[start - 1].isalnum() or lower[start - 1] == "_"):
+                    continue
+                if end < len(lower) and (lower[end].isalnum() or lower[end] == "_"):
+                    continue
+            ids.add(pattern_id)
+        return ids
+
+    def find(self, text: str) -> List[str]:
+        """Phrases present in text, in the order of the phrase list."""
+        if not text or not self.phrases:
+            return []
+        return [self.phrases[i] for i in sorted(self._matched_ids(text))]
@@ -0,0 +1,79 @@
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.result_cache import normalize_query
+from app.utils.token_budget import approx_token_count
+
+
+class RequestContext:
+    """
+    Values derived from one query, shared by every stage of its request.
+
+    The normalized query, the query embedding and token counts are computed
+    on first use and memoized, so stages that need them (caches, retrieval,
+    compression, history recall, governance) reuse one encode instead of each
+    encoding the query again. `embed_texts` wraps the encoder for the other
+    texts a stage embeds and records how often the query itself was encoded.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        session_id: Optional[str] = None,
+    ):
+        self.query = query
+        self.session_id = session_id
+        self._embed = embed
+        self._count_tokens = count_tokens or approx_token_count
+        self._normalized: Optional[str] = None
+        self._embedding: Optional[np.ndarray] = None
+        self._token_counts: Dict[str, int] = {}
+        self.query_encodes = 0
+        self.encode_calls = 0
+        self.token_count_hits = 0
+
+    @property
+    def normalized_query(self) -> str:
+        if self._normalized is None:
+            self._normalized = normalize_query(self.query)
+        return self._normalized
+
+    @property
+    def has_query_embedding(self) -> bool:
+        return self._embedding is not None
+
+    def query_embedding(self) -> Optional[np.ndarray]:
+        """Normalized query embedding of shape (1, dim); None without an encoder."""
+        if self._embedding is None and self._embed is not None:
+            self._embedding = self.embed_texts([self.query])
+        return self._embedding
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts with the request's encoder, counting encodes of the query."""
+        self.encode_calls += 1
+        if self.query in texts:
+            self.query_encodes += 1
+        return self._embed(texts)
+
+    def count_tokens(self, text: str) -> int:
+        count = self._token_counts.get(text)
+        if count is None:
+            count = self._token_counts[text] = self._count_tokens(text)
+        else:
+            self.token_count_hits += 1
+        return count
+
+    @property
+    def query_tokens(self) -> int:
+        return self.count_tokens(self.query)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "query_encodes": self.query_encodes,
+            "encode_calls": self.encode_calls,
+            "token_counts": len(self._token_counts),
+            "token_count_hits": self.token_count_hits,
+        }
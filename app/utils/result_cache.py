@@ -0,0 +1,122 @@
+import copy
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("gateway", "logs/gateway.log")
+
+
+def make_key(*parts) -> str:
+    """Stable hash of JSON-serializable key parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def _size_of(value) -> int:
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Exact-match LRU cache with TTL and a memory cap.
+
+    Values are deep-copied on the way in and out so callers can mutate what
+    they get back. Every cache is cleared when the configuration is reloaded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.name = name
+        self.enabled = bool(enabled)
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, created, size)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        Config.on_reload(self.clear)
+
+    @classmethod
+    def from_config(cls, name: str) -> "ResultCache":
+        cfg = (getattr(Config, "RESULT_CACHE", None) or {}).get(name) or {}
+        return cls(
+            name,
+            enabled=cfg.get("enabled", False),
+            max_entries=cfg.get("max_entries", 1000),
+            ttl_seconds=cfg.get("ttl_seconds", 3600),
+            max_bytes=int(cfg.get("max_memory_mb", 32) * 1024 * 1024),
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl_seconds:
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[0])
+
+    def set(self, key: str, value: Any):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (copy.deepcopy(value), time.time(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                logger.info("Cleared %s cache (%d entries)", self.name, len(self._entries))
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+retrieval_cache = ResultCache.from_config("retrieval")
+generation_cache = ResultCache.from_config("generation")
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("gateway", "logs/gateway.log")
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by query embedding similarity.
+
+    Entries hold a normalized query embedding and the response computed for
+    it. A lookup compares the new query embedding against every live entry
+    in one matrix product and serves the most similar entry when the cosine
+    similarity reaches `threshold` and the entry was built from the same
+    index version and governance policy (version and PII configuration).
+    Entries expire after `ttl_seconds`; the least recently used ones are
+    evicted beyond `max_entries` or `max_bytes` (embedding plus serialized
+    response size). The cache is cleared when the configuration is reloaded.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.threshold = float(threshold)
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._next_id = 0
+        self._bytes = 0
+        # Stacked embeddings of the current entries, rebuilt lazily after changes
+        self._matrix: Optional[Tuple[list, np.ndarray]] = None
+        self.opted_out = set()
+        self.hits = 0
+        self.misses = 0
+        Config.on_reload(self.clear)
+
+    @classmethod
+    def from_config(cls) -> "SemanticCache":
+        cfg = getattr(Config, "SEMANTIC_CACHE", None) or {}
+        return cls(
+            threshold=cfg.get("similarity_threshold", 0.95),
+            max_entries=cfg.get("max_entries", 1000),
+            ttl_seconds=cfg.get("ttl_seconds", 3600),
+            max_bytes=int(cfg.get("max_memory_mb", 64) * 1024 * 1024),
+        )
+
+    def enabled_for(self, session_id: str) -> bool:
+        return session_id not in self.opted_out
+
+    def opt_out(self, session_id: str):
+        self.opted_out.add(session_id)
+
+    def opt_in(self, session_id: str):
+        self.opted_out.discard(session_id)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry["size"]
+        self._matrix = None
+
+    def _expire(self, now: float):
+        expired = [i for i, e in self._entries.items() if now - e["created"] > self.ttl_seconds]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def lookup(self, embedding: np.ndarray, index_version: str, policy_key: str) -> Optional[Dict]:
+        """Return {"response", "similarity"} for the best fresh match, or None."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._expire(time.time())
+            best = None
+            if self._entries:
+                if self._matrix is None:
+                    ids = list(self._entries)
+                    self._matrix = (ids, np.stack([self._entries[i]["embedding"] for i in ids]))
+                ids, matrix = self._matrix
+                similarities = matrix @ vector
+                for pos in np.argsort(-similarities):
+                    if similarities[pos] < self.threshold:
+                        break
+                    entry = self._entries[ids[pos]]
+                    if entry["index_version"] == index_version and entry["policy_key"] == policy_key:
+                        best = (ids[pos], float(similarities[pos]))
+                        break
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best[0])
+            return {"response": self._entries[best[0]]["response"], "similarity": best[1]}
+
+    def store(self, embedding: np.ndarray, response: Dict, index_version: str, policy_key: str):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        size = vector.nbytes + len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "embedding": vector,
+                "response": response,
+                "index_version": index_version,
+                "policy_key": policy_key,
+                "created": time.time(),
+                "size": size,
+            }
+            self._bytes += size
+            self._matrix = None
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "opted_out_sessions": len(self.opted_out),
+            }
+
+
+semantic_cache = SemanticCache.from_config()
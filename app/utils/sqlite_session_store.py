@@ -0,0 +1,348 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.utils.logger import get_logger
+from app.utils.memory import SessionStore
+from app.config import Config
+
+logger = get_logger("gateway", "logs/gateway.log")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    epoch INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    context TEXT,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    trace TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+CREATE TABLE IF NOT EXISTS epochs (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO epochs (id, last) VALUES (0, 0);
+"""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session memory in a SQLite database in WAL mode, shared by every worker
+    process of the gateway and kept across restarts.
+
+    Writes are queued and committed in batches by a background thread, so
+    `add` and `set_context` never wait for the disk. Recently used sessions
+    are cached in memory; a cached session is revalidated with one
+    primary-key lookup of its (epoch, version), and reloaded unless it
+    matches exactly. The version counts the session's stored turns; the
+    epoch is drawn from a store-wide counter whenever a session row is
+    created, so a session cleared or expired by any process and then written
+    again never repeats an (epoch, version) pair another process cached.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/sessions.db",
+        max_turns: int = 50,
+        idle_ttl_seconds: Optional[float] = 86400,
+        cache_sessions: int = 1024,
+        flush_interval: float = 0.05,
+        batch_size: int = 200,
+    ):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_turns = max(1, int(max_turns))
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.cache_sessions = int(cache_sessions)
+        self.flush_interval = float(flush_interval)
+        self.batch_size = int(batch_size)
+
+        self._reader = _connect(self.path)
+        self._reader.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # session_id -> {"turns", "epoch", "version", "context"}; version
+        # counts turns stored in the database plus this process's queued ones
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending: Dict[str, int] = {}  # session_id -> queued adds
+        self._queue: "queue.Queue" = queue.Queue()
+        self.batches_written = 0
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="session-store-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_config(cls) -> "SQLiteSessionStore":
+        cfg = getattr(Config, "SESSION_STORE", None) or {}
+        memory_cfg = getattr(Config, "SESSION_MEMORY", None) or {}
+        return cls(
+            path=cfg.get("path", "data/sessions.db"),
+            max_turns=memory_cfg.get("max_turns", 50),
+            idle_ttl_seconds=memory_cfg.get("idle_ttl_seconds", 86400),
+            cache_sessions=cfg.get("cache_sessions", 1024),
+            flush_interval=cfg.get("flush_interval_ms", 50) / 1000.0,
+            batch_size=cfg.get("batch_size", 200),
+        )
+
+    # Background writer
+
+    def _write_loop(self):
+        conn = _connect(self.path)
+        last_expiry = 0.0
+        while True:
+            ops = [self._queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(ops) < self.batch_size and ops[-1][0] not in ("flush", "stop"):
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    ops.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            stop = any(op[0] == "stop" for op in ops)
+            try:
+                self._apply(conn, ops)
+            except Exception as e:
+                logger.error("Session store batch of %d writes failed: %s", len(ops), e)
+            for op in ops:
+                if op[0] in ("flush", "stop"):
+                    op[1].set()
+            if self.idle_ttl_seconds and time.time() - last_expiry > 60:
+                last_expiry = time.time()
+                try:
+                    self._expire(conn)
+                except Exception as e:
+                    # Never leave the write transaction open or the writer dead
+                    if conn.in_transaction:
+                        conn.rollback()
+                    logger.error("Session expiry failed: %s", e)
+            if stop:
+                conn.close()
+                return
+
+    def _apply(self, conn: sqlite3.Connection, ops: List[tuple]):
+        touched = {}
+        adds: Dict[str, int] = {}
+        for op in ops:
+            if op[0] == "add":
+                adds[op[1]] = adds.get(op[1], 0) + 1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op in ops:
+                kind, session_id = op[0], op[1]
+                if kind == "add":
+                    _, session_id, turn, now = op
+                    self._ensure_session(conn, session_id, now)
+                    version = conn.execute(
+                        "UPDATE sessions SET version = version + 1, last_access = ? WHERE session_id = ? "
+                        "RETURNING version",
+                        (now, session_id),
+                    ).fetchone()[0]
+                    conn.execute(
+                        "INSERT INTO turns (session_id, seq, query, answer, trace, created) VALUES (?, ?, ?, ?, ?, ?)",
+                        (session_id, version, turn["query"], turn["answer"], json.dumps(turn["trace"], default=str), now),
+                    )
+                    touched[session_id] = version
+                elif kind == "context":
+                    _, session_id, context, now = op
+                    self._ensure_session(conn, session_id, now)
+                    conn.execute(
+                        "UPDATE sessions SET context = ?, last_access = ? WHERE session_id = ?",
+                        (json.dumps(context) if context else None, now, session_id),
+                    )
+                elif kind == "clear":
+                    conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+                    conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                    touched.pop(session_id, None)
+            for session_id, version in touched.items():
+                conn.execute(
+                    "DELETE FROM turns WHERE session_id = ? AND seq <= ?",
+                    (session_id, version - self.max_turns),
+                )
+            # Commit and unqueue together, so a reader never counts a
+            # committed turn both in the database and as pending
+            with self._lock:
+                conn.execute("COMMIT")
+                self._unqueue(adds)
+        except Exception:
+            # Lost writes are no longer queued either
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with self._lock:
+                self._unqueue(adds)
+            raise
+        self.batches_written += 1
+
+    def _unqueue(self, adds: Dict[str, int]):
+        for session_id, count in adds.items():
+            remaining = self._pending.get(session_id, 0) - count
+            if remaining > 0:
+                self._pending[session_id] = remaining
+            else:
+                self._pending.pop(session_id, None)
+
+    @staticmethod
+    def _ensure_session(conn: sqlite3.Connection, session_id: str, now: float):
+        """Create the session's row with a new epoch if it does not exist."""
+        if conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone():
+            return
+        epoch = conn.execute("UPDATE epochs SET last = last + 1 WHERE id = 0 RETURNING last").fetchone()[0]
+        conn.execute(
+            "INSERT INTO sessions (session_id, epoch, version, last_access) VALUES (?, ?, 0, ?)",
+            (session_id, epoch, now),
+        )
+
+    def _expire(self, conn: sqlite3.Connection):
+        cutoff = time.time() - self.idle_ttl_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_access < ?)",
+            (cutoff,),
+        )
+        expired = conn.execute("DELETE FROM sessions WHERE last_access < ?", (cutoff,)).rowcount
+        conn.execute("COMMIT")
+        if expired:
+            logger.info("Expired %d idle sessions", expired)
+
+    def flush(self, timeout: float = 5.0):
+        """Block until every write queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        done = threading.Event()
+        self._queue.put(("stop", done))
+        done.wait(10.0)
+        self._reader.close()
+
+    # Cache and reads
+
+    def _load(self, session_id: str) -> Dict:
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT epoch, version, context FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            rows = self._reader.execute(
+                "SELECT query, answer, trace FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                (session_id, self.max_turns),
+            ).fetchall()
+        turns = [{"query": q, "answer": a, "trace": json.loads(t)} for q, a, t in reversed(rows)]
+        return {
+            "turns": turns,
+            "epoch": row[0] if row else None,
+            "version": row[1] if row else 0,
+            "context": json.loads(row[2]) if row and row[2] else None,
+        }
+
+    def _db_state(self, session_id: str) -> tuple:
+        """(epoch, version) of the stored session; (None, 0) if it has no row."""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT epoch, version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def _cache_put(self, session_id: str, entry: Dict):
+        self._cache[session_id] = entry
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_sessions:
+            # Sessions with queued writes stay cached until they are committed
+            victim = next((s for s in self._cache if s not in self._pending), None)
+            if victim is None:
+                break
+            del self._cache[victim]
+
+    def _session(self, session_id: str) -> Dict:
+        # Held across the reads so the writer cannot commit queued turns in
+        # between reading the database and reading the pending count
+        with self._lock:
+            entry = self._cache.get(session_id)
+            pending = self._pending.get(session_id, 0)
+            if entry is not None:
+                epoch, version = self._db_state(session_id)
+                if epoch == entry["epoch"] and version + pending == entry["version"]:
+                    self._cache.move_to_end(session_id)
+                    return entry
+
+            fresh = self._load(session_id)
+            if pending and entry is not None:
+                # Keep this process's turns that are still queued
+                fresh["turns"] = (fresh["turns"] + entry["turns"][-pending:])[-self.max_turns:]
+                fresh["context"] = entry["context"]
+            fresh["version"] += pending
+            self._cache_put(session_id, fresh)
+        return fresh
+
+    # SessionStore interface
+
+    def add(self, session_id: str, query: str, answer: str, trace: list):
+        turn = {"query": query, "answer": answer, "trace": trace}
+        entry = self._session(session_id)
+        with self._lock:
+            entry["turns"] = (entry["turns"] + [turn])[-self.max_turns:]
+            entry["version"] += 1
+            self._pending[session_id] = self._pending.get(session_id, 0) + 1
+            self._cache_put(session_id, entry)
+        self._queue.put(("add", session_id, turn, time.time()))
+
+    def get(self, session_id: str) -> List[Dict]:
+        return list(self._session(session_id)["turns"])
+
+    def page(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        turns = self.get(session_id)
+        end = None if limit is None else offset + limit
+        return {"turns": turns[offset:end], "total": len(turns), "summary": None}
+
+    def get_context(self, session_id: str) -> Optional[List[int]]:
+        return self._session(session_id)["context"]
+
+    def set_context(self, session_id: str, context: Optional[List[int]]):
+        entry = self._session(session_id)
+        with self._lock:
+            entry["context"] = context or None
+        self._queue.put(("context", session_id, context or None, time.time()))
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._cache.pop(session_id, None)
+        self._queue.put(("clear", session_id))
+        # Rare and user-initiated: wait so the next read does not see old turns
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "cached_sessions": len(self._cache),
+                "pending_writes": self._queue.qsize(),
+                "batches_written": self.batches_written,
+            }
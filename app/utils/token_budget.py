@@ -0,0 +1,180 @@
+import math
+import re
+from typing import Callable, Dict, List, Optional
+
+from app.utils.logger import get_logger
+from app.config import Config
+
+logger = get_logger("reasoning", "logs/reasoning.log")
+
+# Words and individual punctuation marks; long words are split the way BPE
+# tokenizers usually split them (~4 characters per token).
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_TOKEN = 4
+
+SECTIONS = ("instructions", "passages", "history")
+
+
+def approx_token_count(text: str) -> int:
+    """Fast tokenizer-free estimate of the number of tokens in text."""
+    if not text:
+        return 0
+    return sum(math.ceil(len(tok) / _CHARS_PER_TOKEN) for tok in _TOKEN_RE.findall(text))
+
+
+def _approx_truncate(text: str, max_tokens: int) -> str:
+    """Cut text after roughly max_tokens tokens, on a token boundary."""
+    used = 0
+    for m in _TOKEN_RE.finditer(text):
+        used += math.ceil(len(m.group(0)) / _CHARS_PER_TOKEN)
+        if used > max_tokens:
+            return text[:m.start()].rstrip()
+    return text
+
+
+def load_tokenizer(name: Optional[str]):
+    """
+    Load a HuggingFace tokenizer matching the Ollama model, if configured.
+    Returns None (approximate counting) when unset or unavailable.
+    """
+    if not name:
+        return None
+    try:
+        # Lazy import: transformers is only pulled in when a tokenizer is configured
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        logger.info("Loaded tokenizer %s for prompt budgeting", name)
+        return tokenizer
+    except Exception as e:
+        logger.warning("Tokenizer %s unavailable, using approximate counts: %s", name, e)
+        return None
+
+
+class TokenBudget:
+    """
+    Fit instructions, passages and session history into the model context.
+
+    Sections are filled in priority order. Within a section the most valuable
+    pieces come first (highest-scoring passages, most recent turns); a piece
+    that does not fit is truncated when enough room is left, otherwise dropped
+    together with everything of lower value.
+    """
+
+    def __init__(
+        self,
+        num_ctx: int = 4096,
+        reserve_output: int = 512,
+        min_piece_tokens: int = 48,
+        priority: Optional[List[str]] = None,
+        tokenizer=None,
+    ):
+        self.num_ctx = int(num_ctx)
+        self.reserve_output = int(reserve_output)
+        self.min_piece_tokens = int(min_piece_tokens)
+        self.priority = [s for s in (priority or SECTIONS) if s in SECTIONS]
+        self.tokenizer = tokenizer
+
+    @classmethod
+    def from_config(cls) -> "TokenBudget":
+        cfg = getattr(Config, "PROMPT_BUDGET", None) or {}
+        return cls(
+            num_ctx=cfg.get("num_ctx", 4096),
+            reserve_output=cfg.get("reserve_output", 512),
+            min_piece_tokens=cfg.get("min_piece_tokens", 48),
+            priority=cfg.get("priority"),
+            tokenizer=load_tokenizer(cfg.get("tokenizer")),
+        )
+
+    @property
+    def prompt_budget(self) -> int:
+        """Tokens available for the prompt once the answer is reserved."""
+        return max(0, self.num_ctx - self.reserve_output)
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return approx_token_count(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.tokenizer is not None:
+            ids = self.tokenizer.encode(text, add_special_tokens=False)
+            if len(ids) <= max_tokens:
+                return text
+            return self.tokenizer.decode(ids[:max_tokens]).rstrip()
+        return _approx_truncate(text, max_tokens)
+
+    def _fit(self, pieces: List[str], available: int, count: Callable[[str], int]):
+        """Greedily keep pieces (already ordered by value) within available tokens."""
+        kept, used = [], 0
+        for piece in pieces:
+            tokens = count(piece)
+            if used + tokens <= available:
+                kept.append(piece)
+                used += tokens
+                continue
+            room = available - used
+            if room >= self.min_piece_tokens:
+                truncated = self.truncate(piece, room)
+                kept.append(truncated)
+                used += count(truncated)
+            break
+        return kept, used
+
+    def allocate(
+        self,
+        fixed: str,
+        instructions: str,
+        passages: List[Dict],
+        history: Optional[List[Dict]] = None,
+        render_passage: Callable[[int, Dict], str] = None,
+        render_turn: Callable[[int, Dict], str] = None,
+        count: Optional[Callable[[str], int]] = None,
+    ) -> Dict:
+        """
+        Select what goes into the prompt.
+
+        `fixed` is the part that is always sent (template and query). Passages
+        keep their original position so trace indices stay valid; history turns
+        are returned oldest-first. `count` replaces `self.count`, e.g. with a
+        request's memoized counter.
+        """
+        count = count or self.count
+        history = history or []
+        render_passage = render_passage or (lambda i, p: p.get("text", ""))
+        render_turn = render_turn or (lambda i, t: f"Q: {t['query']} | A: {t['answer']}")
+
+        fixed_tokens = count(fixed)
+        available = self.prompt_budget - fixed_tokens
+        result = {
+            "instructions": "",
+            "passages": [],
+            "history": [],
+            "tokens": {"fixed": fixed_tokens},
+            "dropped": {"passages": 0, "history": 0},
+        }
+
+        for section in self.priority:
+            if section == "instructions":
+                kept, used = self._fit([instructions] if instructions else [], max(available, 0), count)
+                result["instructions"] = kept[0] if kept else ""
+            elif section == "passages":
+                # Most relevant passages first; labels keep the retrieval index
+                order = sorted(range(len(passages)), key=lambda i: -passages[i].get("score", 0.0))
+                rendered = [render_passage(i, passages[i]) for i in order]
+                kept, used = self._fit(rendered, max(available, 0), count)
+                result["passages"] = sorted(zip(order, kept))
+                result["dropped"]["passages"] = len(passages) - len(kept)
+            else:
+                # Most recent turns first
+                order = list(range(len(history) - 1, -1, -1))
+                rendered = [render_turn(i, history[i]) for i in order]
+                kept, used = self._fit(rendered, max(available, 0), count)
+                result["history"] = sorted(zip(order, kept))
+                result["dropped"]["history"] = len(history) - len(kept)
+            result["tokens"][section] = used
+            available -= used
+
+        result["tokens"]["total"] = sum(result["tokens"].values())
+        return result
@@ -0,0 +1,45 @@
+from typing import Callable, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+
+class TopicMatcher:
+    """
+    Banned topics matched by embedding similarity rather than substrings.
+
+    Each topic is represented by the embeddings of its name and example
+    phrasings, stacked once into a matrix. Scoring any number of texts is one
+    matrix product; a topic's score is its best-matching example.
+    """
+
+    def __init__(self, topics: Mapping[str, Sequence[str]], embed: Callable[[List[str]], np.ndarray]):
+        self.topics = list(topics)
+        texts, starts = [], []
+        for topic in self.topics:
+            starts.append(len(texts))
+            texts.append(topic)
+            texts.extend(topics[topic] or [])
+        self._starts = np.array(starts, dtype=np.intp)
+        self.matrix = _normalize(np.asarray(embed(texts), dtype=np.float32)) if texts else None
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each row of vectors to each topic, shape (rows, topics)."""
+        vectors = _normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        sims = vectors @ self.matrix.T
+        return np.maximum.reduceat(sims, self._starts, axis=1)
+
+    def match(self, vectors: np.ndarray, threshold: float) -> List[Dict[str, float]]:
+        """Per row, the topics scoring at least threshold, best first."""
+        if self.matrix is None:
+            return [{} for _ in np.atleast_2d(vectors)]
+        result = []
+        for row in self.scores(vectors):
+            hits = {self.topics[i]: round(float(row[i]), 4) for i in np.flatnonzero(row >= threshold)}
+            result.append(dict(sorted(hits.items(), key=lambda kv: -kv[1])))
+        return result
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return m / norms
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.logger import get_logger
+from app.utils.memory import SUMMARY_QUERY
+from app.config import Config
+
+logger = get_logger("gateway", "logs/gateway.log")
+
+
+class TurnRecall:
+    """
+    Pick the past turns worth sending with a new question.
+
+    Each stored turn is indexed by the embedding of its question (the query
+    embedding already computed for retrieval, so indexing costs nothing).
+    For a new question the `top_k` most similar earlier turns are recalled,
+    plus the last `recent` turns for conversational continuity, so the
+    history part of the prompt stays roughly constant as sessions grow.
+    Turns without an embedding (e.g. loaded from a shared session store)
+    are embedded in one batch on first use.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 3,
+        recent: int = 2,
+        min_similarity: float = 0.0,
+        max_sessions: int = 10000,
+        max_turns_per_session: int = 200,
+    ):
+        self.top_k = int(top_k)
+        self.recent = int(recent)
+        self.min_similarity = float(min_similarity)
+        self.max_sessions = int(max_sessions)
+        self.max_turns_per_session = int(max_turns_per_session)
+        self._lock = threading.Lock()
+        # session_id -> {(query, answer): embedding}, both in insertion order
+        self._sessions: "OrderedDict[str, OrderedDict]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls) -> "TurnRecall":
+        cfg = getattr(Config, "HISTORY_RECALL", None) or {}
+        return cls(
+            top_k=cfg.get("top_k", 3),
+            recent=cfg.get("recent", 2),
+            min_similarity=cfg.get("min_similarity", 0.0),
+        )
+
+    def _session(self, session_id: str) -> OrderedDict:
+        index = self._sessions.get(session_id)
+        if index is None:
+            index = self._sessions[session_id] = OrderedDict()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return index
+
+    def remember(self, session_id: str, query: str, answer: str, embedding: Optional[np.ndarray]):
+        if embedding is None:
+            return
+        with self._lock:
+            index = self._session(session_id)
+            index[(query, answer)] = np.asarray(embedding, dtype=np.float32).reshape(-1)
+            while len(index) > self.max_turns_per_session:
+                index.popitem(last=False)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def select(
+        self,
+        session_id: str,
+        turns: List[Dict],
+        query_embedding: np.ndarray,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+    ) -> List[Dict]:
+        """The recalled subset of turns, in their original order."""
+        summary = [t for t in turns if t.get("query") == SUMMARY_QUERY]
+        turns = [t for t in turns if t.get("query") != SUMMARY_QUERY]
+        if len(turns) <= self.top_k + self.recent:
+            return summary + turns
+
+        recent_start = len(turns) - self.recent
+        older = turns[:recent_start]
+        with self._lock:
+            index = self._session(session_id)
+            keys = [(t["query"], t["answer"]) for t in older]
+            missing = [k for k in keys if k not in index]
+        if missing and embed is not None:
+            vectors = np.asarray(embed([q for q, _ in missing]), dtype=np.float32)
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    index[key] = vector
+
+        candidates = [(i, index[k]) for i, k in enumerate(keys) if k in index]
+        chosen = set()
+        if candidates:
+            matrix = np.stack([v for _, v in candidates])
+            scores = matrix @ np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            for pos in np.argsort(-scores)[: self.top_k]:
+                if scores[pos] >= self.min_similarity:
+                    chosen.add(candidates[pos][0])
+
+        selected = [t for i, t in enumerate(older) if i in chosen] + turns[recent_start:]
+        logger.info(
+            "Recalled %d of %d past turns (%d similar, %d recent) [session=%s]",
+            len(selected), len(turns), len(chosen), len(turns) - recent_start, session_id,
+        )
+        return summary + selected
+
+
+turn_recall = TurnRecall.from_config()
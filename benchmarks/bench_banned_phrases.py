@@ -0,0 +1,53 @@
+"""
+Benchmark banned-phrase checking as the phrase list grows: the previous
+per-phrase substring scan versus the precompiled Aho-Corasick matcher.
+
+Run with:
+    python benchmarks/bench_banned_phrases.py --phrases 4 100 1000 10000 --text-words 300
+"""
+import argparse
+import random
+import string
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.phrase_matcher import PhraseMatcher  # noqa: E402
+
+
+def naive_check(phrases, text):
+    lower = text.lower()
+    return [p for p in phrases if p.lower() in lower]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--phrases", type=int, nargs="+", default=[4, 100, 1000, 10000])
+    parser.add_argument("--text-words", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    def word():
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+    text = " ".join(word() for _ in range(args.text_words))
+    print(f"text: {len(text)} chars")
+    print(f"{'phrases':>8} | {'build (ms)':>10} | {'naive (ms)':>10} | {'automaton (ms)':>14} | {'speedup':>7}")
+    for n in args.phrases:
+        phrases = [" ".join(word() for _ in range(rng.randint(1, 3))) for _ in range(n)]
+        start = time.perf_counter()
+        matcher = PhraseMatcher(phrases)
+        build = (time.perf_counter() - start) * 1000
+        assert matcher.find(text) == naive_check(phrases, text)
+        naive = min(timeit.repeat(lambda: naive_check(phrases, text), number=1, repeat=args.repeat)) * 1000
+        fast = min(timeit.repeat(lambda: matcher.find(text), number=1, repeat=args.repeat)) * 1000
+        print(f"{n:>8} | {build:>10.2f} | {naive:>10.3f} | {fast:>14.3f} | {naive / fast:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
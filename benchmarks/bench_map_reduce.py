@@ -0,0 +1,53 @@
+"""
+Benchmark single-prompt versus map-reduce reasoning latency for growing
+passage sets.
+
+Requires a running Ollama with OLLAMA_MODEL pulled. Run with:
+    python benchmarks/bench_map_reduce.py --top-k 5 10 20 --repeat 3
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents.reasoning_agent import ReasoningAgent  # noqa: E402
+from indexer import load_corpus  # noqa: E402
+
+
+async def time_mode(agent: ReasoningAgent, mode: str, query: str, passages, repeat: int):
+    latencies, confidences = [], []
+    for _ in range(repeat):
+        start = time.time()
+        result = await agent.reason(query, passages, mode=mode)
+        latencies.append(time.time() - start)
+        confidences.append(float(result.get("confidence", 0.0)))
+    return statistics.median(latencies), statistics.mean(confidences)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--query", type=str, default="What are the main process variables affecting etch critical dimension?")
+    parser.add_argument("--corpus", type=str, default="data/corpus")
+    args = parser.parse_args()
+
+    corpus = [dict(p, score=1.0) for p in load_corpus(Path(args.corpus))]
+    agent = ReasoningAgent()
+    # Load the model first so load time does not skew the first measurement
+    await agent._call_ollama("ping")
+
+    print(f"{'top_k':>5} | {'single (s)':>10} | {'map_reduce (s)':>14} | {'speedup':>7} | confidence single / map_reduce")
+    for top_k in args.top_k:
+        passages = (corpus * (top_k // max(len(corpus), 1) + 1))[:top_k]
+        single, single_conf = await time_mode(agent, "single", args.query, passages, args.repeat)
+        mapped, mapped_conf = await time_mode(agent, "map_reduce", args.query, passages, args.repeat)
+        print(f"{top_k:>5} | {single:>10.2f} | {mapped:>14.2f} | {single / mapped:>6.2f}x | {single_conf:.2f} / {mapped_conf:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark prompt-eval time per turn for the legacy prompt layout versus the
+stable system-prompt layout, with and without Ollama context continuation.
+
+Requires a running Ollama with OLLAMA_MODEL pulled. Run with:
+    python benchmarks/bench_prompt_prefix.py --turns 6 --top-k 5
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents.reasoning_agent import ReasoningAgent, SYSTEM_HEADER, SYSTEM_REQUIREMENTS  # noqa: E402
+from indexer import load_corpus  # noqa: E402
+
+
+def legacy_prompt(agent: ReasoningAgent, query: str, passages, history) -> str:
+    """The pre-restructure layout: query first, instructions re-sent inline every call."""
+    context = "\n\n".join(f"[PASSAGE {i}] (score={p['score']:.3f})\n{p['text']}" for i, p in enumerate(passages))
+    if history:
+        history_text = "\n".join(f"[MEMORY {i}] Q: {t['query']} | A: {t['answer']}" for i, t in enumerate(history))
+        query = f"Previous context:\n{history_text}\n\nNew Query:\n{query}"
+    return (
+        SYSTEM_HEADER +
+        f"Query: {query}\n\n"
+        f"Passages:\n{context}\n\n"
+        f"User Instructions:\n{agent.user_instructions}\n\n"
+        + SYSTEM_REQUIREMENTS
+    )
+
+
+async def run_session(agent: ReasoningAgent, mode: str, questions, passages):
+    history, context, stats = [], None, []
+    for q in questions:
+        if mode == "legacy":
+            result = await agent._call_ollama(legacy_prompt(agent, q, passages, history))
+        else:
+            prompts = agent._build_prompt(q, passages, None if context else history)
+            result = await agent._call_ollama(prompts["prompt"], system=prompts["system"], context=context)
+            if mode == "continuation":
+                context = result.get("context")
+        history.append({"query": q, "answer": result["response"][:200]})
+        stats.append((result.get("prompt_eval_count", 0), result.get("prompt_eval_duration", 0) / 1e6))
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--questions", type=str, default="questions.txt")
+    parser.add_argument("--corpus", type=str, default="data/corpus")
+    args = parser.parse_args()
+
+    questions = [q.strip() for q in Path(args.questions).read_text(encoding="utf-8").splitlines() if q.strip()]
+    questions = (questions * args.turns)[:args.turns]
+    passages = [dict(p, score=1.0) for p in load_corpus(Path(args.corpus))[:args.top_k]]
+
+    agent = ReasoningAgent()
+    # Load the model first so load time does not skew the first mode
+    await agent._call_ollama("ping")
+
+    results = {}
+    for mode in ("legacy", "stable", "continuation"):
+        results[mode] = await run_session(agent, mode, questions, passages)
+
+    print(f"{'turn':>4} | " + " | ".join(f"{m:>24}" for m in results))
+    for turn in range(args.turns):
+        cells = [f"{results[m][turn][0]:>6} tok {results[m][turn][1]:>9.1f} ms" for m in results]
+        print(f"{turn:>4} | " + " | ".join(cells))
+
+    legacy_ms = statistics.mean(ms for _, ms in results["legacy"])
+    for mode in ("stable", "continuation"):
+        mode_ms = statistics.mean(ms for _, ms in results[mode])
+        print(f"{mode}: mean prompt eval {mode_ms:.1f} ms/turn, saved {legacy_ms - mode_ms:.1f} ms/turn vs legacy")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Worst-case cost of the PII patterns on adversarial and fuzzed inputs.
+
+For every pattern, repeated near-miss inputs (and random strings over the
+characters the patterns consume) are timed at two sizes. The slowest input
+per pattern is reported in ms/MB, along with how its cost grows with input
+size (about 1 for linear, about 2 for quadratic backtracking). Full
+redaction of 1 MB of each adversarial input is then timed with one regex
+pass over the whole text and with segmented scanning (GOVERNANCE_LIMITS of
+the current policy).
+
+Run with:
+    python benchmarks/bench_regex_worst_case.py --sizes 4096 16384 --fuzz 200
+"""
+import argparse
+import logging
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents.governance_agent import (  # noqa: E402
+    PII_PATTERNS,
+    compile_pii_plan,
+    governance_policy,
+    redact_text,
+    redact_with_plan,
+)
+
+# Units repeated to the target size; each keeps some pattern matching partially
+ADVERSARIAL = {
+    "dotted word": "a.",
+    "local part": "a",
+    "at and dots": "a@a.",
+    "digits": "1",
+    "dotted digits": "1.",
+    "dashed digits": "1-",
+    "spaced digits": "1 ",
+    "parenthesised": "(1",
+    "capitalised words": "Aa ",
+    "long capitalised": "Aaaaaaaaaaaaaaaaaaaaaaaa ",
+    "id keyword": "id ",
+    "id colons": "id:",
+    "slashes": "1/",
+}
+ALPHABET = "aA1.@-_ /:()+|%\n" + "id" * 3
+
+
+def _time(fn, repeat: int = 1) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _sized(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs=2, default=[4096, 16384])
+    parser.add_argument("--fuzz", type=int, default=200, help="random inputs per pattern")
+    parser.add_argument("--mb", type=float, default=1.0, help="size of the full-redaction inputs")
+    parser.add_argument("--skip-single-pass", action="store_true", help="skip unsegmented 1 MB runs (slow)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    small, large = args.sizes
+    rng = random.Random(0)
+
+    print(f"{'pattern':>7} | {'worst input':>18} | {'ms/MB @' + str(small):>14} | {'ms/MB @' + str(large):>14} | {'growth':>6}")
+    for name, rx in PII_PATTERNS:
+        inputs = dict(ADVERSARIAL)
+        for i in range(args.fuzz):
+            inputs[f"fuzz #{i}"] = "".join(rng.choice(ALPHABET) for _ in range(64))
+        worst = max(inputs, key=lambda k: _time(lambda: rx.sub("X", _sized(inputs[k], small))))
+        t_small = _time(lambda: rx.sub("X", _sized(inputs[worst], small)), repeat=5)
+        t_large = _time(lambda: rx.sub("X", _sized(inputs[worst], large)), repeat=5)
+        growth = math.log(max(t_large, 1e-9) / max(t_small, 1e-9)) / math.log(large / small)
+        print(
+            f"{name:>7} | {worst:>18} | {t_small * 1e3 * 2**20 / small:>14.1f} | "
+            f"{t_large * 1e3 * 2**20 / large:>14.1f} | {growth:>6.2f}"
+        )
+
+    limits = dict(governance_policy.current.limits, time_budget_ms=10**9)
+    pii_types = tuple(name for name, _ in PII_PATTERNS)
+    plan = compile_pii_plan(pii_types)
+    size = int(args.mb * 2**20)
+    print(f"\nfull redaction of {args.mb:g} MB, segment_chars={limits.get('segment_chars')}, "
+          f"max_holdback_chars={limits.get('max_holdback_chars')}")
+    print(f"{'input':>18} | {'single pass (s)':>15} | {'segmented (s)':>13}")
+    for label, unit in ADVERSARIAL.items():
+        text = _sized(unit, size)
+        single = "skipped" if args.skip_single_pass else f"{_time(lambda: redact_with_plan(plan, text)):.2f}"
+        segmented = _time(lambda: redact_text(pii_types, text, limits=limits))
+        print(f"{label:>18} | {single:>15} | {segmented:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
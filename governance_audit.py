@@ -0,0 +1,53 @@
+"""
+Audit a corpus directory or a JSONL file (e.g. historical answers) against
+the current governance policy. Verdicts are written as JSONL; the summary
+(counts by PII type, items per second) goes to stderr.
+
+    python governance_audit.py --input data/corpus
+    python governance_audit.py --input answers.jsonl --text-field answer --output verdicts.jsonl
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from app.agents.governance_agent import governance_policy
+from app.utils.governance_batch import AuditSummary, BatchEvaluator, iter_corpus, iter_jsonl
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", type=str, required=True, help="corpus directory or .jsonl file")
+    parser.add_argument("--text-field", type=str, default="text")
+    parser.add_argument("--id-field", type=str, default="id")
+    parser.add_argument("--output", type=str, default=None, help="verdicts file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--include-redacted", action="store_true")
+    args = parser.parse_args()
+
+    source = Path(args.input)
+    if source.is_dir():
+        items = iter_corpus(source)
+    elif source.exists():
+        items = iter_jsonl(source, text_field=args.text_field, id_field=args.id_field)
+    else:
+        print("Input not found:", source, file=sys.stderr)
+        exit(1)
+
+    evaluator = BatchEvaluator(workers=args.workers, chunk_size=args.chunk_size)
+    summary = AuditSummary()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for verdict in evaluator.evaluate(items, governance_policy.current, include_redacted=args.include_redacted):
+            summary.add(verdict)
+            out.write(json.dumps(verdict) + "\n")
+    finally:
+        evaluator.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary.as_dict(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import inspect
+import json
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    # The agents use asyncio primitives (asyncio.sleep), so only run on asyncio
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def reset_ollama_breaker():
+    # Breakers are shared process-wide; keep failures from leaking between tests
+    from app.agents.reasoning_agent import _MODEL_BREAKERS
+    for breaker in list(_MODEL_BREAKERS.values()):
+        breaker.reset()
+    yield
+    for breaker in list(_MODEL_BREAKERS.values()):
+        breaker.reset()
+
+
+def ollama_stream(text: str, **final) -> httpx.Response:
+    """A streamed /api/generate response carrying `text`; `final` extends the done line."""
+    body = "\n".join([
+        json.dumps({"response": text, "done": False}),
+        json.dumps({"response": "", "done": True, **final}),
+    ])
+    return httpx.Response(200, content=body.encode())
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """
+    Answers every Ollama request with `handler(payload)` and records the payloads.
+
+    The handler may be sync or async. It returns an httpx.Response, or the
+    generated text (dicts are JSON-encoded) to stream back; exceptions it
+    raises (e.g. httpx.ConnectError) surface as transport failures.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.payloads = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def models(self):
+        return [payload.get("model") for payload in self.payloads]
+
+    async def handle_async_request(self, request):
+        payload = json.loads(request.content) if request.content else {}
+        self.payloads.append(payload)
+        response = self.handler(payload)
+        if inspect.isawaitable(response):
+            response = await response
+        if isinstance(response, httpx.Response):
+            return response
+        if not isinstance(response, str):
+            response = json.dumps(response)
+        return ollama_stream(response)
+
+
+class StubOllama:
+    """Routes httpx.AsyncClient through a stub transport and builds agents on it."""
+
+    stream = staticmethod(ollama_stream)
+
+    def __init__(self, monkeypatch):
+        self._monkeypatch = monkeypatch
+        self._client = httpx.AsyncClient
+        self.transport = None
+
+    def route(self, transport):
+        """Send every request to `transport` (a transport, or a handler for StubTransport)."""
+        if not isinstance(transport, httpx.AsyncBaseTransport):
+            transport = StubTransport(transport)
+        self.transport = transport
+        self._monkeypatch.setattr(httpx, "AsyncClient", lambda *a, **kw: self._client(transport=transport))
+        return transport
+
+    def make(self, transport, **agent_kwargs):
+        """A ReasoningAgent whose Ollama calls go to `transport`."""
+        from app.agents.reasoning_agent import ReasoningAgent
+        self.route(transport)
+        return ReasoningAgent(**agent_kwargs)
+
+
+@pytest.fixture
+def stub_ollama(monkeypatch):
+    return StubOllama(monkeypatch)
@@ -0,0 +1,90 @@
+"""
+Unit tests for the batched governance audit log.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from app.utils.audit_log import AuditLog, query_hash, reason_codes
+
+HOUR = 3600.0
+T0 = 1_760_000_400.0  # on an hour boundary (UTC)
+
+
+@pytest.fixture
+def audit(tmp_path):
+    log = AuditLog(directory=str(tmp_path / "audit"), flush_interval=0.01, batch_size=4)
+    yield log
+    log.close()
+
+
+def _record(ts, session="s1", reasons=("approved",), approved=True):
+    return {"ts": ts, "session_id": session, "approved": approved, "reasons": list(reasons), "query_hash": query_hash("q")}
+
+
+def test_reason_codes():
+    assert reason_codes("reasoner_low_confidence (0.20 < 0.3); pii_redacted") == ["reasoner_low_confidence", "pii_redacted"]
+    assert reason_codes("banned_phrases_present: ['x']") == ["banned_phrases_present"]
+    assert reason_codes("approved") == ["approved"]
+
+
+def test_records_are_batched_into_hourly_compressed_segments(audit, tmp_path):
+    for i in range(10):
+        audit.record(_record(T0 + i * HOUR / 4))
+    audit.flush()
+
+    segments = sorted(p.name for p in (tmp_path / "audit").glob("*.jsonl.gz"))
+    assert len(segments) == 3
+    assert audit.records_written == 10
+    assert audit.batches_written < 10
+    # Every segment is a valid (multi-member) gzip file of JSON lines
+    lines = [json.loads(line) for name in segments for line in gzip.open(tmp_path / "audit" / name, "rt")]
+    assert sorted(r["ts"] for r in lines) == [T0 + i * HOUR / 4 for i in range(10)]
+
+
+def test_query_by_time_session_and_reason(audit):
+    audit.record(_record(T0, session="a"))
+    audit.record(_record(T0 + 10, session="b", reasons=["banned_phrases_present"], approved=False))
+    audit.record(_record(T0 + HOUR, session="a", reasons=["pii_redacted"]))
+    audit.record(_record(T0 + 2 * HOUR, session="c"))
+
+    assert [r["ts"] for r in audit.query(session_id="a")["records"]] == [T0 + HOUR, T0]
+    assert [r["session_id"] for r in audit.query(reason="banned_phrases_present")["records"]] == ["b"]
+    assert [r["ts"] for r in audit.query(start=T0 + 5, end=T0 + 2 * HOUR)["records"]] == [T0 + HOUR, T0 + 10]
+    assert len(audit.query(limit=2)["records"]) == 2
+
+
+def test_query_reads_only_matching_batches(audit):
+    for hour in range(24):
+        for i in range(4):
+            audit.record(_record(T0 + hour * HOUR + i, session=f"s{hour}"))
+        audit.flush()
+
+    result = audit.query(session_id="s7")
+    assert len(result["records"]) == 4
+    assert result["batches_scanned"] == 1
+    assert result["batches_total"] == 24
+
+    result = audit.query(start=T0 + 20 * HOUR)
+    assert result["batches_scanned"] == 4
+
+
+def test_index_is_shared_through_the_files(audit):
+    audit.record(_record(T0, session="x"))
+    audit.flush()
+    # A second reader (e.g. another worker process) sees the records
+    other = AuditLog(directory=str(audit.directory))
+    assert [r["session_id"] for r in other.query()["records"]] == ["x"]
+    audit.record(_record(T0 + 1, session="y"))
+    audit.flush()
+    assert [r["session_id"] for r in other.query()["records"]] == ["y", "x"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log = AuditLog(directory=str(tmp_path / "audit"), max_queue=1, flush_interval=5)
+    log._writer = object()  # no writer draining the queue
+    log.record(_record(T0))
+    log.record(_record(T0 + 1))
+    assert log.dropped == 1
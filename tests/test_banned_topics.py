@@ -0,0 +1,107 @@
+"""
+Tests for embedding-based banned-topic detection.
+"""
+
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from app.agents import governance_agent
+from app.agents.governance_agent import GovernanceAgent, build_policy, governance_policy
+from app.config import Config
+from app.utils.topic_matcher import TopicMatcher
+
+# Words sharing a dimension stand in for paraphrases
+CONCEPTS = [
+    {"medical", "diagnosis", "diagnose", "illness", "disease", "symptoms", "sick"},
+    {"weather", "rain", "forecast", "sunny"},
+    {"etch", "plasma", "wafer"},
+]
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        rows = []
+        for text in texts:
+            v = np.zeros(64, dtype=np.float32)
+            for word in text.lower().replace("?", "").replace(",", "").split():
+                hits = [i for i, concept in enumerate(CONCEPTS) if word in concept]
+                # Concept words weigh more than filler words, which get their own dimensions
+                if hits:
+                    v[hits[0]] += 2.0
+                else:
+                    v[len(CONCEPTS) + zlib.crc32(word.encode()) % (64 - len(CONCEPTS))] += 0.5
+            rows.append(v / (np.linalg.norm(v) or 1.0))
+        return np.stack(rows)
+
+
+@pytest.fixture
+def topics_policy(monkeypatch):
+    monkeypatch.setattr(governance_agent, "_topic_matchers", OrderedDict())
+    monkeypatch.setattr(
+        Config,
+        "BANNED_TOPICS",
+        {"enabled": True, "similarity_threshold": 0.6, "topics": {"medical diagnosis": ["what illness do I have"]}},
+        raising=False,
+    )
+    policy = build_policy(governance_policy.current.version + 1000)
+    monkeypatch.setattr(governance_policy, "current", policy)
+    return policy
+
+
+def test_matcher_scores_topics_in_one_product():
+    encoder = FakeEncoder()
+    matcher = TopicMatcher({"medical diagnosis": ["what illness do I have"], "weather": []}, encoder)
+    assert len(encoder.calls) == 1
+
+    scores = matcher.scores(encoder(["which disease makes me sick", "rain tomorrow", "etch the wafer"]))
+    assert scores.shape == (3, 2)
+    assert list(matcher.match(encoder(["is it a disease"]), 0.6)[0]) == ["medical diagnosis"]
+    assert matcher.match(encoder(["etch the wafer"]), 0.6) == [{}]
+
+
+def test_paraphrased_query_rejected_before_generation(topics_policy):
+    encoder = FakeEncoder()
+    query_embedding = encoder(["what disease do I have"])
+    decision = GovernanceAgent().pre_check(
+        "what disease do I have", [{"text": "x"}], 0.9, query_embedding=query_embedding, embed=encoder
+    )
+    assert decision["checks"] == ["banned_topic"]
+    assert "medical diagnosis" in decision["reason"]
+
+    on_topic = encoder(["how does plasma etch a wafer"])
+    assert GovernanceAgent().pre_check("how does plasma etch a wafer", [{"text": "x"}], 0.9,
+                                       query_embedding=on_topic, embed=encoder) is None
+
+
+def test_evaluate_reuses_query_embedding_and_topic_matrix(topics_policy):
+    encoder = FakeEncoder()
+    query_embedding = encoder(["plasma etch rate"])
+    agent = GovernanceAgent()
+
+    for _ in range(3):
+        result = agent.evaluate("You likely have an illness, see symptoms", [], 0.9,
+                                query_embedding=query_embedding, embed=encoder)
+        assert result["approved"] is False
+        assert "banned_topic_in_answer" in result["reason"]
+        assert "banned_topic_in_query" not in result["reason"]
+
+    # One call for the query, one for the topic matrix, then only the answers
+    assert encoder.calls[1] == ["medical diagnosis", "what illness do I have"]
+    assert [len(c) for c in encoder.calls[2:]] == [1, 1, 1]
+    assert all("plasma etch rate" not in c for c in encoder.calls[1:])
+
+
+def test_disabled_topics_cost_nothing():
+    encoder = FakeEncoder()
+    agent = GovernanceAgent()
+    assert not agent.policy.banned_topics
+    result = agent.evaluate("You likely have an illness", [], 0.9, embed=encoder)
+    assert "banned_topic" not in result["reason"]
+    assert encoder.calls == []
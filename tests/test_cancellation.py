@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app.agents.reasoning_agent import DeadlineExceeded
+from app.main import ClientDisconnected, _parse_deadline, _run_cancellable
+
+
+class SlowStreamTransport(httpx.AsyncBaseTransport):
+    """Streams one token per 50ms and records whether the stream was closed."""
+
+    def __init__(self):
+        self.closed = False
+        self.calls = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        transport = self
+
+        class Body(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                for _ in range(100):
+                    await asyncio.sleep(0.05)
+                    yield (json.dumps({"response": "x", "done": False}) + "\n").encode()
+
+            async def aclose(self):
+                transport.closed = True
+
+        return httpx.Response(200, stream=Body())
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: float):
+        self.disconnect_at = time.time() + disconnect_after
+
+    async def is_disconnected(self):
+        return time.time() >= self.disconnect_at
+
+
+@pytest.mark.anyio
+async def test_deadline_closes_stream(stub_ollama):
+    transport = SlowStreamTransport()
+    agent = stub_ollama.make(transport)
+
+    start = time.time()
+    with pytest.raises(DeadlineExceeded):
+        await agent.reason("q", [], deadline=time.time() + 0.2)
+
+    assert time.time() - start < 1.0
+    assert transport.closed
+    assert transport.calls == 1
+
+
+@pytest.mark.anyio
+async def test_deadline_skips_retries(stub_ollama):
+    def refuse(payload):
+        raise httpx.ConnectError("fail")
+
+    agent = stub_ollama.make(refuse)
+
+    with pytest.raises(DeadlineExceeded):
+        await agent.reason("q", [], deadline=time.time() + 0.1)
+    assert stub_ollama.transport.calls == 1
+
+
+@pytest.mark.anyio
+async def test_expired_deadline_never_calls_ollama(stub_ollama):
+    transport = SlowStreamTransport()
+    agent = stub_ollama.make(transport)
+
+    with pytest.raises(DeadlineExceeded):
+        await agent.reason("q", [], deadline=time.time() - 1)
+    assert transport.calls == 0
+
+
+@pytest.mark.anyio
+async def test_client_disconnect_cancels_generation(stub_ollama):
+    transport = SlowStreamTransport()
+    agent = stub_ollama.make(transport)
+
+    with pytest.raises(ClientDisconnected):
+        await _run_cancellable(agent.reason("q", []), FakeRequest(disconnect_after=0.2), deadline=None)
+    assert transport.closed
+
+
+def test_parse_deadline():
+    assert _parse_deadline(None) is None
+    assert _parse_deadline("1700000000.5") == 1700000000.5
+    assert _parse_deadline("2023-11-14T22:13:20Z") == 1700000000.0
@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from app.agents.reasoning_agent import ReasoningAgent
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("t", failure_threshold=3, min_calls=100)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker("t", failure_threshold=100, error_rate_threshold=0.5, window=10, min_calls=10)
+    for _ in range(5):
+        breaker.record_success()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() is True
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["trips"] == 2
+
+
+@pytest.fixture
+def failing_ollama(stub_ollama, monkeypatch):
+    def refuse(payload):
+        raise httpx.ConnectError("fail")
+
+    monkeypatch.setattr("app.agents.reasoning_agent.OLLAMA_BACKOFF_BASE", 0)
+    return stub_ollama.route(refuse)
+
+
+@pytest.mark.anyio
+async def test_open_circuit_fails_fast_without_calling_ollama(failing_ollama):
+    breaker = CircuitBreaker("t", failure_threshold=2, reset_timeout=60)
+    agent = ReasoningAgent(breaker=breaker)
+
+    await agent.reason("q", [])
+    await agent.reason("q", [])
+    assert breaker.state == OPEN
+    calls_before = failing_ollama.calls
+
+    result = await agent.reason("q", [])
+    assert "temporarily unavailable" in result["answer"].lower()
+    assert failing_ollama.calls == calls_before
+
+
+@pytest.mark.anyio
+async def test_half_open_probe_makes_single_attempt(failing_ollama):
+    breaker = CircuitBreaker("t", failure_threshold=1, reset_timeout=0)
+    agent = ReasoningAgent(breaker=breaker)
+
+    await agent.reason("q", [])
+    assert failing_ollama.calls == 3
+
+    await agent.reason("q", [])
+    assert failing_ollama.calls == 4
+    assert breaker.state == OPEN
+
+
+def test_breaker_shared_between_agents():
+    assert ReasoningAgent().breaker is ReasoningAgent().breaker
@@ -0,0 +1,76 @@
+"""
+Unit tests for sentence-level context compression.
+"""
+
+import numpy as np
+
+from app.agents.reasoning_agent import ReasoningAgent
+from app.utils.context_compressor import ContextCompressor, split_sentences
+
+VOCAB = ["etch", "plasma", "weather", "lunch"]
+
+
+def keyword_embed(texts):
+    """One dimension per vocabulary word; counts the batch calls."""
+    keyword_embed.calls += 1
+    rows = np.array([[t.lower().count(w) for w in VOCAB] for t in texts], dtype=float) + 1e-3
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+keyword_embed.calls = 0
+
+QUERY = keyword_embed(["etch plasma"])
+
+
+def _passages():
+    return [
+        {"id": "a#p0", "text": "The weather was fine. Etch rate depends on plasma power. Lunch was late.", "score": 0.9},
+        {"id": "b#p0", "text": "Weather again. More weather.", "score": 0.5},
+        {"id": "c#p0", "text": "Plasma density drives the etch. Lunch was served.", "score": 0.4},
+    ]
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two? Three!\nFour") == ["One.", "Two?", "Three!", "Four"]
+    assert split_sentences("") == []
+
+
+def test_keeps_relevant_sentences_and_passage_positions():
+    compressor = ContextCompressor(keyword_embed, max_tokens=1000, neighbours=0, min_score=0.5)
+    compressed = compressor.compress(QUERY, _passages())
+
+    assert [p["id"] for p in compressed] == ["a#p0", "b#p0", "c#p0"]
+    assert compressed[0]["text"] == "Etch rate depends on plasma power."
+    assert compressed[1]["text"] == ""
+    assert compressed[2]["text"] == "Plasma density drives the etch."
+
+
+def test_neighbours_are_included_in_original_order():
+    compressor = ContextCompressor(keyword_embed, max_tokens=1000, neighbours=1, min_score=0.5)
+    compressed = compressor.compress(QUERY, _passages())
+
+    assert compressed[0]["text"] == "The weather was fine. Etch rate depends on plasma power. Lunch was late."
+
+
+def test_token_budget_limits_kept_sentences():
+    compressor = ContextCompressor(keyword_embed, max_tokens=12, neighbours=1, min_score=0.5)
+    compressed = compressor.compress(QUERY, _passages())
+
+    kept = [p["text"] for p in compressed if p["text"]]
+    assert kept == ["Etch rate depends on plasma power."]
+
+
+def test_sentences_embedded_in_one_batch():
+    keyword_embed.calls = 0
+    ContextCompressor(keyword_embed).compress(QUERY, _passages())
+    assert keyword_embed.calls == 1
+
+
+def test_prompt_skips_empty_passages_but_keeps_labels():
+    compressor = ContextCompressor(keyword_embed, max_tokens=1000, neighbours=0, min_score=0.5)
+    prompt = ReasoningAgent()._build_prompt("q", compressor.compress(QUERY, _passages()))["prompt"]
+
+    assert "[PASSAGE 0]" in prompt
+    assert "[PASSAGE 1]" not in prompt
+    assert "[PASSAGE 2]" in prompt
+    assert "Weather again" not in prompt
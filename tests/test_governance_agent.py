@@ -2,9 +2,14 @@
 Unit tests for GovernanceAgent PII redaction and per-agent thresholds.
 """
 
+import os
+import time
+
 import pytest
+import yaml
 
-from app.agents.governance_agent import GovernanceAgent
+from app.agents.governance_agent import GovernanceAgent, governance_policy
+from app.config import Config
 
 
 class TestEmailRedaction:
@@ -213,6 +218,157 @@ class TestRedactionPlaceholders:
         assert "[REDACTED_IP]" in result
 
 
+def test_redaction_reports_spans_in_original_text():
+    agent = GovernanceAgent()
+    text = "Mail a@b.com from 10.0.0.1, not 999.1.1.1"
+    redacted, spans = agent.redact_pii_spans(text)
+
+    assert redacted == "Mail [REDACTED_EMAIL] from [REDACTED_IP], not 999.1.1.1"
+    assert [(s["type"], text[s["start"]:s["end"]]) for s in spans] == [("email", "a@b.com"), ("ip", "10.0.0.1")]
+
+
+@pytest.mark.parametrize("text, expected", [
+    # A name must not claim the local part of an email
+    ("Reach Anna@example.com today", "Reach [REDACTED_EMAIL] today"),
+    ("Contact Jane Miller@fab.example", "[REDACTED_NAME] [REDACTED_EMAIL]"),
+    # A phone number wins over an ID that would run into it
+    ("ID AB12-555-123-4567", "[REDACTED_ID]-[REDACTED_PHONE]"),
+    ("ssn 123-45-6789٣٤2024", "[REDACTED_ID]-[REDACTED_PHONE]"),
+])
+def test_overlapping_matches_go_to_the_higher_priority_type(text, expected):
+    agent = GovernanceAgent()
+    redacted, spans = agent.redact_pii_spans(text)
+    assert redacted == expected
+    redactor = agent.incremental_redactor()
+    assert "".join(redactor.feed(c) for c in text) + redactor.flush() == expected
+    assert redactor.spans == spans
+
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    """Set GOVERNANCE_LIMITS (small segments by default) through a policy reload."""
+    limits = {"segment_chars": 64, "max_holdback_chars": 256, "time_budget_ms": 1000, "fail_closed": True}
+
+    def apply(**changes):
+        limits.update(changes)
+        monkeypatch.setattr(Config, "GOVERNANCE_LIMITS", dict(limits), raising=False)
+        governance_policy.reload()
+
+    apply()
+    yield apply
+    monkeypatch.undo()
+    governance_policy.reload()
+
+
+def test_segmented_redaction_matches_single_pass(small_segments):
+    from app.agents.governance_agent import redact_with_plan
+    agent = GovernanceAgent()
+    text = "Report by Jane Miller on 2024-03-15 at 10.20.30.40; mail jane.miller@fab.example, call 555-010-2233.\n" * 50
+    redacted, spans = agent.redact_pii_spans(text)
+    assert (redacted, spans) == redact_with_plan(agent.policy.pii_plan, text)
+
+
+def test_pathological_input_is_bounded(small_segments):
+    # Every "a" starts an email attempt; unbounded, each rescanned the rest of the text
+    small_segments(segment_chars=4096, time_budget_ms=60_000)
+    text = "a." * 100_000
+    start = time.perf_counter()
+    redacted, spans = GovernanceAgent().redact_pii_spans(text)
+    assert time.perf_counter() - start < 5
+    assert redacted == text and spans == []
+
+
+def test_time_budget_fail_closed_and_open(small_segments):
+    agent = GovernanceAgent()
+    text = "Call 555-123-4567 now. " * 20
+    redacted, spans = agent.redact_pii_spans(text, deadline=time.monotonic() - 1)
+    assert redacted == "[REDACTED_TIMEOUT]"
+    assert spans == [{"type": "timeout", "start": 0, "end": len(text), "text": ""}]
+
+    small_segments(time_budget_ms=0)
+    result = agent.evaluate(text, [], confidence=0.9)
+    assert result["approved"] is False
+    assert "governance_time_budget_exceeded" in result["reason"]
+
+    small_segments(fail_closed=False)
+    result = agent.evaluate(text, [], confidence=0.9)
+    assert result["approved"] is True
+    assert "governance_time_budget_exceeded" in result["reason"]
+
+
+@pytest.fixture
+def config_copy(tmp_path, monkeypatch):
+    """Point Config at a scratch copy of config.yml; restores the real one afterwards."""
+    path = tmp_path / "config.yml"
+    path.write_text(open(Config._config_path, encoding="utf-8").read(), encoding="utf-8")
+    monkeypatch.setattr(Config, "_config_path", str(path))
+    yield path
+    monkeypatch.undo()
+    Config.reload()
+
+
+def _edit_config(path, **changes):
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data.update(changes)
+    path.write_text(yaml.safe_dump(data, sort_keys=False), encoding="utf-8")
+
+
+def test_disabled_filters_are_not_compiled_in(config_copy):
+    _edit_config(config_copy, PII_FILTERS={"email": False, "phone": True, "ip": True, "date": True, "id": True, "name": True})
+    Config.reload()
+
+    result = GovernanceAgent()._redact_pii("Mail a@b.com or 555-123-4567")
+    assert "a@b.com" in result
+    assert "[REDACTED_PHONE]" in result
+
+
+def test_policy_hot_reloads_on_external_config_edit(config_copy):
+    agent = GovernanceAgent()
+    before = agent.policy
+    assert agent._check_banned_phrases("the launch codes") == []
+
+    _edit_config(config_copy, BANNED_PHRASES=["launch codes"], THRESHOLDS={"reasoner": 0.9, "retriever": 0.1})
+    os.utime(config_copy, (time.time() + 5, time.time() + 5))
+    assert governance_policy.check_config_file() is True
+
+    assert agent.policy.version == before.version + 1
+    assert agent._check_banned_phrases("the launch codes") == ["launch codes"]
+    assert agent.evaluate("fine", [], confidence=0.8)["approved"] is False
+    # The old snapshot is untouched
+    assert before.banned_phrases != agent.policy.banned_phrases
+
+
+def test_invalid_config_edit_keeps_current_policy(config_copy):
+    version = governance_policy.current.version
+    config_copy.write_text("BANNED_PHRASES: [unclosed", encoding="utf-8")
+    os.utime(config_copy, (time.time() + 5, time.time() + 5))
+
+    assert governance_policy.check_config_file() is False
+    assert governance_policy.current.version == version
+
+
+def test_agent_overrides_follow_policy_reloads():
+    agent = GovernanceAgent(thresholds={"reasoner": 0.2})
+    first = agent.policy
+    assert agent.policy is first
+    governance_policy.reload()
+    assert agent.policy is not first
+    assert agent.reasoner_threshold == 0.2
+
+
+def test_limits_follow_config_reload(config_copy):
+    agent = GovernanceAgent()
+    text = "Call 555-123-4567 now. " * 20
+    assert "governance_time_budget_exceeded" not in agent.evaluate(text, [], confidence=0.9)["reason"]
+
+    _edit_config(config_copy, GOVERNANCE_LIMITS={"segment_chars": 64, "time_budget_ms": 0, "fail_closed": True})
+    Config.reload()
+    assert agent.policy.limits["segment_chars"] == 64
+    result = agent.evaluate(text, [], confidence=0.9)
+    assert result["approved"] is False
+    assert "governance_time_budget_exceeded" in result["reason"]
+
+
 def test_reasoner_threshold_enforced():
     agent = GovernanceAgent(thresholds={"reasoner": 0.8})
     result = agent.evaluate("Test answer", [], confidence=0.5)
@@ -242,5 +398,36 @@ def test_retriever_threshold_enforced():
     assert "retriever_low_confidence" in result["reason"]
 
 
+def test_pre_check_rejects_low_retriever_confidence():
+    agent = GovernanceAgent(thresholds={"retriever": 0.6})
+    result = agent.pre_check("etch rate?", [{"text": "t", "score": 0.4}], retriever_confidence=0.4)
+
+    assert result["approved"] is False
+    assert result["checks"] == ["retriever_threshold"]
+
+
+def test_pre_check_rejects_empty_retrieval_and_banned_query():
+    agent = GovernanceAgent(banned_phrases=["classified"], thresholds={"retriever": 0.6})
+    result = agent.pre_check("show classified files", [], retriever_confidence=0.0)
+
+    assert result["checks"] == ["empty_retrieval", "banned_query"]
+    assert "banned_phrases_in_query" in result["reason"]
+
+
+def test_pre_check_passes_and_can_be_disabled():
+    agent = GovernanceAgent(thresholds={"retriever": 0.6})
+    assert agent.pre_check("etch rate?", [{"text": "t", "score": 0.9}], retriever_confidence=0.9) is None
+
+    disabled = GovernanceAgent(thresholds={"retriever": 0.6}, pre_checks={"enabled": False})
+    assert disabled.pre_check("etch rate?", [], retriever_confidence=0.0) is None
+
+
+def test_check_query_runs_only_query_level_checks():
+    agent = GovernanceAgent(banned_phrases=["classified"], thresholds={"retriever": 0.6})
+    # No passages and no retrieval confidence: only the query itself is judged
+    assert agent.check_query("etch rate?") is None
+    assert agent.check_query("show classified files")["checks"] == ["banned_query"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,88 @@
+"""
+Tests for batch governance evaluation (API, CLI helpers and process pool).
+"""
+
+import json
+
+import pytest
+
+from app.agents.governance_agent import GovernanceAgent, build_policy
+from app.utils.governance_batch import AuditSummary, BatchEvaluator, iter_corpus, iter_jsonl
+
+TEXTS = [
+    "Nothing sensitive here.",
+    "Mail jane@fab.example or call 555-123-4567.",
+    "The launch codes are at 10.0.0.1 and 10.0.0.2",
+    "Out of range 999.999.999.999",
+]
+
+
+def _items(texts):
+    return [{"id": str(i), "text": t} for i, t in enumerate(texts)]
+
+
+def test_verdicts_match_single_item_governance():
+    policy = build_policy(1, banned_phrases=["launch codes"])
+    verdicts = list(BatchEvaluator(workers=1).evaluate(_items(TEXTS), policy, include_redacted=True))
+    agent = GovernanceAgent(banned_phrases=["launch codes"])
+
+    assert [v["id"] for v in verdicts] == ["0", "1", "2", "3"]
+    assert [v["approved"] for v in verdicts] == [True, True, False, True]
+    assert verdicts[2]["banned_phrases"] == ["launch codes"]
+    assert verdicts[1]["pii"] == {"email": 1, "phone": 1}
+    assert verdicts[2]["pii"] == {"ip": 2}
+    assert [v["redacted_text"] for v in verdicts] == [agent._redact_pii(t) for t in TEXTS]
+
+
+def test_process_pool_preserves_order_and_results():
+    policy = build_policy(1, banned_phrases=["launch codes"])
+    items = _items(TEXTS * 25)
+    evaluator = BatchEvaluator(workers=2, chunk_size=7)
+    try:
+        parallel = list(evaluator.evaluate(items, policy))
+    finally:
+        evaluator.close()
+    assert parallel == list(BatchEvaluator(workers=1).evaluate(items, policy))
+
+
+def test_summary_aggregates_counts_by_pii_type():
+    policy = build_policy(1, banned_phrases=["launch codes"])
+    summary = AuditSummary()
+    for verdict in BatchEvaluator(workers=1).evaluate(_items(TEXTS), policy):
+        summary.add(verdict)
+    result = summary.as_dict()
+
+    assert result["items"] == 4
+    assert result["rejected"] == 1
+    assert result["items_with_pii"] == 2
+    assert result["pii_counts"] == {"email": 1, "phone": 1, "ip": 2}
+    assert result["items_per_second"] > 0
+
+
+def test_input_readers(tmp_path):
+    jsonl = tmp_path / "answers.jsonl"
+    jsonl.write_text(
+        json.dumps({"answer": "a@b.com"}) + "\nnot json\n\n" + json.dumps({"qid": 7, "answer": "ok"}) + "\n",
+        encoding="utf-8",
+    )
+    assert list(iter_jsonl(jsonl, text_field="answer", id_field="qid")) == [
+        {"id": 1, "text": "a@b.com"}, {"id": 7, "text": "ok"},
+    ]
+
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "doc.txt").write_text("First.\n\nSecond.", encoding="utf-8")
+    (corpus / "skip.csv").write_text("x", encoding="utf-8")
+    assert [p["id"] for p in iter_corpus(corpus)] == ["doc.txt#p0", "doc.txt#p1"]
+
+
+@pytest.mark.anyio
+async def test_batch_endpoint():
+    from app.main import BatchEvaluateRequest, evaluate_batch
+
+    body = BatchEvaluateRequest(items=[{"text": TEXTS[1]}, {"id": "x", "text": TEXTS[0]}])
+    response = await evaluate_batch(body)
+
+    assert [r["id"] for r in response["results"]] == ["0", "x"]
+    assert response["summary"]["pii_counts"] == {"email": 1, "phone": 1}
+    assert "redacted_text" not in response["results"][0]
@@ -0,0 +1,114 @@
+"""
+Property tests for the streaming PII redactor: for random texts split at
+random points, the concatenated output must equal whole-text redaction.
+"""
+
+import random
+import time
+
+import pytest
+
+from app.agents.governance_agent import PII_PATTERNS, GovernanceAgent, IncrementalRedactor, redact_with_plan, compile_pii_plan
+
+ALL_TYPES = tuple(name for name, _ in PII_PATTERNS)
+
+FRAGMENTS = [
+    "john.doe@example.com", "a@b.co", "user+tag@domain.co.uk", "x@y",
+    "(555) 123-4567", "555-123-4567", "+1-555-123-4567", "555.123.4567", "555 1234", "12345678901",
+    "192.168.1.1", "999.999.999.999", "10.0.0.1", "1.2.3",
+    "2024-03-15", "15/03/2024", "1/2/24",
+    "id: TOOL-4411", "ID AB12", "ssn 123-45-6789", "passport X1234567", "card:", "identity", "idea",
+    "John Doe", "Jane Miller", "Etch Rate", "A Bc", "Doe",
+    "the", "etch", "rate", "lot", "42", "spec", "ſsn", "٣٤",
+    " ", " ", " ", "  ", "\n", "\n\n", ",", ".", ":", "-", "/", "(", ")", "@", "|", "+", "_",
+]
+
+
+def _random_text(rng, pieces):
+    return "".join(rng.choice(FRAGMENTS) for _ in range(pieces))
+
+
+def _random_split(rng, text):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+    bounds = [0] + cuts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def _stream(redactor, chunks):
+    return "".join(redactor.feed(c) for c in chunks) + redactor.flush()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_splits_match_whole_text_redaction(seed):
+    rng = random.Random(seed)
+    plan = compile_pii_plan(ALL_TYPES)
+    for _ in range(300):
+        text = _random_text(rng, rng.randint(0, 30))
+        expected, expected_spans = redact_with_plan(plan, text)
+        redactor = IncrementalRedactor(ALL_TYPES)
+        assert _stream(redactor, _random_split(rng, text)) == expected, repr(text)
+        assert redactor.spans == expected_spans
+
+
+def test_character_by_character_with_filter_subsets():
+    rng = random.Random(7)
+    for _ in range(100):
+        enabled = tuple(t for t in ALL_TYPES if rng.random() < 0.5)
+        text = _random_text(rng, 20)
+        redactor = IncrementalRedactor(enabled)
+        assert _stream(redactor, list(text)) == redact_with_plan(compile_pii_plan(enabled), text)[0]
+
+
+def test_safe_text_is_emitted_immediately():
+    redactor = GovernanceAgent().incremental_redactor()
+    out = redactor.feed("Mail jane@fab.example, then ")
+    assert out.startswith("Mail [REDACTED_EMAIL],")
+    # "555-123" could still become a phone number
+    assert "555" not in redactor.feed("call 555-123")
+    assert redactor.feed("-4567. Done") + redactor.flush() == " [REDACTED_PHONE]. Done"
+
+
+def test_holdback_stays_bounded_on_long_streams():
+    rng = random.Random(3)
+    words = ["etch", "rate", "the", "lot", "spec", "tool", "drift", "Jane", "Miller", "555", "2024"]
+    redactor = IncrementalRedactor(ALL_TYPES)
+    for _ in range(5000):
+        redactor.feed(rng.choice(words) + rng.choice([" ", ", ", ". "]))
+        # Longest bounded pattern (names, 43 chars) plus the word being typed
+        assert redactor.held_back <= 64
+    redactor.flush()
+    assert redactor.held_back == 0
+
+
+@pytest.mark.parametrize("token", ["a." * 20000 + "@b.co", "ID " + "A1-" * 20000, "1." * 20000])
+def test_agent_redactor_caps_holdback_on_adversarial_tokens(token):
+    redactor = GovernanceAgent(limits={"max_holdback_chars": 256}).incremental_redactor()
+    slowest = 0.0
+    for start in range(0, len(token), 64):
+        began = time.perf_counter()
+        redactor.feed(token[start:start + 64])
+        slowest = max(slowest, time.perf_counter() - began)
+        assert redactor.held_back <= 256
+    redactor.flush()
+    assert redactor.held_back == 0
+    # Per-chunk work does not grow with the length of the token
+    assert slowest < 0.05
+
+
+def test_match_longer_than_the_holdback_cap_leaks_its_tail():
+    # Pins the documented bound: whole-text redaction hides the whole ID,
+    # the capped redactor only the part it had seen when the cap was hit
+    text = "ID " + "A1B2" * 100 + " done"
+    assert redact_with_plan(compile_pii_plan(ALL_TYPES), text)[0] == "[REDACTED_ID] done"
+
+    redactor = IncrementalRedactor(ALL_TYPES, max_holdback=64)
+    out = []
+    for start in range(0, len(text), 16):
+        out.append(redactor.feed(text[start:start + 16]))
+        assert redactor.held_back <= 64
+    out = "".join(out) + redactor.flush()
+
+    assert out.startswith("[REDACTED_ID]") and out.endswith("A1B2 done")
+    head = redactor.spans[0]
+    assert head["type"] == "id" and head["start"] == 0 and head["end"] < len(text) - len(" done")
+    assert out == "[REDACTED_ID]" + text[head["end"]:]
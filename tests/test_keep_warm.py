@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.utils.keep_warm import KeepWarmScheduler, ModelWarmthTracker, _parse_duration, in_windows, model_warmth
+
+
+def test_in_windows():
+    noon = datetime(2026, 1, 1, 12, 0)
+    night = datetime(2026, 1, 1, 23, 30)
+    assert in_windows([], noon)
+    assert in_windows(["08:00-18:00"], noon)
+    assert not in_windows(["08:00-18:00"], night)
+    # Windows may wrap past midnight
+    assert in_windows(["22:00-02:00"], night)
+    assert not in_windows(["22:00-02:00"], noon)
+
+
+def test_tracker_classifies_cold_and_warm_loads():
+    tracker = ModelWarmthTracker()
+    assert tracker.snapshot() == {}
+
+    tracker.record("m", {"load_duration": 4_000_000_000}, keep_alive="10m")
+    tracker.record("m", {"load_duration": 2_000_000})
+    snap = tracker.snapshot()["m"]
+
+    assert snap["state"] == "warm"
+    assert snap["cold_loads"] == 1
+    assert snap["warm_hits"] == 1
+    assert snap["last_load_duration_ms"] == 2.0
+    assert snap["keep_alive_seconds"] == 600
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("1h30m", 5400.0),
+    ("5m0s", 300.0),
+    ("500ms", 0.5),
+    ("300", 300.0),
+    (300, 300.0),
+    ("-1", -1.0),
+    ("-5m", -1.0),
+])
+def test_parse_go_durations(value, seconds):
+    assert _parse_duration(value) == seconds
+
+
+def test_negative_keep_alive_never_goes_cold():
+    tracker = ModelWarmthTracker()
+    tracker.record("m", {"load_duration": 2_000_000}, keep_alive="-1")
+    tracker.models["m"]["last_used"] -= 7 * 86400
+    assert tracker.state("m") == "warm"
+
+
+@pytest.mark.anyio
+async def test_warmth_tracking_never_fails_a_generation(stub_ollama, monkeypatch):
+    def broken_record(*args, **kwargs):
+        raise ValueError("Invalid keep_alive duration")
+
+    monkeypatch.setattr(model_warmth, "record", broken_record)
+    agent = stub_ollama.make(lambda payload: {"answer": "ok", "trace": [], "confidence": 0.9})
+    agent.keep_alive = "1h30m"
+
+    result = await agent.reason("q", [])
+    assert result["answer"] == "ok"
+    assert stub_ollama.transport.calls == 1
+
+
+@pytest.mark.anyio
+async def test_scheduler_preloads_models_in_window(stub_ollama):
+    transport = stub_ollama.route(
+        lambda payload: httpx.Response(200, json={"model": "m", "done": True, "load_duration": 3_000_000_000})
+    )
+
+    tracker = ModelWarmthTracker()
+    scheduler = KeepWarmScheduler(
+        "http://ollama/api/generate",
+        config={
+            "enabled": True,
+            "keep_alive": "5m",
+            "models": {
+                "day-model": {"windows": ["08:00-18:00"], "keep_alive": "1h"},
+                "night-model": {"windows": ["22:00-06:00"]},
+            },
+        },
+        tracker=tracker,
+    )
+    await scheduler.run_once(now=datetime(2026, 1, 1, 9, 0))
+
+    assert transport.payloads == [{"model": "day-model", "keep_alive": "1h", "stream": False}]
+    assert "prompt" not in transport.payloads[0]
+    snap = tracker.snapshot()
+    assert snap["day-model"]["preloads"] == 1
+    assert snap["day-model"]["last_load_duration_ms"] == 3000.0
+    assert "night-model" not in snap
+
+
+def test_scheduler_defaults_to_gateway_model():
+    scheduler = KeepWarmScheduler("http://ollama/api/generate", default_model="qwen", config={"enabled": True})
+    assert list(scheduler.models) == ["qwen"]
+    assert scheduler.model_settings("qwen") == {"keep_alive": "10m", "windows": []}
@@ -0,0 +1,122 @@
+import asyncio
+import re
+
+import pytest
+
+from app.agents.reasoning_agent import DeadlineExceeded, ReasoningAgent, REDUCE_SYSTEM
+
+
+def _passages(n):
+    return [{"id": f"doc#p{i}", "text": f"fact number {i}", "score": 1.0 - i * 0.01} for i in range(n)]
+
+
+class MapReduceOllama:
+    """Map calls cite their first passage by group-local index 0; reduce uses partial 1."""
+
+    def __init__(self):
+        self.map_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.reduce_prompt = None
+        self.reduce_response = {"answer": "combined", "partials": [1], "confidence": 0.8}
+
+    async def __call__(self, payload):
+        if payload["system"] == REDUCE_SYSTEM:
+            self.reduce_prompt = payload["prompt"]
+            return self.reduce_response
+
+        self.map_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        labels = [int(i) for i in re.findall(r"\[PASSAGE (\d+)\]", payload["prompt"])]
+        return {"answer": f"from {labels}", "trace": [{"index": 0, "note": "local"}], "confidence": 0.7}
+
+
+@pytest.fixture
+def transport(stub_ollama, monkeypatch):
+    recorder = MapReduceOllama()
+    stub_ollama.route(recorder)
+    monkeypatch.setattr(
+        "app.agents.reasoning_agent.REASONING_MODE",
+        {"default": "single", "group_size": 3, "max_concurrency": 2},
+    )
+    return recorder
+
+
+@pytest.mark.anyio
+async def test_map_reduce_remaps_trace_to_original_numbering(transport):
+    result = await ReasoningAgent().reason("q", _passages(8), mode="map_reduce")
+
+    assert transport.map_calls == 3
+    assert result["answer"] == "combined"
+    # Partial 1 covers passages 3..5; its local index 0 maps back to passage 3
+    assert result["trace"] == [{"index": 3, "note": "local"}]
+    assert "from [3, 4, 5]" in transport.reduce_prompt
+
+
+@pytest.mark.anyio
+async def test_map_calls_respect_concurrency_cap(transport):
+    await ReasoningAgent().reason("q", _passages(12), mode="map_reduce")
+
+    assert transport.map_calls == 4
+    assert transport.max_in_flight == 2
+
+
+@pytest.mark.anyio
+async def test_small_passage_sets_use_single_prompt(transport):
+    await ReasoningAgent().reason("q", _passages(3), mode="map_reduce")
+
+    assert transport.map_calls == 1
+    assert transport.reduce_prompt is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("partials", [3, None, "1", [True, 1]])
+async def test_malformed_reduce_partials_cite_every_partial(transport, partials):
+    transport.reduce_response = {"answer": "combined", "partials": partials, "confidence": 0.8}
+    result = await ReasoningAgent().reason("q", _passages(8), mode="map_reduce")
+
+    assert result["answer"] == "combined"
+    expected = [1] if partials == [True, 1] else [0, 1, 2]
+    assert result["trace"] == [{"index": 3 * k, "note": "local"} for k in expected]
+
+
+@pytest.mark.anyio
+async def test_non_object_reduce_output_uses_best_partial(transport):
+    transport.reduce_response = ["not", "an", "object"]
+    result = await ReasoningAgent().reason("q", _passages(8), mode="map_reduce")
+
+    assert result["answer"].startswith("from [")
+    assert result["confidence"] == 0.7
+
+
+@pytest.mark.anyio
+async def test_deadline_in_one_map_call_cancels_the_others(transport):
+    agent = ReasoningAgent()
+    cancelled = []
+
+    async def call(prompt, system=None, deadline=None, **kwargs):
+        if "[PASSAGE 0]" in prompt:
+            raise DeadlineExceeded("deadline passed")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+
+    agent._call_ollama = call
+    with pytest.raises(DeadlineExceeded):
+        await asyncio.wait_for(agent.reason("q", _passages(6), mode="map_reduce"), timeout=2)
+    assert len(cancelled) == 1
+
+
+def test_remap_trace_keeps_global_indices():
+    agent = ReasoningAgent()
+    trace = [{"index": 4, "note": "global"}, {"index": 1, "note": "local"}, {"index": 99}, "junk"]
+
+    assert agent._remap_trace(trace, [3, 4, 5]) == [
+        {"index": 4, "note": "global"},
+        {"index": 4, "note": "local"},
+    ]
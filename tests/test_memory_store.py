@@ -0,0 +1,78 @@
+"""
+Unit tests for bounded session memory.
+"""
+
+import time
+
+import pytest
+
+from app.utils.memory import SUMMARY_QUERY, MemoryStore, SessionStore
+
+
+def _fill(store, session_id, n, answer="a"):
+    for i in range(n):
+        store.add(session_id, f"q{i}", answer, [])
+
+
+def test_turns_are_a_ring_buffer():
+    store = MemoryStore(max_turns=3)
+    _fill(store, "s", 5)
+    assert [t["query"] for t in store.get("s")] == ["q2", "q3", "q4"]
+
+
+def test_compaction_folds_dropped_turns_into_summary():
+    store = MemoryStore(max_turns=2, compaction=True)
+    _fill(store, "s", 4, answer="the answer")
+
+    turns = store.get("s")
+    assert turns[0]["query"] == SUMMARY_QUERY
+    assert "Q: q0 -> the answer" in turns[0]["answer"]
+    assert "Q: q1" in turns[0]["answer"]
+    assert [t["query"] for t in turns[1:]] == ["q2", "q3"]
+
+
+def test_idle_sessions_expire():
+    store = MemoryStore(idle_ttl_seconds=60)
+    _fill(store, "old", 1)
+    store._sessions["old"].last_access = time.time() - 120
+    _fill(store, "new", 1)
+
+    assert store.get("old") == []
+    assert store.stats()["expired_sessions"] == 1
+
+
+def test_lru_sessions_evicted_over_byte_budget():
+    store = MemoryStore(max_bytes=600)
+    _fill(store, "a", 1, answer="x" * 200)
+    _fill(store, "b", 1, answer="x" * 200)
+    store.get("a")  # a is now most recently used
+    _fill(store, "c", 1, answer="x" * 200)
+
+    assert store.get("b") == []
+    assert store.get("a") and store.get("c")
+    assert store.stats()["bytes"] <= 600
+
+
+def test_page_and_context():
+    store = MemoryStore()
+    _fill(store, "s", 5)
+    page = store.page("s", offset=1, limit=2)
+    assert [t["query"] for t in page["turns"]] == ["q1", "q2"]
+    assert page["total"] == 5
+
+    store.set_context("s", [1, 2, 3])
+    assert store.get_context("s") == [1, 2, 3]
+    store.clear("s")
+    assert store.get_context("s") is None
+    assert store.stats()["bytes"] == 0
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class NoContext(SessionStore):
+        def add(self, session_id, query, answer, trace): ...
+        def get(self, session_id): return []
+        def page(self, session_id, offset=0, limit=None): return {}
+        def clear(self, session_id): ...
+
+    with pytest.raises(TypeError, match="get_context"):
+        NoContext()
@@ -0,0 +1,102 @@
+import json
+
+import httpx
+import pytest
+
+from app.agents import reasoning_agent
+from app.agents.reasoning_agent import model_breaker
+from app.utils.metrics import metrics
+
+
+def _per_model(responses):
+    """Answers with a canned response per model; None means the model is missing."""
+
+    def handler(payload):
+        model = payload["model"]
+        if responses[model] is None:
+            return httpx.Response(404, json={"error": f"model '{model}' not found"})
+        return responses[model]
+
+    return handler
+
+
+def _answer(text, confidence):
+    return json.dumps({"answer": text, "trace": [], "confidence": confidence})
+
+
+@pytest.fixture
+def cascade_agent(stub_ollama):
+    metrics.reset()
+
+    def make(responses, **cascade):
+        agent = stub_ollama.make(_per_model(responses), model="large")
+        agent.cascade = {"enabled": True, "small_model": "small", "confidence_threshold": 0.6, **cascade}
+        agent.small_model = "small"
+        return agent, stub_ollama.transport
+
+    yield make
+    metrics.reset()
+
+
+@pytest.mark.anyio
+async def test_confident_small_answer_is_kept(cascade_agent):
+    agent, transport = cascade_agent({"small": _answer("small says", 0.9), "large": _answer("large says", 0.9)})
+    result = await agent.reason("q", [])
+
+    assert result["answer"] == "small says"
+    assert result["model"] == "small"
+    assert transport.models == ["small"]
+    assert metrics.counters["cascade_answered_small"] == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("small_response, reason", [
+    (_answer("unsure", 0.2), "low_confidence"),
+    ("not json at all", "malformed"),
+])
+async def test_escalates_on_low_confidence_or_malformed(cascade_agent, small_response, reason):
+    agent, transport = cascade_agent({"small": small_response, "large": _answer("large says", 0.9)})
+    result = await agent.reason("q", [])
+
+    assert result["answer"] == "large says"
+    assert result["model"] == "large"
+    assert transport.models == ["small", "large"]
+    assert metrics.counters[f"cascade_escalations_{reason}"] == 1
+
+
+@pytest.mark.anyio
+async def test_escalates_when_governance_rejects(cascade_agent):
+    agent, transport = cascade_agent({"small": _answer("classified", 0.9), "large": _answer("fine", 0.9)})
+    result = await agent.reason("q", [], accept=lambda r: "classified" not in r["answer"])
+
+    assert result["answer"] == "fine"
+    assert metrics.counters["cascade_escalations_governance"] == 1
+
+
+@pytest.mark.anyio
+async def test_latency_metrics_recorded(cascade_agent):
+    agent, _ = cascade_agent({"small": _answer("unsure", 0.1), "large": _answer("large", 0.9)})
+    await agent.reason("q", [])
+    agent.cascade["confidence_threshold"] = 0.0
+    await agent.reason("q", [])
+
+    snapshot = metrics.snapshot()
+    assert snapshot["histograms"]["cascade_latency_small"]["count"] == 2
+    assert snapshot["histograms"]["cascade_latency_large"]["count"] == 1
+    assert snapshot["histograms"]["cascade_latency_saved"]["count"] == 2
+    assert metrics.counters["cascade_escalations"] == 1
+
+
+@pytest.mark.anyio
+async def test_failing_small_model_does_not_open_large_model_circuit(cascade_agent, monkeypatch):
+    monkeypatch.setattr(reasoning_agent, "OLLAMA_BACKOFF_BASE", 0)
+    agent, transport = cascade_agent({"small": None, "large": _answer("large says", 0.9)})
+
+    for _ in range(8):
+        result = await agent.reason("q", [])
+        assert result["answer"] == "large says"
+
+    assert model_breaker("small").state == "open"
+    assert agent.breaker.state == "closed"
+    # Once the small tier's circuit is open it is skipped without a request
+    assert transport.models[-2:] == ["large", "large"]
@@ -0,0 +1,131 @@
+"""
+Load balancing tests against local stub Ollama servers.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.agents.reasoning_agent import ReasoningAgent
+from app.utils.ollama_pool import NoBackendAvailable, OllamaPool
+
+
+class StubOllama:
+    """Minimal streaming /api/generate server with configurable delay and failures."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, answer: str = "ok"):
+        self.delay = delay
+        self.fail = fail
+        self.answer = answer
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                time.sleep(stub.delay)
+                if stub.fail:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                body = json.dumps({"answer": stub.answer, "trace": [], "confidence": 0.9})
+                lines = [
+                    json.dumps({"response": body, "done": False}),
+                    json.dumps({"response": "", "done": True, "load_duration": 1000}),
+                ]
+                payload = ("\n".join(lines) + "\n").encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/generate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(**kwargs):
+        stub = StubOllama(**kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def test_select_prefers_least_outstanding_by_weight():
+    pool = OllamaPool([{"url": "a", "weight": 1}, {"url": "b", "weight": 3}])
+    a, b = pool.backends
+    a.outstanding, b.outstanding = 1, 2
+    # a: (1+1)/1 = 2, b: (2+1)/3 = 1
+    assert pool.select("m") is b
+
+
+def test_select_respects_model_tags():
+    pool = OllamaPool([{"url": "small", "models": ["tiny"]}, {"url": "big", "models": ["large"]}])
+    assert pool.select("large").url == "big"
+    with pytest.raises(NoBackendAvailable):
+        pool.select("unknown")
+
+
+@pytest.mark.anyio
+async def test_requests_spread_over_backends(stubs):
+    one, two = stubs(delay=0.1), stubs(delay=0.1)
+    agent = ReasoningAgent(pool=OllamaPool([one.url, two.url]))
+
+    results = await asyncio.gather(*[agent.reason("q", []) for _ in range(6)])
+
+    assert all(r["answer"] == "ok" for r in results)
+    assert one.requests == 3
+    assert two.requests == 3
+
+
+@pytest.mark.anyio
+async def test_failing_backend_is_ejected(stubs):
+    bad, good = stubs(fail=True), stubs(answer="good")
+    pool = OllamaPool([bad.url, good.url], eject_after=1, eject_seconds=60)
+    agent = ReasoningAgent(pool=pool)
+
+    for _ in range(5):
+        result = await agent.reason("q", [])
+        assert result["answer"] == "good"
+
+    stats = {s["url"]: s for s in pool.stats()}
+    assert bad.requests <= 1
+    assert stats[bad.url]["ejected"] is True
+    assert stats[good.url]["errors"] == 0
+    assert stats[good.url]["requests"] == 5
+
+
+@pytest.mark.anyio
+async def test_hedged_request_wins_over_slow_backend(stubs):
+    slow, fast = stubs(delay=1.0, answer="slow"), stubs(answer="fast")
+    pool = OllamaPool([slow.url, fast.url], hedge_percentile=95, hedge_min_samples=1)
+    pool.backends[0].latencies.append(0.05)
+    # Force the slow backend to be chosen first
+    pool.backends[1].outstanding = 10
+
+    start = time.time()
+    result = await ReasoningAgent(pool=pool).reason("q", [])
+
+    assert result["answer"] == "fast"
+    assert time.time() - start < 0.9
+    assert slow.requests == 1 and fast.requests == 1
@@ -0,0 +1,148 @@
+"""
+Tests for index-time PII redaction of retrieved passages.
+"""
+
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+from app.agents import retriever_agent
+from app.agents.governance_agent import build_policy, governance_policy
+from app.agents.retriever_agent import RetrieverAgent
+from app.config import Config
+from app.utils.passage_redaction import is_current, redact_passage, served_text
+from app.utils.result_cache import retrieval_cache
+
+PASSAGE = {"id": "doc#p0", "text": "Ask jane@fab.example or call 555-123-4567.", "source": "doc"}
+
+
+def _policy(monkeypatch, version=1, **filters):
+    merged = {"email": True, "phone": True, "ip": True, "date": True, "id": True, "name": True}
+    merged.update(filters)
+    monkeypatch.setattr(Config, "PII_FILTERS", merged, raising=False)
+    return build_policy(version)
+
+
+def test_redact_passage_keeps_original_and_offsets(monkeypatch):
+    policy = _policy(monkeypatch)
+    entry = redact_passage(PASSAGE, policy)
+
+    assert entry["text"] == PASSAGE["text"]
+    assert entry["redacted_text"] == "Ask [REDACTED_EMAIL] or call [REDACTED_PHONE]."
+    assert [(s["type"], PASSAGE["text"][s["start"]:s["end"]]) for s in entry["pii_spans"]] == [
+        ("email", "jane@fab.example"), ("phone", "555-123-4567"),
+    ]
+    assert is_current(entry, policy)
+
+
+def test_stale_entries_are_redacted_with_current_filters(monkeypatch):
+    entry = redact_passage(PASSAGE, _policy(monkeypatch))
+    changed = _policy(monkeypatch, version=2, email=False)
+
+    assert not is_current(entry, changed)
+    assert served_text(entry, changed) == "Ask jane@fab.example or call [REDACTED_PHONE]."
+
+
+class _FakeModel:
+    def encode(self, texts, **kwargs):
+        return np.stack([np.eye(4, dtype=np.float32)[i % 4] for i in range(len(texts))])
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    monkeypatch.setattr(retriever_agent, "INDEX_PATH", tmp_path / "index.faiss")
+    monkeypatch.setattr(retriever_agent, "META_PATH", tmp_path / "index_meta.pkl")
+    monkeypatch.setattr(retriever_agent, "INDEX_REDACTION", {"enabled": True, "background": False})
+    monkeypatch.setattr(governance_policy, "current", _policy(monkeypatch))
+    return _agent([PASSAGE, {"id": "doc#p1", "text": "Etch at 10.0.0.1", "source": "doc"}])
+
+
+def _agent(passages):
+    agent = RetrieverAgent.__new__(RetrieverAgent)
+    agent.model = _FakeModel()
+    agent.index = None
+    agent.meta = []
+    agent._redaction_lock = threading.Lock()
+    agent._redaction_pending = None
+    agent._index_version = None
+    agent.build_index_from_texts(passages)
+    return agent
+
+
+def test_index_is_redacted_at_build_time(retriever):
+    saved = pickle.loads(retriever_agent.META_PATH.read_bytes())
+    assert saved[0]["redacted_text"] == "Ask [REDACTED_EMAIL] or call [REDACTED_PHONE]."
+
+    results = retriever.retrieve("anything", top_k=2, query_embedding=np.eye(4, dtype=np.float32)[:1])
+    assert results[0]["text"] == "Ask [REDACTED_EMAIL] or call [REDACTED_PHONE]."
+    assert results[1]["text"] == "Etch at [REDACTED_IP]"
+
+
+def test_filter_change_re_redacts_index(retriever, monkeypatch):
+    monkeypatch.setattr(governance_policy, "current", _policy(monkeypatch, version=2, ip=False))
+
+    results = retriever.retrieve("anything", top_k=2, query_embedding=np.eye(4, dtype=np.float32)[1:2])
+    assert results[0]["text"] == "Etch at 10.0.0.1"
+
+    # The stale hit scheduled a full pass; the index now matches the new filters
+    assert all(is_current(m, governance_policy.current) for m in retriever.meta)
+    saved = pickle.loads(retriever_agent.META_PATH.read_bytes())
+    assert saved[1]["redacted_text"] == "Etch at 10.0.0.1"
+
+
+def test_policy_reload_re_redacts_without_a_query(retriever, monkeypatch):
+    monkeypatch.setattr(governance_policy, "_version", governance_policy._version)
+    monkeypatch.setattr(Config, "load_config", classmethod(lambda cls, path=None: None))
+    monkeypatch.setattr(Config, "_reload_listeners", [governance_policy.reload, retriever.on_config_reload])
+    monkeypatch.setattr(Config, "PII_FILTERS", {"email": True, "phone": True, "ip": False}, raising=False)
+
+    Config.reload()
+
+    assert all(is_current(m, governance_policy.current) for m in retriever.meta)
+    assert retriever.meta[1]["redacted_text"] == "Etch at 10.0.0.1"
+
+
+def test_redaction_never_overwrites_an_index_rebuilt_elsewhere(retriever, monkeypatch):
+    # Another worker rebuilds the index (e.g. after an upload) with other passages
+    other = _agent([{"id": f"new#p{i}", "text": f"Passage {i}", "source": "new"} for i in range(3)])
+    policy = _policy(monkeypatch, version=2, ip=False)
+    monkeypatch.setattr(governance_policy, "current", policy)
+
+    retriever._redact_index(policy)
+
+    saved = pickle.loads(retriever_agent.META_PATH.read_bytes())
+    assert [m["id"] for m in saved] == [m["id"] for m in other.meta]
+    # The stale instance picked up the rebuilt index and meta instead
+    assert [m["id"] for m in retriever.meta] == [m["id"] for m in other.meta]
+    assert retriever.index.ntotal == 3
+
+
+def test_only_the_gateways_retriever_follows_reloads(retriever, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "_retriever", None)
+    monkeypatch.setattr(main, "RetrieverAgent", lambda: retriever)
+    monkeypatch.setattr(Config, "_reload_listeners", [])
+
+    assert main.get_retriever() is main.get_retriever() is retriever
+    assert Config._reload_listeners == [retriever.on_config_reload]
+
+
+def test_health_ping_bypasses_retrieval_cache(retriever, monkeypatch):
+    monkeypatch.setattr(retrieval_cache, "enabled", True)
+    retrieval_cache.clear()
+    encoded = []
+    encode = retriever.model.encode
+    monkeypatch.setattr(retriever.model, "encode", lambda texts, **kw: encoded.append(texts) or encode(texts))
+
+    retriever.retrieve("ping", top_k=1)
+    retriever.retrieve("ping", top_k=1)
+    assert len(encoded) == 1
+
+    # Probes always encode and search, even with cached results for the same query
+    assert retriever.ping()
+    assert retriever.ping()
+    assert len(encoded) == 3
+    retrieval_cache.clear()
@@ -0,0 +1,69 @@
+"""
+Unit tests for the Aho-Corasick banned-phrase matcher.
+"""
+
+import random
+import string
+
+import pytest
+
+from app.agents.governance_agent import GovernanceAgent
+from app.utils import phrase_matcher
+from app.utils.phrase_matcher import AhoCorasick, PhraseMatcher, stem
+
+
+@pytest.fixture(params=["scan", "automaton"])
+def mode(request, monkeypatch):
+    """Run a test with both the per-phrase scan and the automaton."""
+    if request.param == "automaton":
+        monkeypatch.setattr(phrase_matcher, "AUTOMATON_MIN_PHRASES", 0)
+    return request.param
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    matches = sorted(automaton.iter_matches("ushers"))
+    assert matches == [(4, 0), (4, 1), (6, 3)]
+
+
+def test_substring_mode_matches_naive_scan(mode):
+    rng = random.Random(0)
+    phrases = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(50)]
+    matcher = PhraseMatcher(phrases)
+    for _ in range(200):
+        text = "".join(rng.choice("abcABC ") for _ in range(30))
+        expected = [p for p in phrases if p.lower() in text.lower()]
+        assert matcher.find(text) == expected
+
+
+def test_case_insensitive_in_list_order(mode):
+    matcher = PhraseMatcher(["Confidential", "classified"])
+    assert matcher.find("CLASSIFIED and confidential") == ["Confidential", "classified"]
+
+
+def test_word_boundary_mode(mode):
+    matcher = PhraseMatcher(["class", "top secret"], word_boundary=True)
+    assert matcher.find("classified material") == []
+    assert matcher.find("a class, and TOP SECRET.") == ["class", "top secret"]
+
+
+def test_stemming_mode():
+    assert stem("diagnoses") == stem("diagnose")
+    matcher = PhraseMatcher(["prescription", "diagnose patient"], stemming=True)
+    assert matcher.find("Prescriptions were written") == ["prescription"]
+    assert matcher.find("They diagnosed patients quickly") == ["diagnose patient"]
+
+
+def test_governance_matcher_built_once_per_policy():
+    agent = GovernanceAgent(banned_phrases=["secret"])
+    assert agent._check_banned_phrases("top SECRET") == ["secret"]
+    matcher = agent.policy.banned_matcher
+    agent._check_banned_phrases("nothing here")
+    assert agent.policy.banned_matcher is matcher
+
+
+def test_large_phrase_list():
+    rng = random.Random(1)
+    phrases = ["".join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(5000)]
+    matcher = PhraseMatcher(phrases)
+    assert matcher.find(f"prefix {phrases[1234]} suffix") == [phrases[1234]]
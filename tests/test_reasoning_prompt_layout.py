@@ -0,0 +1,59 @@
+import pytest
+
+from app.agents.reasoning_agent import ReasoningAgent
+
+
+PASSAGES = [{"id": "doc#p0", "text": "Hand washing prevents infections.", "score": 0.9}]
+
+
+@pytest.fixture
+def transport(stub_ollama):
+    return stub_ollama.route(lambda payload: stub_ollama.stream(
+        '{"answer": "ok", "trace": [], "confidence": 0.9}', context=[1, 2, 3], prompt_eval_count=12
+    ))
+
+
+def test_system_prompt_is_stable_across_queries():
+    agent = ReasoningAgent()
+    first = agent._build_prompt("What is hand washing?", PASSAGES)
+    second = agent._build_prompt("Something else entirely", PASSAGES, [{"query": "q", "answer": "a"}])
+
+    assert first["system"] == second["system"]
+    assert "What is hand washing?" not in first["system"]
+    assert first["prompt"].rstrip().endswith("Query: What is hand washing?")
+
+
+@pytest.mark.anyio
+async def test_system_prompt_sent_separately(transport):
+    agent = ReasoningAgent()
+    result = await agent.reason("q", PASSAGES)
+
+    payload = transport.payloads[0]
+    assert payload["system"].startswith("You are a helpful assistant")
+    assert "User Instructions" not in payload["prompt"]
+    assert "context" not in payload
+    assert result["answer"] == "ok"
+
+
+@pytest.mark.anyio
+async def test_context_replaces_history(transport, monkeypatch):
+    monkeypatch.setattr("app.agents.reasoning_agent.CONTINUE_OLLAMA_CONTEXT", True)
+    agent = ReasoningAgent()
+    history = [{"query": "earlier question", "answer": "earlier answer"}]
+    result = await agent.reason("q", PASSAGES, history=history, context=[7, 8, 9])
+
+    payload = transport.payloads[0]
+    assert payload["context"] == [7, 8, 9]
+    assert "earlier question" not in payload["prompt"]
+    assert result["context"] == [1, 2, 3]
+
+
+@pytest.mark.anyio
+async def test_oversized_context_falls_back_to_history(transport):
+    agent = ReasoningAgent()
+    history = [{"query": "earlier question", "answer": "earlier answer"}]
+    await agent.reason("q", PASSAGES, history=history, context=list(range(agent.budget.prompt_budget)))
+
+    payload = transport.payloads[0]
+    assert "context" not in payload
+    assert "earlier question" in payload["prompt"]
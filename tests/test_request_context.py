@@ -0,0 +1,235 @@
+"""
+Tests for the request context shared by the pipeline stages.
+"""
+
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+import faiss
+import numpy as np
+import pytest
+
+from app import main
+from app.agents import governance_agent
+from app.agents.governance_agent import GovernanceAgent, build_policy, governance_policy
+from app.agents.reasoning_agent import ReasoningAgent
+from app.agents.retriever_agent import RetrieverAgent
+from app.config import Config
+from app.utils.metrics import metrics
+from app.utils.request_context import RequestContext
+
+PASSAGES = [
+    "Plasma etch removes material from the wafer. The etch rate depends on power.",
+    "Lithography patterns the wafer. Resist is exposed and developed.",
+    "Deposition adds thin films to the wafer surface.",
+]
+
+
+class FakeModel:
+    """Bag-of-words encoder that records every text it encodes."""
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        self.texts.extend(texts)
+        rows = []
+        for text in texts:
+            v = np.zeros(64, dtype=np.float32)
+            for word in text.lower().replace("?", "").replace(".", "").split():
+                v[zlib.crc32(word.encode()) % 64] += 1.0
+            rows.append(v)
+        return np.stack(rows)
+
+
+def _retriever(model):
+    agent = RetrieverAgent.__new__(RetrieverAgent)
+    agent.model = model
+    vectors = agent.embed_texts(PASSAGES).astype(np.float32)
+    agent.index = faiss.IndexFlatIP(vectors.shape[1])
+    agent.index.add(vectors)
+    agent.meta = [{"id": i, "text": text, "source": "doc"} for i, text in enumerate(PASSAGES)]
+    model.texts.clear()
+    return agent
+
+
+def test_context_memoizes_embedding_normalized_query_and_tokens():
+    model = FakeModel()
+    ctx = RequestContext("  How does Plasma ETCH work? ", embed=_retriever(model).embed_texts)
+
+    assert ctx.normalized_query == "how does plasma etch work?"
+    first = ctx.query_embedding()
+    assert ctx.query_embedding() is first
+    assert ctx.query_encodes == 1
+
+    assert ctx.count_tokens("some prompt text") == ctx.count_tokens("some prompt text")
+    assert ctx.query_tokens > 0
+    assert ctx.stats()["token_count_hits"] == 1
+
+
+def test_context_without_encoder_never_encodes():
+    ctx = RequestContext("q")
+    assert ctx.query_embedding() is None
+    assert ctx.query_encodes == 0
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    model = FakeModel()
+    reasoner = ReasoningAgent()
+
+    async def fake_ollama(prompt, system=None, context=None, deadline=None, model=None):
+        answer = {"answer": "Plasma etch removes wafer material.", "trace": [{"index": 0, "reason": "r"}], "confidence": 0.9}
+        return {"response": json.dumps(answer)}
+
+    monkeypatch.setattr(reasoner, "_call_ollama", fake_ollama)
+    monkeypatch.setattr(main, "_retriever", _retriever(model))
+    monkeypatch.setattr(main, "_reasoner", reasoner)
+    monkeypatch.setattr(main, "_governor", GovernanceAgent())
+    monkeypatch.setattr(main, "_compressor", None)
+    for name in ("SEMANTIC_CACHE", "CONTEXT_COMPRESSION", "HISTORY_RECALL"):
+        monkeypatch.setitem(getattr(main, name), "enabled", True)
+    monkeypatch.setitem(main.AUDIT_LOG, "enabled", False)
+    monkeypatch.setattr(governance_agent, "_topic_matchers", OrderedDict())
+    monkeypatch.setattr(
+        Config, "BANNED_TOPICS",
+        {"enabled": True, "similarity_threshold": 0.9, "topics": {"weather": ["will it rain"]}},
+        raising=False,
+    )
+    monkeypatch.setattr(governance_policy, "current", build_policy(governance_policy.current.version + 1000))
+    metrics.reset()
+    return model
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+async def _ask(query, session_id):
+    return await main.query(main.QueryRequest(query=query), _Request(), session_id=session_id, x_request_deadline=None)
+
+
+@pytest.mark.anyio
+async def test_one_query_encode_per_request(pipeline):
+    queries = ["How does plasma etch work?", "What does lithography do to the wafer?", "How does plasma etch work?"]
+    for query in queries:
+        before = pipeline.texts.count(query)
+        response = await _ask(query, "request-context-session")
+        assert response["answer"]
+        # Cache lookup, retrieval, compression, history recall and governance share one encode
+        assert pipeline.texts.count(query) - before == 1
+
+    assert metrics.snapshot()["counters"]["query_encodes"] == len(queries)
+    assert "redundant_query_encodes" not in metrics.snapshot()["counters"]
+
+
+@pytest.mark.anyio
+async def test_semantic_cache_serves_only_first_turns_and_audits_hits(pipeline, monkeypatch):
+    records = []
+    monkeypatch.setattr(main.semantic_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(main.semantic_cache, "_matrix", None)
+    monkeypatch.setitem(main.AUDIT_LOG, "enabled", True)
+    monkeypatch.setattr(main.audit_log, "record", records.append)
+    query = "How is the wafer etched?"
+
+    assert "cached" not in await _ask(query, "cache-session-a")
+    hit = await _ask(query, "cache-session-b")
+    assert hit["cached"] is True
+    assert records[-1]["cached"] is True and records[-1]["session_id"] == "cache-session-b"
+
+    # A follow-up carries the session's history, so it is neither served nor stored
+    assert "cached" not in await _ask(query, "cache-session-a")
+    assert main.semantic_cache.stats()["entries"] == 1
+
+
+@pytest.mark.anyio
+async def test_banned_paraphrase_is_not_served_from_a_warm_cache(pipeline, monkeypatch):
+    monkeypatch.setattr(main.semantic_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(main.semantic_cache, "_matrix", None)
+    monkeypatch.setattr(main.semantic_cache, "threshold", 0.8)
+    allowed = "How does plasma etch remove material from the wafer surface?"
+    banned = "How does classified plasma etch remove material from the wafer surface?"
+    vectors = main._retriever.embed_texts([allowed, banned])
+    assert float(vectors[0] @ vectors[1]) > 0.8  # close enough to hit the cache
+
+    assert "cached" not in await _ask(allowed, "banned-cache-a")
+    response = await _ask(banned, "banned-cache-b")
+    assert "cached" not in response
+    assert response["governance"]["approved"] is False
+    assert "banned_phrases_in_query" in response["governance"]["reason"]
+    assert metrics.snapshot()["counters"]["semantic_cache_hits_rejected"] == 1
+
+
+@pytest.mark.anyio
+async def test_unchanged_ollama_context_is_not_written(pipeline, monkeypatch):
+    writes = []
+    monkeypatch.setattr(main.memory_store, "set_context", lambda *args: writes.append(args))
+    await _ask("How does plasma etch work?", "context-session")
+    await _ask("What does lithography do to the wafer?", "context-session")
+    assert writes == []
+
+
+@pytest.mark.anyio
+async def test_recall_encodes_go_through_the_context(pipeline, monkeypatch):
+    session_id = "recall-session"
+    stored = [f"What does step {i} do to the wafer?" for i in range(6)]
+    for question in stored:
+        main.memory_store.add(session_id, question, "It changes the wafer.", [])
+    calls = []
+    original = RequestContext.embed_texts
+
+    def tracked(self, texts):
+        calls.append(list(texts))
+        return original(self, texts)
+
+    monkeypatch.setattr(RequestContext, "embed_texts", tracked)
+    await _ask("How does plasma etch work?", session_id)
+    # The stored turns had no embeddings, so recall embedded the older ones through the context
+    assert stored[: -main.turn_recall.recent] in calls
+    assert metrics.snapshot()["counters"]["request_encode_calls"] == len(calls)
+    main.memory_store.clear(session_id)
+
+
+@pytest.mark.anyio
+async def test_context_is_recorded_when_the_request_fails(pipeline, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(main._retriever, "retrieve", broken)
+    monkeypatch.setattr(main.semantic_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(main.semantic_cache, "_matrix", None)
+    with pytest.raises(main.HTTPException):
+        await _ask("How does plasma etch work?", "failing-session")
+    # The semantic cache lookup encoded the query before retrieval failed
+    assert metrics.snapshot()["counters"]["query_encodes"] == 1
+
+
+@pytest.mark.anyio
+async def test_session_store_is_used_off_the_event_loop(pipeline, monkeypatch):
+    loop_thread = threading.get_ident()
+    calls = []
+
+    def tracked(name):
+        original = getattr(main.memory_store, name)
+
+        def call(*args, **kwargs):
+            calls.append((name, threading.get_ident() != loop_thread))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(main.memory_store, name, call)
+
+    for name in ("get", "get_context", "add", "set_context"):
+        tracked(name)
+    monkeypatch.setattr(main.semantic_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(main.semantic_cache, "_matrix", None)
+
+    await _ask("How does plasma etch work?", "threaded-session")
+    await _ask("What does lithography do to the wafer?", "threaded-session")
+
+    # History and context are read once per request, and nothing runs on the loop
+    assert [name for name, _ in calls] == ["get", "get_context", "add"] * 2
+    assert all(off_loop for _, off_loop in calls)
+    main.memory_store.clear("threaded-session")
@@ -0,0 +1,97 @@
+"""
+Tests for the exact retrieval and generation caches.
+"""
+
+import pytest
+
+from app.agents.reasoning_agent import ReasoningAgent
+from app.config import Config
+from app.utils.result_cache import ResultCache, generation_cache, make_key, normalize_query
+
+
+def test_key_and_query_normalization():
+    assert normalize_query("  What IS   etch?") == "what is etch?"
+    assert make_key("a", 1) == make_key("a", 1)
+    assert make_key("a", 1) != make_key("a", 2)
+
+
+def test_values_are_copied():
+    cache = ResultCache("t")
+    value = [{"text": "a"}]
+    cache.set("k", value)
+    value[0]["text"] = "changed"
+    got = cache.get("k")
+    got[0]["text"] = "mutated"
+    assert cache.get("k") == [{"text": "a"}]
+
+
+def test_ttl_and_lru_bounds():
+    expired = ResultCache("t", ttl_seconds=0)
+    expired.set("k", 1)
+    assert expired.get("k") is None
+
+    cache = ResultCache("t", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    small = ResultCache("t", max_bytes=50)
+    for i in range(10):
+        small.set(str(i), "x" * 20)
+    assert small.stats()["bytes"] <= 50
+    assert small.stats()["entries"] == 2
+
+
+def test_cleared_on_config_reload():
+    cache = ResultCache("t")
+    cache.set("k", 1)
+    Config.reload()
+    assert cache.get("k") is None
+
+
+@pytest.fixture
+def counting_ollama(stub_ollama, monkeypatch):
+    transport = stub_ollama.route(lambda payload: {"answer": "cached", "trace": [], "confidence": 0.9})
+    monkeypatch.setattr(generation_cache, "enabled", True)
+    generation_cache.clear()
+    yield transport
+    generation_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_identical_prompt_served_from_generation_cache(counting_ollama):
+    agent = ReasoningAgent()
+    passages = [{"text": "etch", "score": 0.9}]
+
+    first = await agent.reason("q", passages)
+    second = await agent.reason("q", passages)
+    await agent.reason("other question", passages)
+
+    assert first["answer"] == second["answer"] == "cached"
+    assert counting_ollama.calls == 2
+
+
+@pytest.mark.anyio
+async def test_malformed_output_not_cached(counting_ollama):
+    counting_ollama.handler = lambda payload: "not json"
+    agent = ReasoningAgent()
+
+    await agent.reason("q", [])
+    await agent.reason("q", [])
+    assert counting_ollama.calls == 2
+
+
+@pytest.mark.anyio
+async def test_health_ping_bypasses_generation_cache(counting_ollama):
+    agent = ReasoningAgent()
+    await agent.reason("ping", [])
+    await agent.reason("ping", [])
+    assert counting_ollama.calls == 1
+
+    # Probes always reach Ollama, even with a cached answer for the same prompt
+    assert await agent.ping()
+    assert await agent.ping()
+    assert counting_ollama.calls == 3
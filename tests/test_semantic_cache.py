@@ -0,0 +1,74 @@
+"""
+Unit tests for the similarity-keyed answer cache.
+"""
+
+import numpy as np
+
+from app.config import Config
+from app.utils.semantic_cache import SemanticCache
+
+
+def _vec(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _response(answer):
+    return {"answer": answer, "trace": [], "governance": {"approved": True, "reason": "approved"}}
+
+
+def test_similar_query_hits_and_dissimilar_misses():
+    cache = SemanticCache(threshold=0.9)
+    cache.store(_vec(1, 0, 0), _response("cached"), "v1", "pii")
+
+    hit = cache.lookup(_vec(1, 0.1, 0), "v1", "pii")
+    assert hit["response"]["answer"] == "cached"
+    assert hit["similarity"] > 0.9
+    assert cache.lookup(_vec(0, 1, 0), "v1", "pii") is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_index_version_and_policy_must_match():
+    cache = SemanticCache(threshold=0.9)
+    cache.store(_vec(1, 0), _response("old"), "v1", "pii-a")
+
+    assert cache.lookup(_vec(1, 0), "v2", "pii-a") is None
+    assert cache.lookup(_vec(1, 0), "v1", "pii-b") is None
+
+
+def test_ttl_expiry():
+    cache = SemanticCache(threshold=0.9, ttl_seconds=0)
+    cache.store(_vec(1, 0), _response("stale"), "v1", "pii")
+    assert cache.lookup(_vec(1, 0), "v1", "pii") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_by_count_and_memory():
+    cache = SemanticCache(threshold=0.9, max_entries=2)
+    cache.store(_vec(1, 0, 0), _response("a"), "v", "p")
+    cache.store(_vec(0, 1, 0), _response("b"), "v", "p")
+    cache.lookup(_vec(1, 0, 0), "v", "p")  # a becomes most recently used
+    cache.store(_vec(0, 0, 1), _response("c"), "v", "p")
+
+    assert cache.lookup(_vec(0, 1, 0), "v", "p") is None
+    assert cache.lookup(_vec(1, 0, 0), "v", "p") is not None
+
+    small = SemanticCache(threshold=0.9, max_bytes=400)
+    for i in range(10):
+        small.store(_vec(1, i), _response("x" * 50), "v", "p")
+    assert small.stats()["bytes"] <= 400
+
+
+def test_session_opt_out():
+    cache = SemanticCache()
+    cache.opt_out("s1")
+    assert not cache.enabled_for("s1")
+    cache.opt_in("s1")
+    assert cache.enabled_for("s1")
+
+
+def test_cleared_on_config_reload():
+    cache = SemanticCache(threshold=0.9)
+    cache.store(_vec(1, 0), _response("old policy"), "v1", "p")
+    Config.reload()
+    assert cache.lookup(_vec(1, 0), "v1", "p") is None
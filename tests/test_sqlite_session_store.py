@@ -0,0 +1,125 @@
+"""
+Tests for the SQLite (WAL) session store.
+"""
+
+import sqlite3
+
+import pytest
+
+from app.utils.sqlite_session_store import SQLiteSessionStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+@pytest.fixture
+def open_store(db_path):
+    stores = []
+
+    def make(**kwargs):
+        store = SQLiteSessionStore(db_path, **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_turns_and_context_survive_restart(open_store):
+    store = open_store()
+    store.add("s", "q1", "a1", [{"index": 0}])
+    store.add("s", "q2", "a2", [])
+    store.set_context("s", [1, 2, 3])
+    store.close()
+
+    reopened = open_store()
+    assert [t["query"] for t in reopened.get("s")] == ["q1", "q2"]
+    assert reopened.get("s")[0]["trace"] == [{"index": 0}]
+    assert reopened.get_context("s") == [1, 2, 3]
+
+
+def test_writes_from_another_process_are_seen(open_store):
+    worker_a, worker_b = open_store(), open_store()
+    worker_b.get("s")  # cache the session in worker b before a writes
+    worker_a.add("s", "q1", "a1", [])
+    worker_a.flush()
+    assert [t["query"] for t in worker_b.get("s")] == ["q1"]
+
+    worker_b.add("s", "q2", "a2", [])
+    worker_b.flush()
+    assert [t["query"] for t in worker_a.get("s")] == ["q1", "q2"]
+
+
+def test_reads_include_own_queued_writes(open_store):
+    store = open_store(flush_interval=10.0, batch_size=1000)
+    store.add("s", "q1", "a1", [])
+    assert [t["query"] for t in store.get("s")] == ["q1"]
+
+
+def test_max_turns_and_clear(open_store):
+    store = open_store(max_turns=2)
+    for i in range(4):
+        store.add("s", f"q{i}", "a", [])
+    store.flush()
+    assert [t["query"] for t in open_store(max_turns=2).get("s")] == ["q2", "q3"]
+
+    store.clear("s")
+    assert store.get("s") == []
+    assert open_store().get("s") == []
+
+
+def test_clear_by_another_process_is_seen(open_store):
+    worker_a, worker_b = open_store(), open_store()
+    worker_b.add("s", "old1", "a", [])
+    worker_b.add("s", "old2", "a", [])
+    worker_b.flush()
+    assert len(worker_a.get("s")) == 2
+
+    # Same turn count as before the clear, so only the epoch tells them apart
+    worker_a.clear("s")
+    worker_a.add("s", "new1", "a", [])
+    worker_a.add("s", "new2", "a", [])
+    worker_a.flush()
+    assert [t["query"] for t in worker_b.get("s")] == ["new1", "new2"]
+
+    worker_b.add("s", "new3", "a", [])
+    worker_b.flush()
+    assert [t["query"] for t in worker_a.get("s")] == ["new1", "new2", "new3"]
+
+
+def test_expiry_by_another_process_is_seen(open_store, db_path):
+    worker_a, worker_b = open_store(), open_store()
+    worker_b.add("s", "old1", "a", [])
+    worker_b.flush()
+    assert len(worker_a.get("s")) == 1
+
+    worker_a.idle_ttl_seconds = -1  # every session counts as idle
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    worker_a._expire(conn)
+    conn.close()
+    worker_a.idle_ttl_seconds = None
+    assert worker_b.get("s") == []
+
+    worker_a.add("s", "new1", "a", [])
+    worker_a.flush()
+    assert [t["query"] for t in worker_b.get("s")] == ["new1"]
+
+
+def test_failed_expiry_rolls_back_and_keeps_writer_alive(open_store, monkeypatch):
+    def failing_expire(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(SQLiteSessionStore, "_expire", failing_expire)
+    store = open_store()
+    store.add("s", "q1", "a1", [])
+    store.flush()
+    assert store._writer.is_alive()
+
+    # The writer still commits, and no transaction blocks other connections
+    store.add("s", "q2", "a2", [])
+    store.flush(timeout=2)
+    assert [t["query"] for t in open_store().get("s")] == ["q1", "q2"]
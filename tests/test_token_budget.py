@@ -0,0 +1,84 @@
+"""
+Unit tests for prompt token budgeting.
+"""
+
+from app.agents.reasoning_agent import ReasoningAgent
+from app.utils.token_budget import TokenBudget, approx_token_count
+
+
+def _passages(n, words=50):
+    return [
+        {"id": f"doc#p{i}", "text": " ".join(["word"] * words), "score": 1.0 - i * 0.1}
+        for i in range(n)
+    ]
+
+
+def _turns(n):
+    return [{"query": f"question {i}", "answer": " ".join(["answer"] * 20), "trace": []} for i in range(n)]
+
+
+def test_approx_token_count():
+    assert approx_token_count("") == 0
+    assert approx_token_count("a b c") == 3
+    # Long words are counted as several sub-word tokens
+    assert approx_token_count("internationalization") > 1
+
+
+def test_everything_fits_in_large_budget():
+    budget = TokenBudget(num_ctx=100_000, reserve_output=0)
+    plan = budget.allocate("fixed", "be nice", _passages(3), _turns(2))
+
+    assert plan["instructions"] == "be nice"
+    assert [i for i, _ in plan["passages"]] == [0, 1, 2]
+    assert [i for i, _ in plan["history"]] == [0, 1]
+    assert plan["dropped"] == {"passages": 0, "history": 0}
+
+
+def test_lowest_scoring_passages_dropped_first():
+    budget = TokenBudget(num_ctx=130, reserve_output=0, min_piece_tokens=1000)
+    passages = _passages(3)
+    passages[0]["score"] = 0.1  # least relevant despite coming first
+    plan = budget.allocate("", "", passages)
+
+    kept = [i for i, _ in plan["passages"]]
+    assert kept == [1, 2]
+    assert plan["dropped"]["passages"] == 1
+
+
+def test_oldest_history_dropped_first():
+    budget = TokenBudget(num_ctx=200, reserve_output=0, min_piece_tokens=1000)
+    plan = budget.allocate("", "", [], _turns(10))
+
+    kept = [i for i, _ in plan["history"]]
+    assert kept == sorted(kept)
+    assert kept[-1] == 9
+    assert plan["dropped"]["history"] > 0
+
+
+def test_partial_piece_truncated_when_room_left():
+    budget = TokenBudget(num_ctx=80, reserve_output=0, min_piece_tokens=10)
+    plan = budget.allocate("", "", _passages(2))
+
+    assert len(plan["passages"]) == 2
+    assert budget.count(plan["passages"][1][1]) < 50
+    assert plan["tokens"]["total"] <= budget.prompt_budget
+
+
+def test_priority_order_respected():
+    budget = TokenBudget(num_ctx=60, reserve_output=0, min_piece_tokens=1000, priority=["history", "passages"])
+    plan = budget.allocate("", "ignored", _passages(1), _turns(1))
+
+    assert plan["history"]
+    assert plan["passages"] == []
+    assert plan["instructions"] == ""
+
+
+def test_prompt_stays_within_num_ctx_for_long_sessions():
+    agent = ReasoningAgent()
+    agent.budget = TokenBudget(num_ctx=1024, reserve_output=256)
+    prompts = agent._build_prompt("What is new?", _passages(5, words=60), _turns(500))
+    prompt = prompts["system"] + prompts["prompt"]
+
+    assert agent.budget.count(prompt) <= agent.budget.prompt_budget
+    assert "[MEMORY 499]" in prompt
+    assert "[MEMORY 0]" not in prompt
@@ -0,0 +1,58 @@
+"""
+Unit tests for relevance-based recall of past turns.
+"""
+
+import numpy as np
+
+from app.utils.memory import SUMMARY_QUERY
+from app.utils.turn_recall import TurnRecall
+
+
+def _unit(i, dim=8):
+    v = np.zeros(dim, dtype=np.float32)
+    v[i] = 1.0
+    return v
+
+
+def _turns(n):
+    return [{"query": f"q{i}", "answer": f"a{i}", "trace": []} for i in range(n)]
+
+
+def test_short_sessions_are_returned_unchanged():
+    recall = TurnRecall(top_k=2, recent=2)
+    turns = _turns(4)
+    assert recall.select("s", turns, _unit(0)) == turns
+
+
+def test_recalls_similar_turns_plus_recent_in_order():
+    recall = TurnRecall(top_k=1, recent=2)
+    turns = _turns(6)
+    for i, t in enumerate(turns):
+        recall.remember("s", t["query"], t["answer"], _unit(i))
+
+    selected = recall.select("s", turns, _unit(1))
+    assert [t["query"] for t in selected] == ["q1", "q4", "q5"]
+
+
+def test_prompt_history_size_is_constant():
+    recall = TurnRecall(top_k=2, recent=2)
+    for n in (10, 100):
+        turns = _turns(n)
+        for i, t in enumerate(turns):
+            recall.remember("s", t["query"], t["answer"], _unit(i % 8))
+        assert len(recall.select("s", turns, _unit(3))) == 4
+
+
+def test_missing_embeddings_backfilled_in_one_batch():
+    calls = []
+
+    def embed(texts):
+        calls.append(texts)
+        return np.stack([_unit(int(t[1:])) for t in texts])
+
+    recall = TurnRecall(top_k=1, recent=1)
+    turns = [{"query": SUMMARY_QUERY, "answer": "earlier", "trace": []}] + _turns(4)
+    selected = recall.select("s", turns, _unit(2), embed=embed)
+
+    assert calls == [["q0", "q1", "q2"]]
+    assert [t["query"] for t in selected] == [SUMMARY_QUERY, "q2", "q3"]